@@ -1,47 +1,80 @@
 import argparse
-import hashlib
+import itertools
 import json
-import re
+import os
+import sqlite3
 import sys
-from typing import Any
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator, TypeVar
 
+# Run as a script, only agents/scripts is on sys.path; the canonicalizers live in the evolver package.
+_REPO_ROOT = str(Path(__file__).resolve().parents[2])
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
 
-def _sha256_hex(data: bytes) -> str:
-    return hashlib.sha256(data).hexdigest()
+from evolver.signature import canonicalize_where_sql, compute_signature, sha256_hex  # noqa: E402
 
 
-def _normalize_newlines_in_json(value: Any) -> Any:
-    if isinstance(value, str):
-        return value.replace("\r\n", "\n").replace("\r", "\n")
-    if isinstance(value, list):
-        return [_normalize_newlines_in_json(v) for v in value]
-    if isinstance(value, dict):
-        return {k: _normalize_newlines_in_json(v) for k, v in value.items()}
-    return value
+class SignatureIndex:
+    """
+    Persistent (sqlite3) index of signatures that were already evaluated.
 
+    Keyed by (mode, sha256); `ref` is a caller-chosen pointer to the earlier evaluation (e.g. iteration/round/query id).
+    """
 
-def canonicalize_json_text(json_text: str) -> str:
-    try:
-        parsed = json.loads(json_text)
-    except json.JSONDecodeError as exc:
-        raise ValueError(f"Invalid JSON: {exc}") from exc
-
-    parsed = _normalize_newlines_in_json(parsed)
-
-    return json.dumps(
-        parsed,
-        ensure_ascii=False,
-        separators=(",", ":"),
-        sort_keys=True,
-        allow_nan=False,
-    )
+    def __init__(self, db_path: str) -> None:
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            "mode TEXT NOT NULL, sha256 TEXT NOT NULL, ref TEXT, first_seen REAL NOT NULL, "
+            "PRIMARY KEY (mode, sha256))"
+        )
+        self._conn.commit()
+
+    def lookup(self, mode: str, digest: str) -> str | None:
+        """Return the recorded ref ("" when recorded without one), or None if the signature is new."""
+        row = self._conn.execute(
+            "SELECT ref FROM signatures WHERE mode = ? AND sha256 = ?", (mode, digest),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0] or ""
+
+    def record(self, mode: str, digest: str, ref: str | None = None) -> bool:
+        """Record a signature; returns False if it was already present (the first ref is kept)."""
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO signatures (mode, sha256, ref, first_seen) VALUES (?, ?, ?, ?)",
+            (mode, digest, ref, time.time()),
+        )
+        self._conn.commit()
+        return cursor.rowcount == 1
+
+    def record_many(self, entries: Iterable[tuple[str, str, str | None]]) -> int:
+        """Record (mode, sha256, ref) entries in a single transaction; returns how many were new."""
+        now = time.time()
+        changes_before = self._conn.total_changes
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO signatures (mode, sha256, ref, first_seen) VALUES (?, ?, ?, ?)",
+                ((mode, digest, ref, now) for mode, digest, ref in entries),
+            )
+        return self._conn.total_changes - changes_before
 
+    def lookup_group_sql(self, group_sql: str) -> str | None:
+        """Check whether an equivalent QueryDefinition.group_sql cohort was already recorded."""
+        return self.lookup("sql", sha256_hex(canonicalize_where_sql(group_sql).encode("utf-8")))
 
-def canonicalize_where_sql(sql: str) -> str:
-    upper_sql = sql.upper()
+    def close(self) -> None:
+        self._conn.close()
 
-    collapsed = re.sub(r"\\s+", " ", upper_sql).strip()
-    return collapsed
+    def __enter__(self) -> "SignatureIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
 
 def _read_text_from_file_or_stdin(*, file_path: str | None) -> str:
@@ -59,6 +92,149 @@ def _write_output(text: str, *, output_path: str | None) -> None:
     sys.stdout.write(text)
 
 
+def _batch_result(indexed_line: tuple[int, str], print_canonical: bool) -> str:
+    index, line = indexed_line
+    result: dict[str, Any] = {"index": index}
+    try:
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("Batch record must be a JSON object")
+        if "id" in record:
+            result["id"] = record["id"]
+        mode = record.get("mode")
+        text = record.get("text")
+        if not isinstance(text, str):
+            raise ValueError("Batch record field 'text' must be a string")
+        digest, canonical = compute_signature(mode, text, with_canonical=print_canonical)
+    except (json.JSONDecodeError, ValueError) as exc:
+        result["error"] = str(exc)
+        return json.dumps(result, ensure_ascii=False)
+
+    result["mode"] = mode
+    result["sha256"] = digest
+    if print_canonical:
+        result["canonical"] = canonical
+    return json.dumps(result, ensure_ascii=False)
+
+
+def _batch_result_chunk(indexed_lines: list[tuple[int, str]], print_canonical: bool) -> list[str]:
+    return [_batch_result(indexed_line, print_canonical) for indexed_line in indexed_lines]
+
+
+def _iter_batch_lines(stream: IO[str]) -> Iterator[tuple[int, str]]:
+    index = 0
+    for raw_line in stream:
+        line = raw_line.strip()
+        if not line:
+            continue
+        yield index, line
+        index += 1
+
+
+_T = TypeVar("_T")
+
+
+def _chunked(items: Iterable[_T], size: int) -> Iterator[list[_T]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_batch_results(
+        indexed_lines: Iterable[tuple[int, str]],
+        *,
+        workers: int,
+        chunk_size: int = 256,
+        print_canonical: bool = False,
+) -> Iterator[str]:
+    """
+    Hash JSONL batch records and yield one JSONL result per record, in input order.
+
+    Records are shipped to the process pool in chunks, and at most `2 * workers` chunks are in flight so the input is
+    consumed as results are written instead of being read whole.
+    """
+    chunks = _chunked(indexed_lines, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _batch_result_chunk(chunk, print_canonical)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight: deque = deque()
+        for chunk in itertools.islice(chunks, 2 * workers):
+            in_flight.append(executor.submit(_batch_result_chunk, chunk, print_canonical))
+        while in_flight:
+            results = in_flight.popleft().result()
+            next_chunk = next(chunks, None)
+            if next_chunk is not None:
+                in_flight.append(executor.submit(_batch_result_chunk, next_chunk, print_canonical))
+            yield from results
+
+
+def _annotate_with_index(result_lines: list[str], index: SignatureIndex, *, record: bool) -> list[str]:
+    """
+    Mark a chunk of batch results with 'seen'; with `record`, new signatures are written in one transaction per chunk.
+    A signature repeated within the chunk is reported as seen, with the ref of its first occurrence.
+    """
+    recorded: dict[tuple[str, str], str] = {}
+    annotated: list[str] = []
+    for result_line in result_lines:
+        result = json.loads(result_line)
+        digest = result.get("sha256")
+        if digest is None:
+            annotated.append(result_line)
+            continue
+        key = (result["mode"], digest)
+        seen_ref = recorded.get(key)
+        if seen_ref is None:
+            seen_ref = index.lookup(result["mode"], digest)
+        result["seen"] = seen_ref is not None
+        if seen_ref is not None:
+            result["seen_ref"] = seen_ref
+        elif record:
+            recorded[key] = str(result.get("id", result["index"]))
+        annotated.append(json.dumps(result, ensure_ascii=False))
+    if recorded:
+        index.record_many((mode, digest, ref) for (mode, digest), ref in recorded.items())
+    return annotated
+
+
+def _run_batch(args: argparse.Namespace) -> int:
+    workers = args.workers if args.workers is not None else (os.cpu_count() or 1)
+    input_stream = open(args.file_path, "r", encoding="utf-8") if args.file_path else sys.stdin
+    output_stream = open(args.out_path, "w", encoding="utf-8", newline="\n") if args.out_path else sys.stdout
+    index = SignatureIndex(args.index_path) if args.index_path else None
+    try:
+        results = iter_batch_results(
+            _iter_batch_lines(input_stream),
+            workers=workers,
+            chunk_size=args.chunk_size,
+            print_canonical=args.print_canonical,
+        )
+        for result_lines in _chunked(results, args.chunk_size):
+            if index is not None:
+                result_lines = _annotate_with_index(result_lines, index, record=args.record)
+            output_stream.writelines(result_line + "\n" for result_line in result_lines)
+    finally:
+        if args.file_path:
+            input_stream.close()
+        if args.out_path:
+            output_stream.close()
+        if index is not None:
+            index.close()
+    return 0
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main(argv: list[str]) -> int:
     parser = argparse.ArgumentParser(description="Compute sha256(canonical_form) for JSON DSL or SQL WHERE-suffix")
     subparsers = parser.add_subparsers(dest="mode", required=True)
@@ -73,20 +249,52 @@ def main(argv: list[str]) -> int:
     sql_parser.add_argument("--out", dest="out_path", default=None)
     sql_parser.add_argument("--print-canonical", action="store_true", default=False)
 
+    for single_parser in (json_parser, sql_parser):
+        single_parser.add_argument("--index", dest="index_path", default=None,
+                                   help="Signature index (sqlite) to check; output becomes JSON with 'seen'")
+        single_parser.add_argument("--record", dest="record_ref", default=None,
+                                   help="Record the signature in --index with this ref if it is new")
+
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help='Hash JSONL records {"mode": "json"|"sql", "text": ...} and write JSONL results in input order',
+    )
+    batch_parser.add_argument("--file", dest="file_path", default=None)
+    batch_parser.add_argument("--out", dest="out_path", default=None)
+    batch_parser.add_argument("--print-canonical", action="store_true", default=False)
+    batch_parser.add_argument("--workers", type=_positive_int, default=None,
+                              help="Process pool size (default: CPU count)")
+    batch_parser.add_argument("--chunk-size", type=_positive_int, default=256, help="Records per worker task")
+    batch_parser.add_argument("--index", dest="index_path", default=None,
+                              help="Signature index (sqlite) used to mark results with 'seen'")
+    batch_parser.add_argument("--record", action="store_true", default=False,
+                              help="Record new signatures in --index (ref = record id or input index)")
+
     args = parser.parse_args(argv)
+    record_requested = args.record if args.mode == "batch" else args.record_ref is not None
+    if record_requested and not args.index_path:
+        parser.error("--record requires --index")
+
+    if args.mode == "batch":
+        return _run_batch(args)
 
     raw_text = _read_text_from_file_or_stdin(file_path=args.file_path)
 
-    if args.mode == "json":
-        canonical = canonicalize_json_text(raw_text)
-    elif args.mode == "sql":
-        canonical = canonicalize_where_sql(raw_text)
-    else:
-        raise ValueError(f"Unknown mode: {args.mode}")
+    print_canonical = getattr(args, "print_canonical", False)
+    digest, canonical = compute_signature(args.mode, raw_text, with_canonical=print_canonical)
 
-    digest = _sha256_hex(canonical.encode("utf-8"))
+    if args.index_path:
+        with SignatureIndex(args.index_path) as index:
+            seen_ref = index.lookup(args.mode, digest)
+            if seen_ref is None and args.record_ref is not None:
+                index.record(args.mode, digest, args.record_ref)
+        payload_fields: dict[str, Any] = {"sha256": digest, "seen": seen_ref is not None, "seen_ref": seen_ref}
+        if print_canonical:
+            payload_fields["canonical"] = canonical
+        _write_output(json.dumps(payload_fields, ensure_ascii=False) + "\n", output_path=args.out_path)
+        return 0
 
-    if getattr(args, "print_canonical", False):
+    if print_canonical:
         payload = json.dumps({"sha256": digest, "canonical": canonical}, ensure_ascii=False, indent=2)
         _write_output(payload + "\n", output_path=args.out_path)
         return 0
@@ -1,11 +1,5 @@
-from evolver.level0.dsl.ci_report import CiReport
 from evolver.level0.dsl.code_evidence import CodeEvidence
-from evolver.level0.dsl.db_manifest import DbManifestReport
-from evolver.level0.dsl.evaluator_run import EvaluatorRun
-from evolver.level0.dsl.group_definition import GroupDefinition
-from evolver.level0.dsl.hypothesis import Hypothesis
-from evolver.level0.dsl.output_result import OutputResultEnvelope
-from evolver.level0.dsl.surrogate_index import SurrogateIndex
-from evolver.level0.dsl.theory import Theory
-from evolver.level0.dsl.tracing_session import TracingSession
-from .base import DslAllowExtraModel, DslBaseModel
+from evolver.level0.dsl.execution import EvaluatorRun
+from evolver.level0.dsl.proposal import Hypothesis, Theory
+from evolver.level0.dsl.tracing import TracingSession
+from .base_model import DslAllowExtraModel, DslBaseModel, DslIgnoreExtraModel
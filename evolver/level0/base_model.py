@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import contextlib
+import functools
+import gc
+import os
+import threading
+import types
+import typing
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Mapping, Optional, Tuple, Type, TypeVar, Union
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from pydantic_core import to_json
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Rendered watch values keyed by watch expression: strings, numbers, booleans, nested JSON or null.
+JsonStrDict = Dict[str, Any]
+
+_STREAM_FLUSH_BYTES = 256 * 1024
+# Models with fewer nested list items than this are serialized in one to_json() call instead of field by field.
+_STREAM_MIN_ITEMS = 256
+
+# gc_paused() nesting depth across threads, and whether the collector was enabled when the outermost one entered.
+_gc_pause_lock = threading.Lock()
+_gc_pause_depth = 0
+_gc_was_enabled = False
+
+
+class DslBaseModel(BaseModel):
+    """Base for DSL models exchanged with external components; unknown fields are rejected."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    @classmethod
+    def model_validate_trusted(cls: Type[ModelT], data: Mapping[str, Any]) -> ModelT:
+        """Build from data this process produced itself, skipping validation (see trusted_construct)."""
+        return trusted_construct(cls, data)
+
+    @classmethod
+    def model_validate_json_fast(cls: Type[ModelT], data: Union[str, bytes]) -> ModelT:
+        return load_model_json(cls, data)
+
+    def dump_json_to(self, target: Union[Path, BinaryIO]) -> int:
+        return dump_model_json(self, target)
+
+
+class DslAllowExtraModel(DslBaseModel):
+    """DSL model that keeps unknown fields (e.g. producer-specific extensions)."""
+
+    model_config = ConfigDict(extra="allow")
+
+
+class DslIgnoreExtraModel(DslBaseModel):
+    """DSL model that drops unknown fields (lenient parsing of agent-produced JSON)."""
+
+    model_config = ConfigDict(extra="ignore")
+
+
+@contextlib.contextmanager
+def gc_paused() -> Iterator[None]:
+    """
+    Suspend the cyclic garbage collector while building large model graphs. Allocating ~10^5 models otherwise
+    triggers repeated full collections that scan everything already built, roughly doubling validation time.
+
+    Safe to nest and to use from several threads: the collector is re-enabled only when the last pause exits, and
+    only if it was enabled when the first one entered.
+    """
+    global _gc_pause_depth, _gc_was_enabled
+    with _gc_pause_lock:
+        if _gc_pause_depth == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pause_depth += 1
+    try:
+        yield
+    finally:
+        with _gc_pause_lock:
+            _gc_pause_depth -= 1
+            if _gc_pause_depth == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+@functools.lru_cache(maxsize=None)
+def type_adapter(annotation: Any) -> TypeAdapter:
+    """Shared TypeAdapter per type (building one for a recursive model is far more expensive than using it)."""
+    return TypeAdapter(annotation)
+
+
+def validate_json(annotation: Any, data: Union[str, bytes]) -> Any:
+    """Validate raw JSON (str or bytes, no json.loads round-trip) against any type, e.g. List[Tracing]."""
+    with gc_paused():
+        return type_adapter(annotation).validate_json(data)
+
+
+def validate_python(annotation: Any, data: Any) -> Any:
+    return type_adapter(annotation).validate_python(data)
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if typing.get_origin(annotation) is typing.Annotated:
+        annotation = typing.get_args(annotation)[0]
+    if typing.get_origin(annotation) in (Union, types.UnionType):
+        arguments = [argument for argument in typing.get_args(annotation) if argument is not type(None)]
+        if len(arguments) == 1:
+            return _unwrap_optional(arguments[0])
+    return annotation
+
+
+def _model_class(annotation: Any) -> Optional[Type[BaseModel]]:
+    annotation = _unwrap_optional(annotation)
+    return annotation if isinstance(annotation, type) and issubclass(annotation, BaseModel) else None
+
+
+@functools.lru_cache(maxsize=None)
+def _nested_model_fields(model_cls: Type[BaseModel]) -> Tuple[Tuple[str, str, Type[BaseModel]], ...]:
+    """(field name, "model" | "list" | "dict", nested model class) for fields holding DSL models."""
+    nested = []
+    for name, field_info in model_cls.model_fields.items():
+        annotation = _unwrap_optional(field_info.annotation)
+        origin = typing.get_origin(annotation)
+        arguments = typing.get_args(annotation)
+        if _model_class(annotation) is not None:
+            nested.append((name, "model", _model_class(annotation)))
+        elif origin in (list, tuple) and arguments and _model_class(arguments[0]) is not None:
+            nested.append((name, "list", _model_class(arguments[0])))
+        elif origin is dict and len(arguments) == 2 and _model_class(arguments[1]) is not None:
+            nested.append((name, "dict", _model_class(arguments[1])))
+    return tuple(nested)
+
+
+_object_setattr = object.__setattr__
+
+
+def _construct(model_cls: Type[ModelT], values: Dict[str, Any]) -> ModelT:
+    # Our own model_dump output carries every field, so defaults and extras need no handling; anything else goes
+    # through model_construct.
+    if model_cls.model_config.get("extra") == "allow" or values.keys() != model_cls.model_fields.keys():
+        return model_cls.model_construct(**values)
+    instance = model_cls.__new__(model_cls)
+    _object_setattr(instance, "__dict__", values)
+    _object_setattr(instance, "__pydantic_fields_set__", set(values))
+    _object_setattr(instance, "__pydantic_extra__", None)
+    _object_setattr(instance, "__pydantic_private__", None)
+    return instance
+
+
+def _trusted(model_cls: Type[ModelT], data: Any) -> ModelT:
+    if isinstance(data, model_cls):
+        return data
+    values = dict(data)
+    for name, shape, nested_cls in _nested_model_fields(model_cls):
+        value = values.get(name)
+        if value is None:
+            continue
+        if shape == "model":
+            values[name] = _trusted(nested_cls, value)
+        elif shape == "list":
+            values[name] = [_trusted(nested_cls, item) for item in value]
+        else:
+            values[name] = {key: _trusted(nested_cls, item) for key, item in value.items()}
+    return _construct(model_cls, values)
+
+
+def trusted_construct(model_cls: Type[ModelT], data: Mapping[str, Any]) -> ModelT:
+    """
+    Recursively build `model_cls` from plain data without validation.
+
+    Only for data this wrapper produced itself (e.g. model graphs handed over in-process), and it skips field
+    validators too. External input must go through load_model_json / validate_json; for JSON, pydantic-core
+    validation from bytes is also faster than any Python-side construction.
+    """
+    with gc_paused():
+        return _trusted(model_cls, data)
+
+
+def load_model_json(model_cls: Type[ModelT], data: Union[str, bytes]) -> ModelT:
+    """model_validate_json straight from str/bytes (no json.loads round-trip) with the collector paused."""
+    with gc_paused():
+        return model_cls.model_validate_json(data)
+
+
+def _nested_item_count(model: BaseModel) -> int:
+    count = 0
+    for name, shape, _ in _nested_model_fields(type(model)):
+        value = getattr(model, name, None)
+        if shape == "list" and value:
+            count += len(value)
+    return count
+
+
+def iter_model_json(value: Any) -> Iterator[bytes]:
+    """
+    Compact JSON of a model (same bytes as model_dump_json()) as a stream of chunks. Models holding large lists of
+    nested models are walked field by field and item by item, so no string of the whole document is ever built;
+    everything smaller is serialized in a single pydantic-core call.
+    """
+    if isinstance(value, BaseModel):
+        if _nested_item_count(value) < _STREAM_MIN_ITEMS:
+            yield value.__pydantic_serializer__.to_json(value)
+            return
+        yield b"{"
+        for index, name in enumerate(type(value).model_fields):
+            yield b',"' if index else b'"'
+            yield name.encode("utf-8")
+            yield b'":'
+            yield from iter_model_json(getattr(value, name))
+        for name, item in (value.__pydantic_extra__ or {}).items():
+            yield b"," + to_json(name) + b":"
+            yield from iter_model_json(item)
+        yield b"}"
+    elif isinstance(value, (list, tuple)) and value and isinstance(value[0], BaseModel):
+        yield b"["
+        for index, item in enumerate(value):
+            if index:
+                yield b","
+            yield from iter_model_json(item)
+        yield b"]"
+    else:
+        yield to_json(value)
+
+
+def dump_model_json(model: BaseModel, target: Union[Path, BinaryIO]) -> int:
+    """Stream `model` as JSON to a path (written atomically) or binary file object; returns the bytes written."""
+    if isinstance(target, Path):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temporary = target.with_name(target.name + ".tmp")
+        with open(temporary, "wb") as handle:
+            written = dump_model_json(model, handle)
+        os.replace(temporary, target)
+        return written
+    written = 0
+    buffer = bytearray()
+    for chunk in iter_model_json(model):
+        buffer += chunk
+        if len(buffer) >= _STREAM_FLUSH_BYTES:
+            target.write(buffer)
+            written += len(buffer)
+            buffer.clear()
+    target.write(buffer)
+    return written + len(buffer)
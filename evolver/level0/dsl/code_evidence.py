@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from typing import List, Literal, Optional, Tuple
 
-from pydantic import BaseModel, Field
+from evolver.level0.base_model import DslIgnoreExtraModel
+from pydantic import Field
 
 EvidenceKind = Literal[
     "file_range",  # file + line range
@@ -13,7 +14,7 @@ EvidenceKind = Literal[
 ]
 
 
-class CodeEvidenceItem(BaseModel):
+class CodeEvidenceItem(DslIgnoreExtraModel):
     kind: EvidenceKind = Field(
         ...,
         description=(
@@ -59,7 +60,7 @@ class CodeEvidenceItem(BaseModel):
     )
 
 
-class CodeEvidenceObservation(BaseModel):
+class CodeEvidenceObservation(DslIgnoreExtraModel):
     claim: str = Field(
         min_length=1,
         max_length=4000,
@@ -74,7 +75,7 @@ class CodeEvidenceObservation(BaseModel):
     )
 
 
-class CodeEvidence(BaseModel):
+class CodeEvidence(DslIgnoreExtraModel):
     investigation_area: str = Field(..., min_length=1, max_length=128,
                                     description="Human-readable scope of investigation.")
     tracing_packages: List[str] = Field(..., min_length=1, max_length=256,
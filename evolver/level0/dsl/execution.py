@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field, ConfigDict
+from evolver.level0.base_model import DslBaseModel, DslIgnoreExtraModel
+from pydantic import Field
 
 from evolver.level0.dsl.proposal import ProposalResult
 from evolver.level0.dsl.scoring import Scoring, ScoringConfig
@@ -13,7 +14,7 @@ from evolver.level0.dsl.tracing import TracingSession
 # Protocol (splits / sampling / control)
 # ----------------------------
 
-class SplitsConfig(BaseModel):
+class SplitsConfig(DslIgnoreExtraModel):
     """Split definition for experiment partitions."""
     type: str = Field("state_bins", description="TEST / VALIDATION / HOLDOUT")
     bins: str = Field(..., description="State code used for split bin (e.g. CA).")
@@ -26,7 +27,7 @@ class SplitsConfig(BaseModel):
 StrataBy = Literal["none", "city_id_bins", "state_bins"]
 
 
-class StratificationConfig(BaseModel):
+class StratificationConfig(DslIgnoreExtraModel):
     """Deterministic stratification policy."""
     enabled: bool = Field(True)
     by: StrataBy = Field("city_id_bins")
@@ -35,7 +36,7 @@ class StratificationConfig(BaseModel):
     max_per_bin: int = Field(60, ge=0, le=1000000)
 
 
-class SamplingConfig(BaseModel):
+class SamplingConfig(DslIgnoreExtraModel):
     """Deterministic sampling and repeat policy."""
 
     sample_size: int = Field(1000, ge=1, le=1_000_000)
@@ -47,7 +48,7 @@ class SamplingConfig(BaseModel):
 ControlPolicy = Literal["uniform_random_from_eligible_population"]
 
 
-class ControlConfig(BaseModel):
+class ControlConfig(DslIgnoreExtraModel):
     """Wrapper-generated control cohort semantics."""
 
     control_policy: ControlPolicy = Field("uniform_random_from_eligible_population")
@@ -58,7 +59,7 @@ class ControlConfig(BaseModel):
     )
 
 
-class ProtocolConfig(BaseModel):
+class ProtocolConfig(DslIgnoreExtraModel):
     """End-to-end experiment protocol."""
 
     splits: SplitsConfig
@@ -70,7 +71,7 @@ class ProtocolConfig(BaseModel):
 # Evaluator
 # ----------------------------
 
-class EvaluatorConfig(BaseModel):
+class EvaluatorConfig(DslIgnoreExtraModel):
     """REST evaluator endpoint configuration."""
 
     locale_parameter_name: str = Field("locale", min_length=1, max_length=64)
@@ -81,7 +82,7 @@ class EvaluatorConfig(BaseModel):
 # Tracing
 # ----------------------------
 
-class TracingConfig(BaseModel):
+class TracingConfig(DslIgnoreExtraModel):
     """Tracing policy (header name + budgets + default keys)."""
 
     enabled: bool = Field(True)
@@ -94,7 +95,7 @@ class TracingConfig(BaseModel):
 # Acceptance
 # ----------------------------
 
-class AcceptanceConfig(BaseModel):
+class AcceptanceConfig(DslIgnoreExtraModel):
     min_delta_notFoundRate: float = Field(0.05, ge=0.0, le=1.0)
     max_allowed_failedRate_increase: float = Field(0.10, ge=0.0, le=1.0)
     require_ci_excludes_zero: bool = Field(True)
@@ -125,9 +126,7 @@ LogEvent = Literal[
 ]
 
 
-class LoggingConfig(BaseModel):
-    model_config = ConfigDict(extra="forbid")
-
+class LoggingConfig(DslBaseModel):
     structured_json_logs: bool = Field(True)
     log_dir_template: str = Field("runs/{iteration_id}/logs", min_length=1, max_length=256)
     artifact_dir_template: str = Field("runs/{iteration_id}/artifacts", min_length=1, max_length=256)
@@ -135,7 +134,7 @@ class LoggingConfig(BaseModel):
     max_error_text_len: int = Field(2048, ge=128, le=100000)
 
 
-class GatesConfig(BaseModel):
+class GatesConfig(DslIgnoreExtraModel):
     """
     Immutable gates config used by wrapper execute().
 
@@ -157,7 +156,7 @@ class GatesConfig(BaseModel):
 EvaluatorRunStatus = Literal["RUNNING", "COMPLETED", "FAILED"]
 
 
-class EvaluatorRun(BaseModel):
+class EvaluatorRun(DslIgnoreExtraModel):
     run_id: int
     status: EvaluatorRunStatus
     totalCount: int = Field(ge=0)
@@ -172,7 +171,7 @@ class EvaluatorRun(BaseModel):
     notFoundRate: float = Field(ge=0, le=1)
 
 
-class ExecutionEvidence(BaseModel):
+class ExecutionEvidence(DslIgnoreExtraModel):
     db_apply_report: Dict[str, Any] = Field(
         default_factory=dict,
         description="Result of applying db_manifest (created objects, errors, timings).",
@@ -182,12 +181,12 @@ class ExecutionEvidence(BaseModel):
         description="Evaluator bundle output (aggregated metrics per cohort/stratum/repeat).",
     )
     tracing_sessions: List[TracingSession] = Field(
-        default_factory=dict,
+        default_factory=list,
         description="Tracing bundle output (extracted variable tracings, breakpoint hit stats).",
     )
 
 
-class Decision(BaseModel):
+class Decision(DslIgnoreExtraModel):
     status: Literal["ACCEPTED", "REJECTED", "ERROR"] = Field(..., description="High-level decision outcome.")
     is_ready: bool = Field(..., description="Stop condition for the loop: true if candidate meets acceptance criteria.")
     primary_reason: str = Field(..., min_length=1, max_length=256,
@@ -197,7 +196,7 @@ class Decision(BaseModel):
                            description="Per-gate evaluation results (effect, CI, novelty, mechanism, holdout, reproducibility).", )
 
 
-class Experiment(BaseModel):
+class Experiment(DslIgnoreExtraModel):
     round_index: int = Field(..., ge=1, description="Round index related in main loop logic.")
     iteration_id: str = Field(..., min_length=1, max_length=64,
                               description="Correlation id for tracing and evaluator calls.")
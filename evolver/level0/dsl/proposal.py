@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from evolver.level0.base_model import DslIgnoreExtraModel
+from pydantic import Field
 
 
-class Proposal(BaseModel):
+class Proposal(DslIgnoreExtraModel):
     name: str = Field(
         ..., min_length=1, max_length=256, description="Human-readable name for this proposal."
     )
@@ -69,7 +70,7 @@ class TracingPlan(Proposal):
     )
 
 
-class ProposalResult(BaseModel):
+class ProposalResult(DslIgnoreExtraModel):
     hypotheses: List[Hypothesis] = Field(
         default_factory=list,
         max_length=16,
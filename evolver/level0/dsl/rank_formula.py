@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import ast
+import functools
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Mapping, Tuple
+
+import numpy as np
+
+# Scoring fields available to rank_score_formula and tie_breakers (missing values are NaN).
+RANK_FORMULA_VARIABLES: Dict[str, str] = {
+    "round_index": "Experiment round index.",
+    "accepted": "1.0 when the decision was ACCEPTED, else 0.0.",
+    "delta": "Primary effect size delta (treatment - control).",
+    "ratio": "Primary effect size ratio (treatment / control).",
+    "p_treatment": "Primary effect treatment rate.",
+    "p_control": "Primary effect control rate.",
+    "repeat_runs_used": "Repeats used by the primary effect size.",
+    "ci_low": "Lower bound of the primary confidence interval.",
+    "ci_high": "Upper bound of the primary confidence interval.",
+    "novelty_score": "NoveltyReport.score.",
+    "new_reason_fraction": "NoveltyReport.new_reason_fraction.",
+    "new_region_fraction": "NoveltyReport.new_region_fraction.",
+    "mechanism_score": "MechanismReport.mechanism_total_score.",
+    "holdout_lift_topk": "MechanismReport.holdout_lift_topk.",
+    "complexity_penalty": "ComplexityPenaltyReport.penalty_score.",
+    "join_complexity": "ComplexityPenaltyReport.estimated_join_complexity.",
+    "repeat_variance": "RepeatStoppingReport.repeat_variance.",
+}
+
+_FUNCTIONS: Dict[str, Tuple[int, int, Callable[..., np.ndarray]]] = {
+    # name -> (min args, max args, vectorized implementation)
+    "abs": (1, 1, np.abs),
+    "sqrt": (1, 1, np.sqrt),
+    "log": (1, 1, np.log),
+    "log1p": (1, 1, np.log1p),
+    "exp": (1, 1, np.exp),
+    "min": (2, 2, np.fmin),
+    "max": (2, 2, np.fmax),
+    "clip": (3, 3, np.clip),
+    "coalesce": (2, 2, lambda value, default: np.where(np.isnan(value), default, value)),
+}
+
+_BINARY_OPERATORS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.Pow: np.power,
+}
+_UNARY_OPERATORS = {ast.USub: np.negative, ast.UAdd: np.positive, ast.Not: np.logical_not}
+_COMPARISONS = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+
+_Evaluator = Callable[[Mapping[str, np.ndarray]], np.ndarray]
+
+
+@dataclass(frozen=True)
+class CompiledRankFormula:
+    """rank_score_formula compiled to a vectorized function over a column table of RANK_FORMULA_VARIABLES."""
+
+    formula: str
+    variables: FrozenSet[str]
+    _evaluate: _Evaluator
+
+    def __call__(self, columns: Mapping[str, np.ndarray], rows: int) -> np.ndarray:
+        with np.errstate(all="ignore"):
+            values = np.asarray(self._evaluate(columns), dtype=np.float64)
+        return np.broadcast_to(values, (rows,)).copy()
+
+
+def _compile_node(node: ast.AST, variables: set) -> _Evaluator:
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = np.float64(node.value)
+        return lambda columns: value
+    if isinstance(node, ast.Name):
+        if node.id not in RANK_FORMULA_VARIABLES:
+            raise ValueError(f"Unknown rank formula variable: {node.id!r}")
+        name = node.id
+        variables.add(name)
+        return lambda columns: columns[name]
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        operator = _BINARY_OPERATORS[type(node.op)]
+        left, right = _compile_node(node.left, variables), _compile_node(node.right, variables)
+        return lambda columns: operator(left(columns), right(columns))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        operator = _UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand, variables)
+        return lambda columns: operator(operand(columns))
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARISONS for op in node.ops):
+        operands = [_compile_node(operand, variables) for operand in (node.left, *node.comparators)]
+        operators = [_COMPARISONS[type(op)] for op in node.ops]
+
+        def compare(columns: Mapping[str, np.ndarray]) -> np.ndarray:
+            values = [operand(columns) for operand in operands]
+            result = operators[0](values[0], values[1])
+            for index in range(1, len(operators)):
+                result = np.logical_and(result, operators[index](values[index], values[index + 1]))
+            return result
+
+        return compare
+    if isinstance(node, ast.BoolOp):
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        operands = [_compile_node(operand, variables) for operand in node.values]
+        return lambda columns: functools.reduce(combine, (operand(columns) for operand in operands))
+    if isinstance(node, ast.IfExp):
+        test, body, orelse = (_compile_node(part, variables) for part in (node.test, node.body, node.orelse))
+        return lambda columns: np.where(test(columns), body(columns), orelse(columns))
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        if node.func.id not in _FUNCTIONS:
+            raise ValueError(f"Unknown rank formula function: {node.func.id!r}")
+        min_args, max_args, function = _FUNCTIONS[node.func.id]
+        if not min_args <= len(node.args) <= max_args:
+            raise ValueError(f"{node.func.id}() takes {min_args} argument(s), got {len(node.args)}")
+        arguments = [_compile_node(argument, variables) for argument in node.args]
+        return lambda columns: function(*(argument(columns) for argument in arguments))
+    raise ValueError(f"Unsupported rank formula syntax: {ast.dump(node)[:80]}")
+
+
+@functools.lru_cache(maxsize=256)
+def compile_rank_formula(formula: str) -> CompiledRankFormula:
+    """
+    Compile a rank_score_formula: arithmetic (+ - * / **), comparisons, `and`/`or`/`not`, `a if cond else b`,
+    numeric literals, RANK_FORMULA_VARIABLES and the functions abs, sqrt, log, log1p, exp, min, max, clip and
+    coalesce. Anything else (attributes, subscripts, other names or calls) is rejected with ValueError.
+    """
+    try:
+        tree = ast.parse(formula.strip(), mode="eval")
+    except SyntaxError as exc:
+        raise ValueError(f"Invalid rank formula syntax: {exc.msg}") from None
+    variables: set = set()
+    evaluate = _compile_node(tree.body, variables)
+    return CompiledRankFormula(formula=formula, variables=frozenset(variables), _evaluate=evaluate)
+
+
+def parse_tie_breaker(tie_breaker: str) -> Tuple[str, bool]:
+    """
+    (variable, descending) for a tie breaker written as "name", "name desc", "name asc" or "-name" (ascending).
+    Like the rank score, tie breakers prefer higher values unless marked ascending.
+    """
+    parts = tie_breaker.strip().split()
+    descending = True
+    if len(parts) == 2 and parts[1].lower() in ("asc", "desc"):
+        descending = parts[1].lower() == "desc"
+    elif len(parts) != 1:
+        raise ValueError(f"Invalid tie breaker: {tie_breaker!r}")
+    name = parts[0]
+    if name.startswith("-") and len(parts) == 1:
+        name, descending = name[1:], False
+    if name not in RANK_FORMULA_VARIABLES:
+        raise ValueError(f"Unknown tie breaker variable: {name!r}")
+    return name, descending
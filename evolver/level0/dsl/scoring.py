@@ -2,7 +2,10 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Literal, Tuple, Optional
 
-from pydantic import BaseModel, Field, constr
+from evolver.level0.base_model import DslIgnoreExtraModel
+from pydantic import Field, constr, field_validator
+
+from evolver.level0.dsl.rank_formula import compile_rank_formula, parse_tie_breaker
 
 # ----------------------------
 # Scoring
@@ -29,7 +32,7 @@ EffectAggregation = Literal[
 ]
 
 
-class EffectSizeConfig(BaseModel):
+class EffectSizeConfig(DslIgnoreExtraModel):
     type: EffectType = Field("difference_of_proportions", description="Effect size computation type.")
     primary_comparison: Literal["treatment_vs_control"] = Field("treatment_vs_control")
     aggregation: EffectAggregation = Field("pooled_over_repeats",
@@ -42,7 +45,7 @@ class EffectSizeConfig(BaseModel):
     )
 
 
-class EffectSizeReport(BaseModel):
+class EffectSizeReport(DslIgnoreExtraModel):
     config: EffectSizeConfig
     p_treatment: Optional[float] = Field(default=None, description="Treatment rate (for proportion metrics).")
     p_control: Optional[float] = Field(default=None, description="Control rate (for proportion metrics).")
@@ -52,29 +55,49 @@ class EffectSizeReport(BaseModel):
     repeat_runs_used: int = Field(..., ge=0, description="Number of repeats used in aggregation.")
 
 
-class ConfidenceIntervalConfig(BaseModel):
+class ConfidenceIntervalConfig(DslIgnoreExtraModel):
     method: Literal["bootstrap_by_strata", "wilson", "normal_approx"] = Field("bootstrap_by_strata", min_length=1,
                                                                               max_length=128, description="CI method.")
-    confidence: int = Field(0.95, gt=0.5, lt=1.0, description="Confidence level (e.g., 0.95).")
+    confidence: float = Field(0.95, gt=0.5, lt=1.0, description="Confidence level (e.g., 0.95).")
     resamples: Optional[int] = Field(2000, ge=100, le=200000, description="Bootstrap resamples if applicable.")
     seed: int = Field(1337, ge=0, le=2 ** 31 - 1,
                       description="Seed used for CI computation if stochastic method is used (must be fixed).")
     require_ci_excludes_zero_for_accept: bool = Field(True)
 
 
-class ConfidenceIntervalReport(BaseModel):
+class ConfidenceIntervalReport(DslIgnoreExtraModel):
     config: ConfidenceIntervalConfig
-    low: float = Field(..., description="Lower bound.")
-    high: float = Field(..., description="Upper bound.")
+    low: Optional[float] = Field(..., description="Lower bound (null when the interval is undefined).")
+    high: Optional[float] = Field(..., description="Upper bound (null when the interval is undefined).")
 
 
-class ReproducibilityConfig(BaseModel):
+class ReproducibilityConfig(DslIgnoreExtraModel):
     require_repeats: int = Field(3, ge=1, le=50)
     require_same_direction_all_repeats: bool = Field(True)
-    max_allowed_repeat_variance: int = Field(0.04, ge=0.0, le=1.0)
+    max_allowed_repeat_variance: float = Field(0.04, ge=0.0, le=1.0)
+    sequential_stopping: bool = Field(
+        False,
+        description="Stop issuing evaluator repeats for a cohort once the effect/reproducibility decision is settled.",
+    )
+
+
+RepeatStoppingVerdict = Literal["CONTINUE", "PASS", "FAIL"]
+
+
+class RepeatStoppingReport(DslIgnoreExtraModel):
+    verdict: RepeatStoppingVerdict = Field(..., description="Settled outcome, or CONTINUE while undecided.")
+    reason: str = Field(..., min_length=1, max_length=256,
+                        description="Deterministic stopping reason (e.g., effect_gate_unreachable, max_repeats).")
+    stopped_early: bool = Field(..., description="Whether runs stopped before the planned number of repeats.")
+    repeats_run: int = Field(..., ge=0, description="Number of repeats evaluated.")
+    repeats_planned: int = Field(..., ge=1, description="Maximum number of repeats for the cohort.")
+    mean_delta: Optional[float] = Field(None, description="Mean per-repeat delta (treatment - control).")
+    delta_low: Optional[float] = Field(None, description="Lower sequential confidence bound of mean_delta.")
+    delta_high: Optional[float] = Field(None, description="Upper sequential confidence bound of mean_delta.")
+    repeat_variance: Optional[float] = Field(None, description="Sample variance of per-repeat deltas.")
 
 
-class NoveltyConfig(BaseModel):
+class NoveltyConfig(DslIgnoreExtraModel):
     enabled: bool = Field(True)
     required: bool = Field(True)
     sources: List[Literal["reason_family_clusters", "feature_region_bins", "high_failure_strata"]] = Field(...,
@@ -84,7 +107,7 @@ class NoveltyConfig(BaseModel):
     top_k_to_report: float = Field(8, ge=1, le=100)
 
 
-class NoveltyReport(BaseModel):
+class NoveltyReport(DslIgnoreExtraModel):
     config: NoveltyConfig
     score: float = Field(...,
                          description="Deterministic novelty score derived from new reason families / new regions.", )
@@ -106,13 +129,13 @@ class NoveltyReport(BaseModel):
     )
 
 
-class ComplexityPenaltyConfig(BaseModel):
+class ComplexityPenaltyConfig(DslIgnoreExtraModel):
     max_objects: int = Field(12, ge=0, le=10_000)
     max_joins_per_group_sql: int = Field(4, ge=0, le=50)
     max_manifest_kb: int = Field(64, ge=1, le=1024)
 
 
-class ComplexityPenaltyReport(BaseModel):
+class ComplexityPenaltyReport(DslIgnoreExtraModel):
     config: ComplexityPenaltyConfig
     objects_created_count: int = Field(...,
                                        description="Count of created objects (views, materialization views, tables)")
@@ -126,7 +149,7 @@ class ComplexityPenaltyReport(BaseModel):
     penalty_score: float = Field(..., description="Penalty score based on surrogate/manifest complexity penalty.")
 
 
-class TraceAlignmentConfig(BaseModel):
+class TraceAlignmentConfig(DslIgnoreExtraModel):
     required: bool = Field(True)
     min_correlation: float = Field(0.2, ge=-1.0, le=1.0)
     compare_features_to_trace_keys: List[
@@ -136,7 +159,7 @@ class TraceAlignmentConfig(BaseModel):
     )
 
 
-class TraceAlignmentReport(BaseModel):
+class TraceAlignmentReport(DslIgnoreExtraModel):
     config: TraceAlignmentConfig
     correlation_stats: Dict[str, Any] = Field(
         default_factory=dict,
@@ -144,13 +167,13 @@ class TraceAlignmentReport(BaseModel):
     )
 
 
-class MechanismConfig(BaseModel):
+class MechanismConfig(DslIgnoreExtraModel):
     enabled: bool = Field(True)
     required: bool = Field(True)
     min_holdout_lift_topk: float = Field(1.2, gt=0.0, le=1000.0)
 
 
-class MechanismReport(BaseModel):
+class MechanismReport(DslIgnoreExtraModel):
     config: MechanismConfig
     mechanism_total_score: float = Field(..., description="Deterministic combined score for mechanism quality.")
     passes_mechanism_gate: bool = Field(..., description="Whether mechanism gate passed under stable_gates.")
@@ -161,20 +184,36 @@ class MechanismReport(BaseModel):
                                                                   description="Penalty based on surrogate/manifest complexity.")
 
 
-class RankingConfig(BaseModel):
+class RankingConfig(DslIgnoreExtraModel):
     rank_score_formula: str = Field(..., min_length=4, max_length=512,
                                     description="Documented stable formula (string) for scalar ranking used by wrapper.",
                                     )
     tie_breakers: List[str] = Field(min_length=1, max_length=64)
     rounding_decimals: int = Field(4, ge=0, le=8)
 
+    @field_validator("rank_score_formula")
+    @classmethod
+    def _compile_formula(cls, value: str) -> str:
+        compile_rank_formula(value)
+        return value
 
-class RankingReport(BaseModel):
+    @field_validator("tie_breakers")
+    @classmethod
+    def _parse_tie_breakers(cls, value: List[str]) -> List[str]:
+        for tie_breaker in value:
+            parse_tie_breaker(tie_breaker)
+        return value
+
+
+class RankingReport(DslIgnoreExtraModel):
     config: RankingConfig
-    rank_score: float = Field(..., description="Stable scalar rank score computed by wrapper for best selection.")
+    rank_score: Optional[float] = Field(
+        ...,
+        description="Stable scalar rank score computed by wrapper for best selection (null when undefined).",
+    )
 
 
-class ScoringConfig(BaseModel):
+class ScoringConfig(DslIgnoreExtraModel):
     effect_size: EffectSizeConfig
     confidence_intervals: ConfidenceIntervalConfig
     reproducibility: ReproducibilityConfig
@@ -187,7 +226,7 @@ class ScoringConfig(BaseModel):
     ranking: RankingConfig
 
 
-class Scoring(BaseModel):
+class Scoring(DslIgnoreExtraModel):
     effect_sizes: List[EffectSizeReport] = Field(
         default_factory=list,
         description="Effect size summaries for selected metrics.",
@@ -198,4 +237,8 @@ class Scoring(BaseModel):
     )
     novelty: Optional[NoveltyReport] = Field(default=None, description="Novelty scoring summary.")
     mechanism: Optional[MechanismReport] = Field(default=None, description="Mechanism quality scoring summary.")
+    repeat_stopping: Optional[RepeatStoppingReport] = Field(
+        default=None,
+        description="Sequential early-stopping decision for evaluator repeats (when enabled).",
+    )
     ranking: RankingReport = Field(..., description="Scalar ranking.")
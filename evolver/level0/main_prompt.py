@@ -1,6 +1,7 @@
 from evolver.level0.dsl.execution import GatesConfig, Experiment
 from evolver.level0.evaluating_prompt import evaluate
 from evolver.level0.proposing_prompt import propose
+from evolver.level0.wrapper.experiment_store import ExperimentStore
 from investigation_prompt import investigate
 
 # Consider axiom declarations as non-negotiable basis
@@ -25,21 +26,25 @@ def main(iteration_id: str, investigation_area: str, acceptance_gates: GatesConf
     max_rounds = int("{MAX_ROUNDS}")
     round_index = 1
     is_ready = False
-    experiments = [best]
     experiment = best
-    while (not is_ready) and (round_index <= max_rounds):
-        # Step 2: Propose candidate artifacts (mandatory is group_catalog with WHERE-suffix SQL) in addition:
-        # - produce hypotheses and theory explanation with surrogate objects (db_manifest)
-        # - create tracing plan to test hypotheses
-        # - improve result (e.g., refine tracing plan, theory with surrogate objects, etc.) for next round based on experiments evidence
-        proposal = propose(axioms, acceptance_gates, code_evidence, experiment, experiments)
-
-        # Step 3: Evaluate proposal by evaluator, compute new best deterministically to produce scoring by wrapper
-        experiment = evaluate(iteration_id, proposal, experiment)
-        experiments.append(experiment)
-        round_index += 1
-
-        is_ready = experiment.decision.is_ready
+    # Experiment history lives on disk under the iteration's artifact dir; only summaries stay in memory.
+    with ExperimentStore.for_iteration(acceptance_gates.logging, iteration_id,
+                                       ranking=acceptance_gates.scoring.ranking) as experiments:
+        experiments.append(best)
+        while (not is_ready) and (round_index <= max_rounds):
+            # Step 2: Propose candidate artifacts (mandatory is group_catalog with WHERE-suffix SQL) in addition:
+            # - produce hypotheses and theory explanation with surrogate objects (db_manifest)
+            # - create tracing plan to test hypotheses
+            # - improve result (e.g., refine tracing plan, theory with surrogate objects, etc.) for next round based on experiments evidence
+            proposal = propose(axioms, acceptance_gates, code_evidence, experiment, experiments)
+
+            # Step 3: Evaluate proposal by evaluator, compute new best deterministically to produce scoring by wrapper
+            experiment = evaluate(iteration_id, proposal, experiment)
+            experiments.append(experiment)
+            experiment = experiment.model_copy(update={"best_index": experiments.best_index})
+            round_index += 1
+
+            is_ready = experiment.decision.is_ready
 
     return experiment
 
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Literal, Optional, Tuple
+
+from evolver.level0.dsl.execution import AcceptanceConfig, Decision, ExecutionEvidence
+from evolver.level0.dsl.scoring import Scoring
+
+ACCEPTED_REASON = "all_gates_passed"
+
+# Relative cost of each standard gate: data already in hand < bootstrap CI < novelty < tracing < holdout runs.
+GATE_COSTS = {
+    "effect_delta": 1.0,
+    "failed_rate_increase": 1.0,
+    "ci_excludes_zero": 10.0,
+    "novelty": 20.0,
+    "mechanism": 100.0,
+    "holdout_confirm": 1000.0,
+}
+
+GateStatus = Literal["PASSED", "REJECTED", "ERROR", "SKIPPED"]
+
+
+@dataclass(frozen=True)
+class AcceptanceGate:
+    """One acceptance gate; `check` computes whatever it needs lazily and returns whether the gate passes."""
+
+    name: str
+    cost: float
+    check: Callable[[], bool]
+    reject_reason: str
+
+
+@dataclass(frozen=True)
+class GateResult:
+    name: str
+    status: GateStatus
+    elapsed_s: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class AcceptanceEvaluation:
+    status: Literal["ACCEPTED", "REJECTED", "ERROR"]
+    primary_reason: str
+    results: List[GateResult] = field(default_factory=list)
+
+    def skipped(self) -> List[str]:
+        return [result.name for result in self.results if result.status == "SKIPPED"]
+
+    def decision(self, config: AcceptanceConfig, *, evidence: ExecutionEvidence, score: Scoring) -> Decision:
+        return Decision(
+            status=self.status,
+            is_ready=self.status == "ACCEPTED" and config.stop_when_ready,
+            primary_reason=self.primary_reason,
+            evidence=evidence,
+            score=score,
+        )
+
+
+def evaluate_gates(
+        gates: List[AcceptanceGate],
+        *,
+        on_result: Optional[Callable[[GateResult], None]] = None,
+        max_error_text_len: int = 2048,
+) -> AcceptanceEvaluation:
+    """
+    Run gates cheapest first (ties keep their given order) and stop at the first gate that rejects or fails.
+
+    Later gates are recorded as SKIPPED without calling their checks, so a proposal rejected on data already in hand
+    never pays for holdout runs, tracing sessions or bootstrap CIs. primary_reason is the rejecting gate's
+    reject_reason, "<gate>_error" when a check raises, and ACCEPTED_REASON when every gate passes. `on_result` sees
+    each gate result as soon as it is known (e.g. for structured logs).
+    """
+    evaluation = AcceptanceEvaluation(status="ACCEPTED", primary_reason=ACCEPTED_REASON)
+
+    def record(result: GateResult) -> None:
+        evaluation.results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    for gate in sorted(gates, key=lambda candidate: candidate.cost):
+        if evaluation.status != "ACCEPTED":
+            record(GateResult(name=gate.name, status="SKIPPED"))
+            continue
+        started = time.perf_counter()
+        try:
+            passed = bool(gate.check())
+        except Exception as exc:
+            evaluation.status, evaluation.primary_reason = "ERROR", f"{gate.name}_error"
+            record(GateResult(name=gate.name, status="ERROR", elapsed_s=time.perf_counter() - started,
+                              error=f"{type(exc).__name__}: {exc}"[:max_error_text_len]))
+            continue
+        if not passed:
+            evaluation.status, evaluation.primary_reason = "REJECTED", gate.reject_reason
+        record(GateResult(name=gate.name, status="PASSED" if passed else "REJECTED",
+                          elapsed_s=time.perf_counter() - started))
+    return evaluation
+
+
+def acceptance_gates(
+        config: AcceptanceConfig,
+        *,
+        delta_not_found_rate: Callable[[], float],
+        failed_rate_increase: Callable[[], float],
+        ci_bounds: Callable[[], Tuple[Optional[float], Optional[float]]],
+        novelty_passes: Callable[[], bool],
+        mechanism_passes: Callable[[], bool],
+        holdout_confirms: Callable[[], bool],
+) -> List[AcceptanceGate]:
+    """
+    The standard AcceptanceConfig gates, costed by GATE_COSTS. Each argument is called only if its gate is reached;
+    gates whose require_* flag is off are left out. An undefined (None) CI bound does not exclude zero.
+    """
+
+    def ci_excludes_zero() -> bool:
+        low, high = ci_bounds()
+        return (low is not None and low > 0.0) or (high is not None and high < 0.0)
+
+    gates = [
+        AcceptanceGate("effect_delta", GATE_COSTS["effect_delta"],
+                       lambda: delta_not_found_rate() >= config.min_delta_notFoundRate, "effect_below_min_delta"),
+        AcceptanceGate("failed_rate_increase", GATE_COSTS["failed_rate_increase"],
+                       lambda: failed_rate_increase() <= config.max_allowed_failedRate_increase,
+                       "failed_rate_increase_exceeded"),
+    ]
+    if config.require_ci_excludes_zero:
+        gates.append(AcceptanceGate("ci_excludes_zero", GATE_COSTS["ci_excludes_zero"], ci_excludes_zero,
+                                    "ci_includes_zero"))
+    if config.require_novelty:
+        gates.append(AcceptanceGate("novelty", GATE_COSTS["novelty"], novelty_passes, "novelty_not_met"))
+    if config.require_mechanism:
+        gates.append(AcceptanceGate("mechanism", GATE_COSTS["mechanism"], mechanism_passes, "mechanism_not_met"))
+    if config.require_holdout_confirm:
+        gates.append(AcceptanceGate("holdout_confirm", GATE_COSTS["holdout_confirm"], holdout_confirms,
+                                    "holdout_not_confirmed"))
+    return gates
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Dict, Hashable, List, Literal, Set, Tuple
+
+from evolver.level0.dsl.execution import EvaluatorRun
+from evolver.level0.dsl.scoring import EffectAggregation, EffectSizeConfig, EffectSizeReport, EffectType
+from evolver.level0.wrapper.effect_sizes import effect_size_report, effect_values
+
+Arm = Literal["treatment", "control"]
+ARMS: Tuple[Arm, Arm] = ("treatment", "control")
+HOLDOUT_SPLIT = "HOLDOUT"
+
+# Metric name -> (numerator, denominator) EvaluatorRun fields; the metric is numerator / denominator.
+RUN_METRICS: Dict[str, Tuple[str, str]] = {
+    "notFoundRate": ("notFoundCount", "totalCount"),
+    "failedRate": ("failedCount", "totalCount"),
+    "foundRate": ("foundCount", "totalCount"),
+    "partialFoundRate": ("partialFoundCount", "totalCount"),
+    "meanSearchMs": ("searchDurationMs", "totalCount"),
+    "meanDurationMs": ("totalDurationMs", "totalCount"),
+    "meanBytes": ("totalBytes", "totalCount"),
+}
+
+
+def run_metric_counts(run: EvaluatorRun, metric: str) -> Tuple[float, float]:
+    """(numerator, denominator) sufficient statistics of `metric` for one evaluator run."""
+    if metric not in RUN_METRICS:
+        raise ValueError(f"Unsupported evaluator metric: {metric!r}")
+    numerator, denominator = RUN_METRICS[metric]
+    return float(getattr(run, numerator)), float(getattr(run, denominator))
+
+
+def _effect(effect_type: EffectType, treatment: List[float], control: List[float]) -> float:
+    """Effect from per-arm (numerator, denominator) sums, zero-cell corrected like compute_effect_sizes."""
+    return float(effect_values(effect_type, treatment[0], treatment[1], control[0], control[1]))
+
+
+def _rate(sums: List[float]) -> float:
+    return sums[0] / sums[1] if sums[1] > 0 else math.nan
+
+
+class _PooledSums:
+    """Per-arm (numerator, denominator) totals of one aggregation unit."""
+
+    def __init__(self) -> None:
+        self.sums: Dict[Arm, List[float]] = {arm: [0.0, 0.0] for arm in ARMS}
+
+    def add(self, arm: Arm, numerator: float, denominator: float) -> None:
+        self.sums[arm][0] += numerator
+        self.sums[arm][1] += denominator
+
+    def rates(self) -> Tuple[float, float]:
+        return _rate(self.sums["treatment"]), _rate(self.sums["control"])
+
+    def effect(self, effect_type: EffectType) -> float:
+        return _effect(effect_type, self.sums["treatment"], self.sums["control"])
+
+
+class _RunningMedian:
+    """Median of a growing multiset: max-heap of the lower half, min-heap of the upper half."""
+
+    def __init__(self) -> None:
+        self._lower: List[float] = []
+        self._upper: List[float] = []
+
+    def add(self, value: float) -> None:
+        if self._lower and value > -self._lower[0]:
+            heapq.heappush(self._upper, value)
+        else:
+            heapq.heappush(self._lower, -value)
+        if len(self._lower) > len(self._upper) + 1:
+            heapq.heappush(self._upper, -heapq.heappop(self._lower))
+        elif len(self._upper) > len(self._lower):
+            heapq.heappush(self._lower, -heapq.heappop(self._upper))
+
+    def value(self) -> float:
+        if not self._lower:
+            return math.nan
+        if len(self._lower) > len(self._upper):
+            return -self._lower[0]
+        return (-self._lower[0] + self._upper[0]) / 2.0
+
+
+class EffectAccumulator:
+    """
+    Incremental effect estimate for one EffectSizeConfig, updated from each evaluator run's sufficient statistics.
+
+    Every add is O(1) (O(log n) for the median and worst-stratum strategies) and estimate() never rescans earlier
+    runs:
+    - pooled_over_repeats: ratio of per-arm totals over all runs.
+    - mean_of_run_rates / median_of_run_rates: per-arm mean / running median of per-run rates.
+    - weighted_by_control_total: per-repeat effects averaged with the repeat's control total as weight; a repeat's
+      old contribution is swapped out whenever one of its runs arrives.
+    - macro_average: unweighted mean of per-stratum effects, maintained the same way.
+    - worst_stratum: smallest per-stratum effect (a lazy min-heap drops superseded entries).
+    - holdout_primary: pooled estimate over runs of the holdout split only.
+    Effects are zero-cell corrected like compute_effect_sizes; units whose effect is still undefined (e.g. an arm
+    without runs) do not contribute until they are.
+    """
+
+    def __init__(self, config: EffectSizeConfig, *, holdout_split: str = HOLDOUT_SPLIT) -> None:
+        self.config = config
+        self.holdout_split = holdout_split
+        self.runs_added = 0
+        self._pooled = _PooledSums()
+        self._repeats_seen: Dict[Arm, Set[int]] = {arm: set() for arm in ARMS}
+        self._rate_sums: Dict[Arm, List[float]] = {arm: [0.0, 0.0] for arm in ARMS}
+        self._rate_medians: Dict[Arm, _RunningMedian] = {arm: _RunningMedian() for arm in ARMS}
+        self._units: Dict[Hashable, _PooledSums] = {}
+        self._unit_effects: Dict[Hashable, Tuple[float, float]] = {}
+        self._weighted_total = 0.0
+        self._weight_total = 0.0
+        self._worst_heap: List[Tuple[float, int, Hashable]] = []
+        self._unit_versions: Dict[Hashable, int] = {}
+
+    @property
+    def aggregation(self) -> EffectAggregation:
+        return self.config.aggregation
+
+    def add_run(self, run: EvaluatorRun, *, arm: Arm, repeat_index: int, stratum: str = "", split: str = "") -> None:
+        """Fold in one evaluator run; runs that did not complete carry no counts and are ignored."""
+        if run.status != "COMPLETED":
+            return
+        numerator, denominator = run_metric_counts(run, self.config.metric)
+        self.add_counts(arm, numerator, denominator, repeat_index=repeat_index, stratum=stratum, split=split)
+
+    def add_counts(
+            self,
+            arm: Arm,
+            numerator: float,
+            denominator: float,
+            *,
+            repeat_index: int,
+            stratum: str = "",
+            split: str = "",
+    ) -> None:
+        aggregation = self.aggregation
+        if aggregation == "holdout_primary" and split != self.holdout_split:
+            return
+        self.runs_added += 1
+        self._repeats_seen[arm].add(repeat_index)
+        self._pooled.add(arm, numerator, denominator)
+        if aggregation == "mean_of_run_rates" and denominator > 0:
+            self._rate_sums[arm][0] += numerator / denominator
+            self._rate_sums[arm][1] += 1.0
+        elif aggregation == "median_of_run_rates" and denominator > 0:
+            self._rate_medians[arm].add(numerator / denominator)
+        elif aggregation == "weighted_by_control_total":
+            self._update_unit(repeat_index, arm, numerator, denominator)
+        elif aggregation in ("macro_average", "worst_stratum"):
+            self._update_unit(stratum, arm, numerator, denominator)
+
+    def _update_unit(self, unit: Hashable, arm: Arm, numerator: float, denominator: float) -> None:
+        sums = self._units.get(unit)
+        if sums is None:
+            sums = self._units[unit] = _PooledSums()
+        previous = self._unit_effects.pop(unit, None)
+        if previous is not None:
+            self._weighted_total -= previous[0] * previous[1]
+            self._weight_total -= previous[1]
+        sums.add(arm, numerator, denominator)
+        effect = sums.effect(self.config.type)
+        if not math.isfinite(effect):
+            return
+        weight = sums.sums["control"][1] if self.aggregation == "weighted_by_control_total" else 1.0
+        self._unit_effects[unit] = (effect, weight)
+        self._weighted_total += effect * weight
+        self._weight_total += weight
+        if self.aggregation == "worst_stratum":
+            version = self._unit_versions.get(unit, 0) + 1
+            self._unit_versions[unit] = version
+            heapq.heappush(self._worst_heap, (effect, version, unit))
+
+    def _worst_effect(self) -> float:
+        heap = self._worst_heap
+        while heap:
+            effect, version, unit = heap[0]
+            if self._unit_versions.get(unit) == version and unit in self._unit_effects:
+                return effect
+            heapq.heappop(heap)
+        return math.nan
+
+    def rates(self) -> Tuple[float, float]:
+        """Treatment and control rates behind the estimate (pooled rates for per-unit strategies)."""
+        if self.aggregation == "mean_of_run_rates":
+            return _rate(self._rate_sums["treatment"]), _rate(self._rate_sums["control"])
+        if self.aggregation == "median_of_run_rates":
+            return self._rate_medians["treatment"].value(), self._rate_medians["control"].value()
+        return self._pooled.rates()
+
+    def estimate(self) -> float:
+        """Current effect estimate on the effect type's natural scale; NaN until it is defined."""
+        aggregation = self.aggregation
+        if aggregation in ("weighted_by_control_total", "macro_average"):
+            return self._weighted_total / self._weight_total if self._weight_total > 0 else math.nan
+        if aggregation == "worst_stratum":
+            return self._worst_effect()
+        if aggregation in ("mean_of_run_rates", "median_of_run_rates"):
+            # Per-run rates carry no counts; scale them by the pooled totals so the zero-cell correction still applies.
+            pooled = self._pooled.sums
+            rates = self.rates()
+            return _effect(self.config.type, [rates[0] * pooled["treatment"][1], pooled["treatment"][1]],
+                           [rates[1] * pooled["control"][1], pooled["control"][1]])
+        return self._pooled.effect(self.config.type)
+
+    @property
+    def repeat_runs_used(self) -> int:
+        """Number of repeats that have runs in both arms."""
+        return len(self._repeats_seen["treatment"] & self._repeats_seen["control"])
+
+    def report(self) -> EffectSizeReport:
+        treatment_rate, control_rate = self.rates()
+        return effect_size_report(
+            self.config,
+            self.estimate(),
+            treatment_rate=treatment_rate,
+            control_rate=control_rate,
+            repeat_runs_used=self.repeat_runs_used,
+        )
+
+
+class EffectAggregator:
+    """EffectAccumulators for several effect size configs fed from the same stream of evaluator runs."""
+
+    def __init__(self, configs: List[EffectSizeConfig], *, holdout_split: str = HOLDOUT_SPLIT) -> None:
+        self.accumulators = [EffectAccumulator(config, holdout_split=holdout_split) for config in configs]
+
+    def add_run(self, run: EvaluatorRun, *, arm: Arm, repeat_index: int, stratum: str = "", split: str = "") -> None:
+        for accumulator in self.accumulators:
+            accumulator.add_run(run, arm=arm, repeat_index=repeat_index, stratum=stratum, split=split)
+
+    def reports(self) -> List[EffectSizeReport]:
+        return [accumulator.report() for accumulator in self.accumulators]
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from evolver.level0.dsl.scoring import (
+    ConfidenceIntervalConfig,
+    ConfidenceIntervalReport,
+    EffectSizeReport,
+)
+from evolver.level0.wrapper.effect_sizes import PROPORTION_EFFECTS, effect_values
+
+DEFAULT_RESAMPLES = 2000
+RESAMPLE_CHUNK_SIZE = 1000
+# Upper bound on resamples x stratum units drawn at once by the generic (non-binary) path.
+_MAX_DRAWS_PER_BLOCK = 4_000_000
+
+
+@dataclass(frozen=True)
+class StratifiedOutcomes:
+    """Per-address outcomes of one metric for the treatment and control cohorts, with each address's stratum."""
+
+    treatment: np.ndarray
+    treatment_strata: np.ndarray
+    control: np.ndarray
+    control_strata: np.ndarray
+
+
+_Strata = List[Tuple[np.ndarray, bool]]
+
+
+def _split_strata(values: np.ndarray, strata: np.ndarray) -> _Strata:
+    """Values grouped by stratum (in sorted stratum order), each flagged when it only holds 0/1 outcomes."""
+    values = np.asarray(values, dtype=np.float64)
+    labels, inverse = np.unique(np.asarray(strata), return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.searchsorted(inverse[order], np.arange(len(labels) + 1))
+    grouped = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        stratum_values = values[order[start:end]]
+        grouped.append((stratum_values, bool(np.all((stratum_values == 0.0) | (stratum_values == 1.0)))))
+    return grouped
+
+
+def _resampled_sums(rng: np.random.Generator, strata: _Strata, size: int) -> np.ndarray:
+    """
+    Outcome sums of `size` stratified resamples: each stratum is redrawn with replacement at its own size.
+
+    A 0/1 stratum's resampled sum is Binomial(n, ones / n), so it is drawn directly instead of per unit.
+    """
+    sums = np.zeros(size)
+    for stratum_values, binary in strata:
+        n = len(stratum_values)
+        if binary:
+            sums += rng.binomial(n, stratum_values.sum() / n, size=size)
+            continue
+        block = max(1, _MAX_DRAWS_PER_BLOCK // n)
+        for start in range(0, size, block):
+            stop = min(size, start + block)
+            draws = rng.integers(0, n, size=(stop - start, n), dtype=np.int32)
+            sums[start:stop] += stratum_values[draws].sum(axis=1)
+    return sums
+
+
+def _bootstrap_chunk(
+        seed: int,
+        stream: int,
+        chunk_index: int,
+        size: int,
+        treatment: _Strata,
+        control: _Strata,
+) -> np.ndarray:
+    """Treatment and control means for one chunk of resamples, shape (2, size)."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(stream, chunk_index)))
+    treatment_n = sum(len(values) for values, _ in treatment)
+    control_n = sum(len(values) for values, _ in control)
+    return np.stack([
+        _resampled_sums(rng, treatment, size) / treatment_n,
+        _resampled_sums(rng, control, size) / control_n,
+    ])
+
+
+def bootstrap_means(
+        outcomes: StratifiedOutcomes,
+        *,
+        resamples: int,
+        seed: int,
+        stream: int = 0,
+        workers: int = 1,
+        chunk_size: int = RESAMPLE_CHUNK_SIZE,
+) -> np.ndarray:
+    """
+    Pooled treatment/control means over `resamples` stratified bootstrap resamples, shape (2, resamples).
+
+    Resample i belongs to chunk i // chunk_size, and every chunk draws from its own generator seeded by
+    (seed, stream, chunk index). Chunks are computed in-process or sharded across `workers` processes and merged in
+    chunk order, so the result depends on seed, stream and chunk_size but never on the worker count.
+    """
+    treatment = _split_strata(outcomes.treatment, outcomes.treatment_strata)
+    control = _split_strata(outcomes.control, outcomes.control_strata)
+    if not treatment or not control:
+        raise ValueError("Bootstrap needs at least one treatment and one control outcome.")
+    chunk_sizes = [min(chunk_size, resamples - start) for start in range(0, resamples, chunk_size)]
+    chunk_args = [(seed, stream, chunk_index, size, treatment, control) for chunk_index, size in enumerate(chunk_sizes)]
+    if workers <= 1 or len(chunk_args) <= 1:
+        chunks = [_bootstrap_chunk(*args) for args in chunk_args]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunk_args))) as executor:
+            chunks = list(executor.map(_bootstrap_chunk, *zip(*chunk_args)))
+    return np.concatenate(chunks, axis=1)
+
+
+def _metric_stream(metric: str) -> int:
+    """Seed stream of a metric, so each metric's resamples do not depend on report order."""
+    return zlib.crc32(metric.encode("utf-8"))
+
+
+def bootstrap_confidence_intervals(
+        effect_sizes: Sequence[EffectSizeReport],
+        outcomes: Mapping[str, StratifiedOutcomes],
+        config: ConfidenceIntervalConfig,
+        *,
+        workers: int = 1,
+        chunk_size: int = RESAMPLE_CHUNK_SIZE,
+) -> List[ConfidenceIntervalReport]:
+    """
+    Percentile bootstrap-by-strata CIs, one ConfidenceIntervalReport per effect size report (same order).
+
+    `outcomes` maps each report's metric to its per-address outcomes. Reports sharing a metric share its resamples.
+    Resampled effects use the same zero-cell correction as compute_effect_sizes. If any resampled effect is still
+    undefined (e.g. a ratio over a zero control mean), dropping it would narrow the interval, so the bounds are None.
+    """
+    if config.method != "bootstrap_by_strata":
+        raise ValueError(f"bootstrap_confidence_intervals does not compute {config.method!r} intervals.")
+    resamples = config.resamples or DEFAULT_RESAMPLES
+    tail = (1.0 - config.confidence) / 2.0
+    means_by_metric: Dict[str, np.ndarray] = {}
+    reports: List[ConfidenceIntervalReport] = []
+    for effect_size in effect_sizes:
+        metric = effect_size.config.metric
+        means: Optional[np.ndarray] = means_by_metric.get(metric)
+        if means is None:
+            if metric not in outcomes:
+                raise KeyError(f"No per-address outcomes for metric {metric!r}.")
+            means = means_by_metric[metric] = bootstrap_means(
+                outcomes[metric], resamples=resamples, seed=config.seed, stream=_metric_stream(metric),
+                workers=workers, chunk_size=chunk_size,
+            )
+        treatment_n, control_n = len(outcomes[metric].treatment), len(outcomes[metric].control)
+        treatment_sums, control_sums = means[0] * treatment_n, means[1] * control_n
+        if effect_size.config.type in PROPORTION_EFFECTS:
+            # Event counts, so the zero-cell correction sees exact zeros.
+            treatment_sums, control_sums = np.rint(treatment_sums), np.rint(control_sums)
+        effects = effect_values(effect_size.config.type, treatment_sums, treatment_n, control_sums, control_n)
+        low = high = None
+        if np.isfinite(effects).all():
+            low, high = (float(bound) for bound in np.quantile(effects, [tail, 1.0 - tail]))
+        reports.append(ConfidenceIntervalReport(config=config, low=low, high=high))
+    return reports
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import hashlib
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Optional, Sequence, Set, Tuple
+
+from evolver.level0.dsl.proposal import Theory
+from evolver.level0.dsl.scoring import ComplexityPenaltyConfig, ComplexityPenaltyReport
+from evolver.signature import SqlToken, canonicalize_where_sql, tokenize_sql
+
+ObjectKind = Literal["VIEW", "MATERIALIZED VIEW", "TABLE"]
+CostClass = Literal["LOW", "MED", "HIGH"]
+
+ANALYSIS_CACHE_SIZE = 256
+
+_CREATE_MODIFIERS = frozenset({"OR", "REPLACE", "TEMP", "TEMPORARY", "UNLOGGED", "GLOBAL", "LOCAL", "RECURSIVE"})
+_FROM_CLAUSE_END = frozenset({
+    "WHERE", "GROUP", "HAVING", "ORDER", "LIMIT", "OFFSET", "UNION", "INTERSECT", "EXCEPT", "WINDOW", "FETCH", "FOR",
+    "RETURNING", "SELECT",
+})
+_TABLE_PREFIXES = frozenset({"LATERAL", "ONLY"})
+_NAME_KINDS = ("word", "quoted")
+
+
+@dataclass(frozen=True)
+class SqlShape:
+    """Join structure of one SQL statement or WHERE-suffix."""
+
+    joins: int = 0
+    cross_joins: int = 0
+    subqueries: int = 0
+    references: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class ManifestObject:
+    name: str
+    kind: ObjectKind
+    statement_index: int
+    shape: SqlShape
+
+
+@dataclass(frozen=True)
+class ManifestAnalysis:
+    """Config-independent static analysis of a theory's manifest_sql and query_defs, keyed by its signature."""
+
+    signature: str
+    objects: Tuple[ManifestObject, ...]
+    dependencies: Dict[str, Tuple[str, ...]]
+    manifest_bytes: int
+    group_shapes: Tuple[SqlShape, ...]
+
+    def count(self, kind: ObjectKind) -> int:
+        return sum(1 for created in self.objects if created.kind == kind)
+
+    @property
+    def manifest_size_kb(self) -> int:
+        return math.ceil(self.manifest_bytes / 1024)
+
+    @property
+    def max_group_joins(self) -> int:
+        return max((shape.joins for shape in self.group_shapes), default=0)
+
+
+def _name_part(token: SqlToken) -> str:
+    kind, text = token
+    return text[1:-1].replace('""', '"') if kind == "quoted" else text.lower()
+
+
+def _qualified_name(tokens: List[SqlToken], index: int) -> Tuple[Optional[str], int]:
+    """Last component of the (schema-)qualified name starting at `index`, and the index just past it."""
+    if index >= len(tokens) or tokens[index][0] not in _NAME_KINDS:
+        return None, index
+    name = _name_part(tokens[index])
+    index += 1
+    while index + 1 < len(tokens) and tokens[index] == ("punct", ".") and tokens[index + 1][0] in _NAME_KINDS:
+        name = _name_part(tokens[index + 1])
+        index += 2
+    return name, index
+
+
+def sql_shape(tokens: List[SqlToken]) -> SqlShape:
+    """
+    Count joins, cross joins and subqueries and collect FROM/JOIN relation names, per parenthesis level.
+
+    Explicit JOINs count as joins and CROSS JOINs also as cross joins; comma-separated FROM items count as joins,
+    and as cross joins when their SELECT has no WHERE clause. A subquery is a parenthesis opening with SELECT/WITH.
+    `tokens` come from evolver.signature.tokenize_sql(sql, comments=False).
+    """
+    joins = cross_joins = subqueries = 0
+    references: List[str] = []
+    # Per parenthesis level: [in_from, expect_relation, comma_joins, where_seen].
+    levels: List[list] = [[False, False, 0, False]]
+
+    def close_level(level: list) -> int:
+        return level[2] if level[2] and not level[3] else 0
+
+    index = 0
+    previous_word = ""
+    while index < len(tokens):
+        kind, text = tokens[index]
+        level = levels[-1]
+        if kind == "punct" and text == "(":
+            if index + 1 < len(tokens) and tokens[index + 1] in (("word", "SELECT"), ("word", "WITH")):
+                subqueries += 1
+            level[1] = False
+            levels.append([False, False, 0, False])
+        elif kind == "punct" and text == ")":
+            if len(levels) > 1:
+                cross_joins += close_level(levels.pop())
+        elif kind == "punct" and text == "," and level[0]:
+            joins += 1
+            level[1], level[2] = True, level[2] + 1
+        elif kind == "word" and text == "FROM":
+            cross_joins += close_level(level)
+            levels[-1] = [True, True, 0, False]
+        elif kind == "word" and text == "JOIN":
+            joins += 1
+            if previous_word == "CROSS":
+                cross_joins += 1
+            level[0] = level[1] = True
+        elif kind == "word" and text == "WHERE":
+            level[0], level[1], level[3] = False, False, True
+        elif kind == "word" and text in _FROM_CLAUSE_END:
+            if text in ("UNION", "INTERSECT", "EXCEPT", "SELECT"):
+                cross_joins += close_level(level)
+                levels[-1] = [False, False, 0, False]
+            else:
+                level[0] = level[1] = False
+        elif level[1] and kind in _NAME_KINDS and text not in _TABLE_PREFIXES:
+            name, next_index = _qualified_name(tokens, index)
+            references.append(name)
+            level[1] = False
+            index = next_index
+            continue
+        if kind == "word":
+            previous_word = text
+        index += 1
+    for level in levels:
+        cross_joins += close_level(level)
+    return SqlShape(joins=joins, cross_joins=cross_joins, subqueries=subqueries, references=tuple(references))
+
+
+def _created_object(tokens: List[SqlToken]) -> Tuple[Optional[str], Optional[ObjectKind]]:
+    """Target of CREATE [MATERIALIZED] VIEW / CREATE TABLE / INSERT INTO, if the statement is one of those."""
+    words = [text for kind, text in tokens[:2] if kind == "word"]
+    if words[:2] == ["INSERT", "INTO"]:
+        return _qualified_name(tokens, 2)[0], None
+    if not words or words[0] != "CREATE":
+        return None, None
+    index = 1
+    while index < len(tokens) and tokens[index][1] in _CREATE_MODIFIERS:
+        index += 1
+    kind: Optional[ObjectKind] = None
+    if tokens[index:index + 2] == [("word", "MATERIALIZED"), ("word", "VIEW")]:
+        kind, index = "MATERIALIZED VIEW", index + 2
+    elif index < len(tokens) and tokens[index] in (("word", "VIEW"), ("word", "TABLE")):
+        kind, index = tokens[index][1], index + 1
+    if kind is None:
+        return None, None
+    if [text for _, text in tokens[index:index + 3]] == ["IF", "NOT", "EXISTS"]:
+        index += 3
+    return _qualified_name(tokens, index)[0], kind
+
+
+def manifest_signature(manifest_sql: Sequence[str], group_sqls: Sequence[str]) -> str:
+    """sha256 over the canonical manifest statements and group_sql predicates (formatting-insensitive)."""
+    digest = hashlib.sha256()
+    for section in (manifest_sql, group_sqls):
+        for statement in section:
+            digest.update(canonicalize_where_sql(statement).encode("utf-8"))
+            digest.update(b"\0")
+        digest.update(b"\1")
+    return digest.hexdigest()
+
+
+def _analyze(signature: str, manifest_sql: Sequence[str], group_sqls: Sequence[str]) -> ManifestAnalysis:
+    objects: Dict[str, ManifestObject] = {}
+    inserted: Dict[str, List[str]] = {}
+    for statement_index, statement in enumerate(manifest_sql):
+        tokens = tokenize_sql(statement, comments=False)
+        name, kind = _created_object(tokens)
+        if name is None:
+            continue
+        shape = sql_shape(tokens)
+        if kind is None:
+            inserted.setdefault(name, []).extend(shape.references)
+        else:
+            objects[name] = ManifestObject(name=name, kind=kind, statement_index=statement_index, shape=shape)
+    dependencies = {
+        name: tuple(sorted({reference for reference in (*created.shape.references, *inserted.get(name, ()))
+                            if reference in objects and reference != name}))
+        for name, created in objects.items()
+    }
+
+    # Plain views are inlined by the planner, so a query pays for their joins too; materialized views and tables
+    # are read as stored relations.
+    inlined: Dict[str, SqlShape] = {}
+
+    def expand(shape: SqlShape, visiting: Set[str]) -> SqlShape:
+        joins, cross_joins, subqueries = shape.joins, shape.cross_joins, shape.subqueries
+        for reference in shape.references:
+            created = objects.get(reference)
+            if created is None or created.kind != "VIEW" or reference in visiting:
+                continue
+            if reference not in inlined:
+                inlined[reference] = expand(created.shape, visiting | {reference})
+            view_shape = inlined[reference]
+            joins += view_shape.joins
+            cross_joins += view_shape.cross_joins
+            subqueries += view_shape.subqueries
+        return SqlShape(joins=joins, cross_joins=cross_joins, subqueries=subqueries, references=shape.references)
+
+    group_shapes = tuple(expand(sql_shape(tokenize_sql(group_sql, comments=False)), set()) for group_sql in group_sqls)
+    return ManifestAnalysis(
+        signature=signature,
+        objects=tuple(sorted(objects.values(), key=lambda created: created.statement_index)),
+        dependencies=dependencies,
+        manifest_bytes=len("\n".join(manifest_sql).encode("utf-8")),
+        group_shapes=group_shapes,
+    )
+
+
+_analysis_cache: OrderedDict = OrderedDict()
+
+
+def analyze_theory(theory: Theory) -> ManifestAnalysis:
+    """Static analysis of `theory`, memoized (LRU, ANALYSIS_CACHE_SIZE entries) by manifest_signature()."""
+    group_sqls = [query_def.group_sql for query_def in theory.query_defs]
+    signature = manifest_signature(theory.manifest_sql, group_sqls)
+    analysis = _analysis_cache.get(signature)
+    if analysis is None:
+        analysis = _analysis_cache[signature] = _analyze(signature, theory.manifest_sql, group_sqls)
+        while len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+    else:
+        _analysis_cache.move_to_end(signature)
+    return analysis
+
+
+def _utilization(used: int, limit: int) -> float:
+    # A zero budget counts every used unit as a full budget, keeping the score finite (and JSON-serializable).
+    return used / limit if limit else float(used)
+
+
+def complexity_report(theory: Theory, config: ComplexityPenaltyConfig) -> ComplexityPenaltyReport:
+    """
+    ComplexityPenaltyReport computed offline from the theory's SQL, before any DDL reaches Postgres.
+
+    Cost class is HIGH when a budget is exceeded (objects, manifest KB, joins of any group_sql after inlining plain
+    views) or a group_sql contains a cross join, MED when any of those is above half its budget or a group_sql
+    uses subqueries, LOW otherwise; the gate passes unless the class is HIGH. penalty_score is the highest budget
+    utilization (1.0 = at budget; against a zero budget, the amount used).
+    """
+    analysis = analyze_theory(theory)
+    objects = len(analysis.objects)
+    budgets = [
+        (objects, config.max_objects),
+        (analysis.manifest_size_kb, config.max_manifest_kb),
+        (analysis.max_group_joins, config.max_joins_per_group_sql),
+    ]
+    penalty_score = max(_utilization(used, limit) for used, limit in budgets)
+    cost_class: CostClass = "LOW"
+    if any(used > limit for used, limit in budgets) or any(shape.cross_joins for shape in analysis.group_shapes):
+        cost_class = "HIGH"
+    elif any(used > limit / 2 for used, limit in budgets) or any(shape.subqueries for shape in analysis.group_shapes):
+        cost_class = "MED"
+    return ComplexityPenaltyReport(
+        config=config,
+        objects_created_count=objects,
+        created_views_count=analysis.count("VIEW"),
+        created_mv_count=analysis.count("MATERIALIZED VIEW"),
+        created_tables_count=analysis.count("TABLE"),
+        manifest_size_kb=analysis.manifest_size_kb,
+        estimated_join_complexity=analysis.max_group_joins,
+        estimated_query_cost_class=cost_class,
+        passes_complexity_gate=cost_class != "HIGH",
+        penalty_score=penalty_score,
+    )
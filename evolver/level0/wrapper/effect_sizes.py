@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from evolver.level0.dsl.scoring import (
+    ConfidenceIntervalConfig,
+    ConfidenceIntervalReport,
+    EffectSizeConfig,
+    EffectSizeReport,
+    EffectType,
+)
+
+PROPORTION_EFFECTS = frozenset({"difference_of_proportions", "ratio_of_proportions", "odds_ratio", "log_odds_ratio"})
+DIFFERENCE_EFFECTS = frozenset({"difference_of_proportions", "difference_in_means"})
+LOG_EFFECTS = frozenset({"log_odds_ratio", "log_ratio_of_means"})
+# Haldane-Anscombe correction added to every 2x2 cell of a row with a zero cell (ratio/odds effects only).
+ZERO_CELL_CORRECTION = 0.5
+
+
+def _corrected_cells(
+        treatment_sum: np.ndarray,
+        treatment_total: np.ndarray,
+        control_sum: np.ndarray,
+        control_total: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """2x2 cells (treatment events / non-events, control events / non-events), corrected where any cell is zero."""
+    cells = np.stack(np.broadcast_arrays(treatment_sum, treatment_total - treatment_sum,
+                                         control_sum, control_total - control_sum))
+    cells = cells + np.where((cells == 0.0).any(axis=0), ZERO_CELL_CORRECTION, 0.0)
+    return cells[0], cells[1], cells[2], cells[3]
+
+
+def effect_values(
+        effect_type: EffectType,
+        treatment_sum: np.ndarray,
+        treatment_total: np.ndarray,
+        control_sum: np.ndarray,
+        control_total: np.ndarray,
+) -> np.ndarray:
+    """
+    Point effect of treatment vs control from sufficient statistics, element-wise; the same estimate as
+    compute_effect_sizes, including the zero-cell correction of ratio and odds effects on proportions. Effects that
+    are still undefined (an empty cohort, a zero control mean) come out as inf/NaN.
+    """
+    t_sum, t_n, c_sum, c_n = (np.asarray(value, dtype=np.float64)
+                              for value in (treatment_sum, treatment_total, control_sum, control_total))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if effect_type in DIFFERENCE_EFFECTS:
+            value = t_sum / t_n - c_sum / c_n
+        elif effect_type == "ratio_of_means":
+            value = (t_sum / t_n) / (c_sum / c_n)
+        elif effect_type == "log_ratio_of_means":
+            value = np.log((t_sum / t_n) / (c_sum / c_n))
+        elif effect_type in PROPORTION_EFFECTS:
+            a, b, c, d = _corrected_cells(t_sum, t_n, c_sum, c_n)
+            if effect_type == "ratio_of_proportions":
+                value = (a / (a + b)) / (c / (c + d))
+            elif effect_type == "odds_ratio":
+                value = (a * d) / (b * c)
+            else:
+                value = np.log((a * d) / (b * c))
+        else:
+            raise ValueError(f"Unsupported effect type: {effect_type}")
+    return np.where((t_n <= 0) | (c_n <= 0), np.nan, value)
+
+
+def _finite_or_none(value: float) -> Optional[float]:
+    return value if np.isfinite(value) else None
+
+
+def effect_size_report(
+        config: EffectSizeConfig,
+        estimate: float,
+        *,
+        treatment_rate: float,
+        control_rate: float,
+        repeat_runs_used: int,
+) -> EffectSizeReport:
+    """
+    EffectSizeReport for an estimate on its natural scale: difference effects fill `delta`, ratio effects fill
+    `ratio`, and log effects fill `delta` with the log value and `ratio` with its exponent. Rates are reported for
+    proportion effects only.
+    """
+    proportion = config.type in PROPORTION_EFFECTS
+    if config.type in LOG_EFFECTS:
+        delta, ratio = estimate, float(np.exp(estimate))
+    elif config.type in DIFFERENCE_EFFECTS:
+        delta, ratio = estimate, None
+    else:
+        delta, ratio = None, estimate
+    return EffectSizeReport(
+        config=config,
+        p_treatment=treatment_rate if proportion else None,
+        p_control=control_rate if proportion else None,
+        delta=delta,
+        ratio=ratio,
+        repeat_runs_used=repeat_runs_used,
+    )
+
+
+@dataclass(frozen=True)
+class EffectCounts:
+    """
+    Sufficient statistics of treatment and control for a batch of (cohort, metric) rows; all arrays have one entry
+    per row.
+
+    For proportion metrics `*_sum` is the event count (e.g. notFoundCount) and `*_sum_sq` may be omitted, since
+    0/1 outcomes have sum of squares equal to their sum. Mean metrics pass the outcome sum and sum of squares.
+    """
+
+    treatment_total: np.ndarray
+    treatment_sum: np.ndarray
+    control_total: np.ndarray
+    control_sum: np.ndarray
+    treatment_sum_sq: Optional[np.ndarray] = None
+    control_sum_sq: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.treatment_total)
+
+
+@dataclass(frozen=True)
+class EffectSizeBatch:
+    """
+    Vectorized effect sizes for a batch of rows. `std_error` is on the interval scale (log scale for ratio and odds
+    effects); `low`/`high` are NaN when no analytic CI was requested.
+    """
+
+    configs: List[EffectSizeConfig]
+    treatment_rate: np.ndarray
+    control_rate: np.ndarray
+    estimate: np.ndarray
+    std_error: np.ndarray
+    low: np.ndarray
+    high: np.ndarray
+    ci_config: Optional[ConfidenceIntervalConfig] = None
+
+    def reports(self, repeat_runs_used: Union[int, Sequence[int]] = 1) -> List[EffectSizeReport]:
+        """One EffectSizeReport per row (see effect_size_report)."""
+        repeats = np.broadcast_to(np.asarray(repeat_runs_used, dtype=np.int64), (len(self.configs),))
+        return [
+            effect_size_report(
+                config,
+                float(self.estimate[index]),
+                treatment_rate=float(self.treatment_rate[index]),
+                control_rate=float(self.control_rate[index]),
+                repeat_runs_used=int(repeats[index]),
+            )
+            for index, config in enumerate(self.configs)
+        ]
+
+    def interval_reports(self) -> List[ConfidenceIntervalReport]:
+        """One ConfidenceIntervalReport per row; bounds are None where undefined (e.g. an empty cohort)."""
+        if self.ci_config is None:
+            raise ValueError("No analytic confidence interval was computed for this batch.")
+        return [
+            ConfidenceIntervalReport(config=self.ci_config, low=_finite_or_none(low), high=_finite_or_none(high))
+            for low, high in zip(self.low.tolist(), self.high.tolist())
+        ]
+
+
+def _wilson_bounds(rate: np.ndarray, total: np.ndarray, z: float) -> Tuple[np.ndarray, np.ndarray]:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominator = 1.0 + z * z / total
+        centre = (rate + z * z / (2.0 * total)) / denominator
+        half_width = z * np.sqrt(rate * (1.0 - rate) / total + z * z / (4.0 * total * total)) / denominator
+    return centre - half_width, centre + half_width
+
+
+def compute_effect_sizes(
+        configs: Union[EffectSizeConfig, Sequence[EffectSizeConfig]],
+        counts: EffectCounts,
+        *,
+        ci_config: Optional[ConfidenceIntervalConfig] = None,
+) -> EffectSizeBatch:
+    """
+    Effect sizes (and optionally Wilson / normal-approximation CIs) for every row of `counts` in one vectorized pass.
+
+    `configs` is one config per row, or a single config applied to all rows. Work is vectorized per effect type, so
+    the cost does not grow with the number of Python objects beyond building the final reports.
+
+    Ratio and odds effects on proportions apply the Haldane-Anscombe +0.5 correction to all four cells of any row
+    with a zero cell; their CIs are normal on the log scale. With method="wilson", difference_of_proportions uses
+    Newcombe's hybrid score interval built from the two Wilson intervals; the other effect types have no score
+    interval here and use the normal approximation. Rows with an empty cohort are NaN throughout.
+    """
+    row_count = len(counts)
+    if isinstance(configs, EffectSizeConfig):
+        configs = [configs] * row_count
+    configs = list(configs)
+    if len(configs) != row_count:
+        raise ValueError(f"Expected {row_count} effect size configs, got {len(configs)}.")
+    if ci_config is not None and ci_config.method == "bootstrap_by_strata":
+        raise ValueError("bootstrap_by_strata intervals come from bootstrap.bootstrap_confidence_intervals.")
+
+    t_n = np.asarray(counts.treatment_total, dtype=np.float64)
+    t_sum = np.asarray(counts.treatment_sum, dtype=np.float64)
+    c_n = np.asarray(counts.control_total, dtype=np.float64)
+    c_sum = np.asarray(counts.control_sum, dtype=np.float64)
+    t_sum_sq = t_sum if counts.treatment_sum_sq is None else np.asarray(counts.treatment_sum_sq, dtype=np.float64)
+    c_sum_sq = c_sum if counts.control_sum_sq is None else np.asarray(counts.control_sum_sq, dtype=np.float64)
+    z = NormalDist().inv_cdf(0.5 + ci_config.confidence / 2.0) if ci_config is not None else float("nan")
+
+    estimate = np.full(row_count, np.nan)
+    std_error = np.full(row_count, np.nan)
+    low = np.full(row_count, np.nan)
+    high = np.full(row_count, np.nan)
+    types = np.array([config.type for config in configs], dtype=object)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_rate = t_sum / t_n
+        c_rate = c_sum / c_n
+        t_var = (t_sum_sq - t_sum * t_sum / t_n) / (t_n - 1.0)
+        c_var = (c_sum_sq - c_sum * c_sum / c_n) / (c_n - 1.0)
+
+        a, b, c, d = _corrected_cells(t_sum, t_n, c_sum, c_n)
+
+        for effect_type in np.unique(types).tolist():
+            rows = types == effect_type
+            log_scale = False
+            if effect_type == "difference_of_proportions":
+                value = t_rate[rows] - c_rate[rows]
+                se = np.sqrt(t_rate[rows] * (1 - t_rate[rows]) / t_n[rows]
+                             + c_rate[rows] * (1 - c_rate[rows]) / c_n[rows])
+            elif effect_type == "ratio_of_proportions":
+                value = np.log((a[rows] / (a[rows] + b[rows])) / (c[rows] / (c[rows] + d[rows])))
+                se = np.sqrt(1 / a[rows] - 1 / (a[rows] + b[rows]) + 1 / c[rows] - 1 / (c[rows] + d[rows]))
+                log_scale = True
+            elif effect_type in ("odds_ratio", "log_odds_ratio"):
+                value = np.log((a[rows] * d[rows]) / (b[rows] * c[rows]))
+                se = np.sqrt(1 / a[rows] + 1 / b[rows] + 1 / c[rows] + 1 / d[rows])
+                log_scale = effect_type == "odds_ratio"
+            elif effect_type == "difference_in_means":
+                value = t_rate[rows] - c_rate[rows]
+                se = np.sqrt(t_var[rows] / t_n[rows] + c_var[rows] / c_n[rows])
+            elif effect_type in ("ratio_of_means", "log_ratio_of_means"):
+                value = np.log(t_rate[rows] / c_rate[rows])
+                se = np.sqrt(t_var[rows] / (t_n[rows] * t_rate[rows] ** 2)
+                             + c_var[rows] / (c_n[rows] * c_rate[rows] ** 2))
+                log_scale = effect_type == "ratio_of_means"
+            else:
+                raise ValueError(f"Unsupported effect type: {effect_type}")
+
+            row_low, row_high = value - z * se, value + z * se
+            if ci_config is not None and ci_config.method == "wilson" and effect_type == "difference_of_proportions":
+                t_low, t_high = _wilson_bounds(t_rate[rows], t_n[rows], z)
+                c_low, c_high = _wilson_bounds(c_rate[rows], c_n[rows], z)
+                row_low = value - np.sqrt((t_rate[rows] - t_low) ** 2 + (c_high - c_rate[rows]) ** 2)
+                row_high = value + np.sqrt((t_high - t_rate[rows]) ** 2 + (c_rate[rows] - c_low) ** 2)
+            if log_scale:
+                value, row_low, row_high = np.exp(value), np.exp(row_low), np.exp(row_high)
+            estimate[rows] = value
+            std_error[rows] = se
+            low[rows] = row_low
+            high[rows] = row_high
+
+    empty = (t_n <= 0) | (c_n <= 0)
+    for column in (t_rate, c_rate, estimate, std_error, low, high):
+        column[empty] = np.nan
+    return EffectSizeBatch(
+        configs=configs,
+        treatment_rate=t_rate,
+        control_rate=c_rate,
+        estimate=estimate,
+        std_error=std_error,
+        low=low,
+        high=high,
+        ci_config=ci_config,
+    )
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from evolver.level0.dsl.execution import EvaluatorConfig, EvaluatorRun, SamplingConfig
+from evolver.signature import compute_signature, sha256_canonical_json_text
+
+
+def group_sql_signature(group_sql: str) -> str:
+    """sha256 of the canonical WHERE-suffix, identical to `signature_tool.py sql`."""
+    digest, _ = compute_signature("sql", group_sql, with_canonical=False)
+    return digest
+
+
+class EvaluatorRunCache:
+    """
+    SQLite-backed cache of completed evaluator runs (`/admin/search-test/search-by-sql`).
+
+    Entries are keyed by (canonical group_sql signature, evaluator_version, sampling seed, sample size, stratification
+    config hash, repeat index, split bin), so an identical cohort run requested again in a later round or iteration is served from disk. Runs
+    recorded under another evaluator_version are never served; sync_version() purges them explicitly.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path))
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(evaluator_runs)")}
+        if columns and "stratification_sig" not in columns:
+            # Caches written before stratification was part of the key cannot tell which sample they hold.
+            self._conn.execute("DROP TABLE evaluator_runs")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS evaluator_runs (
+                group_sql_sig TEXT NOT NULL,
+                evaluator_version TEXT NOT NULL,
+                seed INTEGER NOT NULL,
+                sample_size INTEGER NOT NULL,
+                stratification_sig TEXT NOT NULL,
+                repeat_index INTEGER NOT NULL,
+                split_bin TEXT NOT NULL,
+                run_json TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (group_sql_sig, evaluator_version, seed, sample_size, stratification_sig, repeat_index,
+                             split_bin)
+            );
+            CREATE TABLE IF NOT EXISTS cache_meta (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(
+            *,
+            group_sql: str,
+            evaluator: EvaluatorConfig,
+            sampling: SamplingConfig,
+            repeat_index: int,
+            split_bin: str,
+    ) -> tuple:
+        return (
+            group_sql_signature(group_sql),
+            evaluator.evaluator_version,
+            sampling.seed,
+            sampling.sample_size,
+            sha256_canonical_json_text(sampling.stratification.model_dump_json()),
+            repeat_index,
+            split_bin,
+        )
+
+    def get(
+            self,
+            *,
+            group_sql: str,
+            evaluator: EvaluatorConfig,
+            sampling: SamplingConfig,
+            repeat_index: int,
+            split_bin: str,
+    ) -> Optional[EvaluatorRun]:
+        key = self._key(group_sql=group_sql, evaluator=evaluator, sampling=sampling, repeat_index=repeat_index,
+                        split_bin=split_bin)
+        row = self._conn.execute(
+            "SELECT run_json FROM evaluator_runs WHERE group_sql_sig = ? AND evaluator_version = ? AND seed = ? "
+            "AND sample_size = ? AND stratification_sig = ? AND repeat_index = ? AND split_bin = ?",
+            key,
+        ).fetchone()
+        if row is None:
+            return None
+        return EvaluatorRun.model_validate_json(row[0])
+
+    def put(
+            self,
+            run: EvaluatorRun,
+            *,
+            group_sql: str,
+            evaluator: EvaluatorConfig,
+            sampling: SamplingConfig,
+            repeat_index: int,
+            split_bin: str,
+    ) -> bool:
+        """Store a COMPLETED run; RUNNING/FAILED runs are not cached. Returns whether the run was stored."""
+        if run.status != "COMPLETED":
+            return False
+        key = self._key(group_sql=group_sql, evaluator=evaluator, sampling=sampling, repeat_index=repeat_index,
+                        split_bin=split_bin)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO evaluator_runs (group_sql_sig, evaluator_version, seed, sample_size, "
+            "stratification_sig, repeat_index, split_bin, run_json, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (*key, run.model_dump_json(), time.time()),
+        )
+        self._conn.commit()
+        return True
+
+    def get_or_run(
+            self,
+            run_evaluator: Callable[[], EvaluatorRun],
+            *,
+            group_sql: str,
+            evaluator: EvaluatorConfig,
+            sampling: SamplingConfig,
+            repeat_index: int,
+            split_bin: str,
+    ) -> EvaluatorRun:
+        cached = self.get(group_sql=group_sql, evaluator=evaluator, sampling=sampling, repeat_index=repeat_index,
+                          split_bin=split_bin)
+        if cached is not None:
+            return cached
+        run = run_evaluator()
+        self.put(run, group_sql=group_sql, evaluator=evaluator, sampling=sampling, repeat_index=repeat_index,
+                 split_bin=split_bin)
+        return run
+
+    def sync_version(self, evaluator: EvaluatorConfig) -> int:
+        """Purge runs recorded under any other evaluator_version; returns the number of rows deleted."""
+        row = self._conn.execute("SELECT value FROM cache_meta WHERE name = 'evaluator_version'").fetchone()
+        if row is not None and row[0] == evaluator.evaluator_version:
+            return 0
+        cursor = self._conn.execute(
+            "DELETE FROM evaluator_runs WHERE evaluator_version <> ?", (evaluator.evaluator_version,),
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache_meta (name, value) VALUES ('evaluator_version', ?)",
+            (evaluator.evaluator_version,),
+        )
+        self._conn.commit()
+        return cursor.rowcount
+
+    def invalidate(self, evaluator_version: Optional[str] = None) -> int:
+        """Delete cached runs for one evaluator_version, or all runs when no version is given."""
+        if evaluator_version is None:
+            cursor = self._conn.execute("DELETE FROM evaluator_runs")
+        else:
+            cursor = self._conn.execute(
+                "DELETE FROM evaluator_runs WHERE evaluator_version = ?", (evaluator_version,),
+            )
+        self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> EvaluatorRunCache:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from evolver.level0.base_model import load_model_json
+from evolver.level0.dsl.execution import Decision, Experiment, ExecutionEvidence, LoggingConfig
+from evolver.level0.dsl.proposal import ProposalResult
+from evolver.level0.dsl.rank_formula import RANK_FORMULA_VARIABLES
+from evolver.level0.dsl.scoring import RankingConfig, Scoring
+from evolver.level0.wrapper.ranking import rank_order, scoring_row
+
+EXPERIMENT_STORE_FILENAME = "experiments.sqlite"
+
+_REPO_ROOT = Path(__file__).resolve().parents[3]
+
+
+@dataclass(frozen=True)
+class ExperimentSummary:
+    """In-memory row kept per stored experiment; everything else is loaded from disk on demand."""
+
+    position: int
+    round_index: int
+    iteration_id: str
+    status: str
+    is_ready: bool
+    primary_reason: str
+    rank_score: Optional[float]
+    best_index: Optional[int]
+    rank_row: Tuple[float, ...]
+
+
+def _rank_row_json(rank_row: Tuple[float, ...]) -> str:
+    return json.dumps([None if math.isnan(value) else value for value in rank_row])
+
+
+def _rank_columns(summaries: Sequence[ExperimentSummary]) -> Dict[str, np.ndarray]:
+    values = np.asarray([summary.rank_row for summary in summaries], dtype=np.float64)
+    return {name: values[:, column] for column, name in enumerate(RANK_FORMULA_VARIABLES)}
+
+
+class ExperimentStore:
+    """
+    Append-only, SQLite-backed history of the loop's experiments (replaces the in-memory `experiments` list).
+
+    Only an ExperimentSummary per experiment stays in memory. Proposals, scores and the bulky ExecutionEvidence
+    (evaluator bundles, tracing sessions) are written once and read back lazily: evidence lives in its own table
+    so summaries never touch it. Each summary keeps the experiment's scoring_row(), which does not depend on the
+    RankingConfig; the best experiment is maintained on every append by ranking it against the current best with
+    rank_order(), so best_index is O(1) and only ACCEPTED experiments are eligible. Reopening the store (with any
+    RankingConfig) re-ranks the accepted rows in one rank_order() pass.
+    """
+
+    def __init__(self, db_path: Path, *, ranking: RankingConfig) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ranking = ranking
+        self._conn = sqlite3.connect(str(db_path))
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS experiments (
+                position INTEGER PRIMARY KEY,
+                round_index INTEGER NOT NULL,
+                iteration_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                is_ready INTEGER NOT NULL,
+                primary_reason TEXT NOT NULL,
+                rank_score REAL,
+                rank_row_json TEXT NOT NULL,
+                best_index INTEGER,
+                proposal_json TEXT NOT NULL,
+                score_json TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS experiment_evidence (
+                position INTEGER PRIMARY KEY,
+                evidence_json TEXT NOT NULL
+            );
+            """
+        )
+        self._summaries: List[ExperimentSummary] = []
+        for row in self._conn.execute(
+                "SELECT position, round_index, iteration_id, status, is_ready, primary_reason, rank_score, "
+                "rank_row_json, best_index FROM experiments ORDER BY position"
+        ):
+            self._summaries.append(ExperimentSummary(
+                position=row[0],
+                round_index=row[1],
+                iteration_id=row[2],
+                status=row[3],
+                is_ready=bool(row[4]),
+                primary_reason=row[5],
+                rank_score=row[6],
+                best_index=row[8],
+                rank_row=tuple(math.nan if value is None else value for value in json.loads(row[7])),
+            ))
+        self._best = self._best_of([summary for summary in self._summaries if summary.status == "ACCEPTED"])
+
+    @classmethod
+    def for_iteration(cls, logging: LoggingConfig, iteration_id: str, *, ranking: RankingConfig) -> ExperimentStore:
+        """Store under the iteration's artifact directory (`runs/{iteration_id}/artifacts` under the repo root)."""
+        artifact_dir = (_REPO_ROOT / logging.artifact_dir_template.format(iteration_id=iteration_id)).resolve()
+        return cls(artifact_dir / EXPERIMENT_STORE_FILENAME, ranking=ranking)
+
+    def _best_of(self, candidates: Sequence[ExperimentSummary]) -> Optional[ExperimentSummary]:
+        # candidates are in position order, so rank_order's insertion-order tie break keeps the earlier experiment.
+        if not candidates:
+            return None
+        return candidates[int(rank_order(self.ranking, _rank_columns(candidates), len(candidates))[0])]
+
+    def _add_summary(self, summary: ExperimentSummary) -> None:
+        self._summaries.append(summary)
+        if summary.status == "ACCEPTED":
+            self._best = self._best_of([summary] if self._best is None else [self._best, summary])
+
+    def append(self, experiment: Experiment) -> ExperimentSummary:
+        """Persist `experiment` and return its summary; the evidence is not kept in memory."""
+        decision = experiment.decision
+        row = scoring_row(decision.score, round_index=experiment.round_index, accepted=decision.status == "ACCEPTED")
+        rank_row = tuple(row[name] for name in RANK_FORMULA_VARIABLES)
+        position = len(self._summaries)
+        self._conn.execute(
+            "INSERT INTO experiments (position, round_index, iteration_id, status, is_ready, primary_reason, "
+            "rank_score, rank_row_json, best_index, proposal_json, score_json, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                position, experiment.round_index, experiment.iteration_id, decision.status, int(decision.is_ready),
+                decision.primary_reason, decision.score.ranking.rank_score,
+                _rank_row_json(rank_row), experiment.best_index,
+                experiment.proposal.model_dump_json(), decision.score.model_dump_json(), time.time(),
+            ),
+        )
+        self._conn.execute(
+            "INSERT INTO experiment_evidence (position, evidence_json) VALUES (?, ?)",
+            (position, decision.evidence.model_dump_json()),
+        )
+        self._conn.commit()
+        summary = ExperimentSummary(
+            position=position,
+            round_index=experiment.round_index,
+            iteration_id=experiment.iteration_id,
+            status=decision.status,
+            is_ready=decision.is_ready,
+            primary_reason=decision.primary_reason,
+            rank_score=decision.score.ranking.rank_score,
+            best_index=experiment.best_index,
+            rank_row=rank_row,
+        )
+        self._add_summary(summary)
+        return summary
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+    def __iter__(self) -> Iterator[ExperimentSummary]:
+        return iter(self._summaries)
+
+    def summary(self, position: int) -> ExperimentSummary:
+        return self._summaries[position]
+
+    @property
+    def best(self) -> Optional[ExperimentSummary]:
+        return self._best
+
+    @property
+    def best_index(self) -> Optional[int]:
+        """round_index of the best accepted experiment so far (for Experiment.best_index)."""
+        return self._best.round_index if self._best is not None else None
+
+    def _row(self, column: str, table: str, position: int) -> Any:
+        row = self._conn.execute(f"SELECT {column} FROM {table} WHERE position = ?", (position,)).fetchone()
+        if row is None:
+            raise IndexError(f"No experiment at position {position}")
+        return row[0]
+
+    def proposal(self, position: int) -> ProposalResult:
+        return load_model_json(ProposalResult, self._row("proposal_json", "experiments", position))
+
+    def _score(self, position: int) -> Scoring:
+        return load_model_json(Scoring, self._row("score_json", "experiments", position))
+
+    def evidence(self, position: int) -> ExecutionEvidence:
+        return load_model_json(ExecutionEvidence, self._row("evidence_json", "experiment_evidence", position))
+
+    def load(self, position: int) -> Experiment:
+        """Full Experiment (proposal, score and evidence) read back from disk."""
+        summary = self._summaries[position]
+        return Experiment(
+            round_index=summary.round_index,
+            iteration_id=summary.iteration_id,
+            proposal=self.proposal(position),
+            decision=Decision(
+                status=summary.status,
+                is_ready=summary.is_ready,
+                primary_reason=summary.primary_reason,
+                evidence=self.evidence(position),
+                score=self._score(position),
+            ),
+            best_index=summary.best_index,
+        )
+
+    def load_best(self) -> Optional[Experiment]:
+        return self.load(self._best.position) if self._best is not None else None
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> ExperimentStore:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
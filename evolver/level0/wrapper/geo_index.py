@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from evolver.level0.dsl.execution import StratificationConfig
+
+GEOHASH_PRECISION = 5
+FEATURE_BINS = 4
+# A stratum is high-failure when its failure rate is at least this multiple of the round's overall failure rate.
+HIGH_FAILURE_RATIO = 2.0
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_cells(lat: np.ndarray, lon: np.ndarray, precision: int = GEOHASH_PRECISION) -> np.ndarray:
+    """Integer geohash cells (5 * precision interleaved bits, longitude first) for coordinate arrays."""
+    if not 1 <= precision <= 12:
+        raise ValueError("precision must be between 1 and 12.")
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    lat_q = np.clip(((np.asarray(lat, dtype=np.float64) + 90.0) / 180.0 * (1 << lat_bits)).astype(np.int64),
+                    0, (1 << lat_bits) - 1)
+    lon_q = np.clip(((np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * (1 << lon_bits)).astype(np.int64),
+                    0, (1 << lon_bits) - 1)
+    cells = np.zeros(lat_q.shape, dtype=np.int64)
+    for bit in range(total_bits):
+        source, shift = (lon_q, lon_bits - 1 - bit // 2) if bit % 2 == 0 else (lat_q, lat_bits - 1 - bit // 2)
+        cells = (cells << 1) | ((source >> shift) & 1)
+    return cells
+
+
+def geohash_string(cell: int, precision: int = GEOHASH_PRECISION) -> str:
+    return "".join(_GEOHASH_ALPHABET[(int(cell) >> (5 * (precision - 1 - i))) & 31] for i in range(precision))
+
+
+def quantile_bins(values: np.ndarray, bins: int = FEATURE_BINS) -> np.ndarray:
+    """Quantile bin (0..bins-1) of each value; missing (NaN) values get bin `bins`."""
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    result = np.full(values.shape, bins, dtype=np.int32)
+    if finite.any():
+        edges = np.quantile(values[finite], np.linspace(0.0, 1.0, bins + 1)[1:-1])
+        result[finite] = np.searchsorted(edges, values[finite], side="right")
+    return result
+
+
+def stratum_codes(
+        stratification: StratificationConfig,
+        *,
+        city_ids: np.ndarray,
+        states: Optional[Sequence[str]] = None,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Stratum id per address and the stratum labels: city_id modulo bins_count for city_id_bins, one stratum per
+    state code for state_bins, a single stratum when stratification is off.
+    """
+    city_ids = np.asarray(city_ids, dtype=np.int64)
+    if not stratification.enabled or stratification.by == "none":
+        return np.zeros(city_ids.shape, dtype=np.int32), ["all"]
+    if stratification.by == "state_bins":
+        if states is None:
+            raise ValueError("state_bins stratification needs the address state codes.")
+        labels, codes = np.unique(np.asarray(states, dtype=object).astype(str), return_inverse=True)
+        return codes.astype(np.int32), [str(label) for label in labels]
+    codes = (city_ids % stratification.bins_count).astype(np.int32)
+    return codes, [f"city_bin_{code}" for code in range(stratification.bins_count)]
+
+
+@dataclass
+class RegionNovelty:
+    """Feature-region and high-failure-strata novelty of one round of failures."""
+
+    failures: int
+    new_region_failures: int
+    new_strata_failures: int
+    new_regions: List[Dict[str, Any]] = field(default_factory=list)
+    new_high_failure_strata: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def new_region_fraction(self) -> Optional[float]:
+        return self.new_region_failures / self.failures if self.failures else None
+
+    @property
+    def new_strata_fraction(self) -> Optional[float]:
+        return self.new_strata_failures / self.failures if self.failures else None
+
+
+class FeatureRegionIndex:
+    """
+    Precomputed address -> feature-region / stratum mapping over `app.address`, kept as compact integer arrays.
+
+    A region is a geohash cell crossed with the quantile bins of the surrogate features; regions and strata get
+    dense int32 ids. The index also remembers the first experiment in which each region had failures and each stratum
+    was high-failure (experiment ids are kept in `experiment_ids` and referenced by position), so scoring a round is a searchsorted lookup of its addresses plus bincounts over the
+    region and stratum ids, with no GROUP BY over the address table. save()/load() persist everything as one .npz.
+    """
+
+    def __init__(
+            self,
+            *,
+            address_ids: np.ndarray,
+            region_of_address: np.ndarray,
+            stratum_of_address: np.ndarray,
+            region_cells: np.ndarray,
+            region_feature_codes: np.ndarray,
+            stratum_labels: Sequence[str],
+            precision: int = GEOHASH_PRECISION,
+            experiment_ids: Optional[Sequence[str]] = None,
+            region_first_experiment: Optional[np.ndarray] = None,
+            stratum_first_experiment: Optional[np.ndarray] = None,
+    ) -> None:
+        self.address_ids = np.asarray(address_ids, dtype=np.int64)
+        self.region_of_address = np.asarray(region_of_address, dtype=np.int32)
+        self.stratum_of_address = np.asarray(stratum_of_address, dtype=np.int32)
+        self.region_cells = np.asarray(region_cells, dtype=np.int64)
+        self.region_feature_codes = np.asarray(region_feature_codes, dtype=np.int32)
+        self.stratum_labels = list(stratum_labels)
+        self.precision = precision
+        self.experiment_ids = list(experiment_ids or [])
+        self.region_first_experiment = (np.full(len(self.region_cells), -1, dtype=np.int32)
+                                        if region_first_experiment is None
+                                        else np.asarray(region_first_experiment, dtype=np.int32))
+        self.stratum_first_experiment = (np.full(len(self.stratum_labels), -1, dtype=np.int32)
+                                         if stratum_first_experiment is None
+                                         else np.asarray(stratum_first_experiment, dtype=np.int32))
+
+    @classmethod
+    def build(
+            cls,
+            *,
+            address_ids: np.ndarray,
+            lat: np.ndarray,
+            lon: np.ndarray,
+            city_ids: np.ndarray,
+            stratification: StratificationConfig,
+            states: Optional[Sequence[str]] = None,
+            features: Optional[Mapping[str, np.ndarray]] = None,
+            precision: int = GEOHASH_PRECISION,
+            feature_bins: int = FEATURE_BINS,
+    ) -> FeatureRegionIndex:
+        """Index address rows (e.g. `SELECT id, lat, lon, city_id FROM app.address`) and per-address features."""
+        address_ids = np.asarray(address_ids, dtype=np.int64)
+        order = np.argsort(address_ids, kind="stable")
+        cells = geohash_cells(np.asarray(lat)[order], np.asarray(lon)[order], precision)
+        feature_codes = np.zeros(len(order), dtype=np.int64)
+        for name in sorted(features or {}):
+            feature_codes = feature_codes * (feature_bins + 1) + quantile_bins(np.asarray(features[name])[order],
+                                                                                 feature_bins)
+        region_keys = np.stack([cells, feature_codes], axis=1)
+        unique_keys, region_of_address = np.unique(region_keys, axis=0, return_inverse=True)
+        stratum_of_address, stratum_labels = stratum_codes(
+            stratification,
+            city_ids=np.asarray(city_ids)[order],
+            states=None if states is None else np.asarray(states, dtype=object)[order],
+        )
+        return cls(
+            address_ids=address_ids[order],
+            region_of_address=region_of_address.reshape(-1),
+            stratum_of_address=stratum_of_address,
+            region_cells=unique_keys[:, 0],
+            region_feature_codes=unique_keys[:, 1],
+            stratum_labels=stratum_labels,
+            precision=precision,
+        )
+
+    @property
+    def region_count(self) -> int:
+        return len(self.region_cells)
+
+    def _positions(self, address_ids: np.ndarray) -> np.ndarray:
+        address_ids = np.asarray(address_ids, dtype=np.int64)
+        positions = np.searchsorted(self.address_ids, address_ids)
+        found = positions < len(self.address_ids)
+        found[found] = self.address_ids[positions[found]] == address_ids[found]
+        if not found.all():
+            raise KeyError(f"{int((~found).sum())} address ids are not in the region index.")
+        return positions
+
+    def regions_of(self, address_ids: np.ndarray) -> np.ndarray:
+        return self.region_of_address[self._positions(address_ids)]
+
+    def strata_of(self, address_ids: np.ndarray) -> np.ndarray:
+        return self.stratum_of_address[self._positions(address_ids)]
+
+    def score_round(
+            self,
+            address_ids: np.ndarray,
+            failed: np.ndarray,
+            *,
+            experiment_id: str,
+            min_stratum_size: int = 1,
+            top_k: int = 8,
+            record: bool = True,
+    ) -> RegionNovelty:
+        """
+        Novelty of one round's evaluated addresses (`failed` marks the failing ones).
+
+        A region is new when its first failures happened in `experiment_id`; a stratum is a new high-failure stratum
+        when it has at least `min_stratum_size` evaluated addresses, a failure rate of at least HIGH_FAILURE_RATIO
+        times the round's overall rate, and was not high-failure in an earlier experiment. History is keyed by
+        experiment id (round indexes repeat across iterations). Re-scoring the same experiment is idempotent;
+        record=False leaves the history untouched.
+        """
+        positions = self._positions(address_ids)
+        failed = np.asarray(failed, dtype=bool)
+        if experiment_id in self.experiment_ids:
+            experiment = self.experiment_ids.index(experiment_id)
+        else:
+            experiment = len(self.experiment_ids)
+        failed_regions = self.region_of_address[positions[failed]]
+        strata = self.stratum_of_address[positions]
+        failures = int(failed.sum())
+
+        region_failures = np.bincount(failed_regions, minlength=self.region_count)
+        region_first = self.region_first_experiment.copy()
+        region_first[(region_failures > 0) & (region_first < 0)] = experiment
+        new_region_mask = (region_failures > 0) & (region_first == experiment)
+
+        stratum_total = np.bincount(strata, minlength=len(self.stratum_labels))
+        stratum_failures = np.bincount(strata[failed], minlength=len(self.stratum_labels))
+        overall_rate = failures / len(positions) if len(positions) else 0.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            stratum_rate = np.where(stratum_total > 0, stratum_failures / stratum_total, 0.0)
+        high_failure = ((stratum_total >= max(1, min_stratum_size)) & (stratum_failures > 0)
+                        & (stratum_rate >= HIGH_FAILURE_RATIO * overall_rate))
+        stratum_first = self.stratum_first_experiment.copy()
+        stratum_first[high_failure & (stratum_first < 0)] = experiment
+        new_strata_mask = high_failure & (stratum_first == experiment)
+
+        if record:
+            if experiment == len(self.experiment_ids):
+                self.experiment_ids.append(experiment_id)
+            self.region_first_experiment = region_first
+            self.stratum_first_experiment = stratum_first
+
+        new_regions = np.flatnonzero(new_region_mask)
+        new_regions = new_regions[np.lexsort((new_regions, -region_failures[new_regions]))][:top_k]
+        new_strata = np.flatnonzero(new_strata_mask)
+        new_strata = new_strata[np.lexsort((new_strata, -stratum_failures[new_strata]))]
+        return RegionNovelty(
+            failures=failures,
+            new_region_failures=int(region_failures[new_region_mask].sum()),
+            new_strata_failures=int(stratum_failures[new_strata_mask].sum()),
+            new_regions=[
+                {
+                    "region_id": int(region),
+                    "geohash": geohash_string(self.region_cells[region], self.precision),
+                    "feature_bin": int(self.region_feature_codes[region]),
+                    "count": int(region_failures[region]),
+                }
+                for region in new_regions
+            ],
+            new_high_failure_strata=[
+                {
+                    "stratum": self.stratum_labels[stratum],
+                    "failures": int(stratum_failures[stratum]),
+                    "total": int(stratum_total[stratum]),
+                    "failure_rate": float(stratum_rate[stratum]),
+                }
+                for stratum in new_strata
+            ],
+        )
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + ".tmp")
+        with open(temporary, "wb") as handle:
+            np.savez(
+                handle,
+                address_ids=self.address_ids,
+                region_of_address=self.region_of_address,
+                stratum_of_address=self.stratum_of_address,
+                region_cells=self.region_cells,
+                region_feature_codes=self.region_feature_codes,
+                stratum_labels=np.asarray(self.stratum_labels, dtype=str),
+                precision=np.asarray(self.precision),
+                experiment_ids=np.asarray(self.experiment_ids, dtype=str),
+                region_first_experiment=self.region_first_experiment,
+                stratum_first_experiment=self.stratum_first_experiment,
+            )
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: Path) -> FeatureRegionIndex:
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                address_ids=data["address_ids"],
+                region_of_address=data["region_of_address"],
+                stratum_of_address=data["stratum_of_address"],
+                region_cells=data["region_cells"],
+                region_feature_codes=data["region_feature_codes"],
+                stratum_labels=[str(label) for label in data["stratum_labels"]],
+                precision=int(data["precision"]),
+                experiment_ids=[str(experiment_id) for experiment_id in data["experiment_ids"]],
+                region_first_experiment=data["region_first_experiment"],
+                stratum_first_experiment=data["stratum_first_experiment"],
+            )
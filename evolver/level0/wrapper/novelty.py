@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from evolver.level0.dsl.scoring import NoveltyConfig, NoveltyReport
+from evolver.level0.wrapper.geo_index import RegionNovelty
+from evolver.level0.wrapper.tracing_store import TRACING_PHASES, TracingStore
+
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+# Minimum estimated Jaccard similarity (share of equal MinHash slots) to join an existing reason family.
+FAMILY_SIMILARITY = 0.5
+SHINGLE_SIZE = 3
+STACK_FRAMES_IN_SIGNATURE = 5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_permutation_rng = np.random.default_rng(0x5EED_F00D)
+# a < 2^31 and shingle hashes < 2^32 keep a * x + b below 2^64.
+_PERMUTATION_A = _permutation_rng.integers(1, 1 << 31, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERMUTATION_B = _permutation_rng.integers(0, 1 << 31, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+_UUID_PATTERN = re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b")
+_HEX_PATTERN = re.compile(r"\b0x[0-9a-f]+\b|\b[0-9a-f]{12,}\b")
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+_QUOTED_PATTERN = re.compile(r"'[^']*'|\"[^\"]*\"")
+_TOKEN_PATTERN = re.compile(r"[a-z_$<>#*][a-z0-9_$.<>#*]*|[^\sa-z0-9_]")
+_FRAME_PATTERN = re.compile(r"^\s*at\s+([\w$.<>]+)\(", re.MULTILINE)
+
+
+def normalize_failure_text(text: str) -> str:
+    """Lower-case failure text with ids, numbers and quoted literals masked, so failures differing only in data
+    collapse to one template."""
+    text = text.lower()
+    text = _UUID_PATTERN.sub("<uuid>", text)
+    text = _HEX_PATTERN.sub("<hex>", text)
+    text = _QUOTED_PATTERN.sub("<str>", text)
+    text = _NUMBER_PATTERN.sub("<n>", text)
+    return " ".join(text.split())
+
+
+def trace_error_signature(error_message: Optional[str], stack_trace: Optional[str]) -> str:
+    """Error message plus the exception line and top stack frames (methods only, no line numbers)."""
+    parts = [error_message or ""]
+    if stack_trace:
+        parts.append(stack_trace.splitlines()[0])
+        parts.extend(_FRAME_PATTERN.findall(stack_trace)[:STACK_FRAMES_IN_SIGNATURE])
+    return " ".join(part for part in parts if part)
+
+
+def trace_error_texts(store: TracingStore) -> List[str]:
+    """Error signatures of every ERROR-phase record (or record carrying an error message) in a TracingStore."""
+    error_phase = TRACING_PHASES.index("ERROR")
+    texts = []
+    for record_index in range(store.record_count):
+        message_id = store.error_message[record_index]
+        stack_id = store.stack_trace[record_index]
+        if store.phase[record_index] != error_phase and message_id < 0:
+            continue
+        texts.append(trace_error_signature(
+            store.texts.values[message_id] if message_id >= 0 else None,
+            store.texts.values[stack_id] if stack_id >= 0 else None,
+        ))
+    return texts
+
+
+def minhash_signature(normalized_text: str) -> np.ndarray:
+    """MinHash over word shingles of a normalized failure text, as MINHASH_PERMUTATIONS uint32 slots."""
+    tokens = _TOKEN_PATTERN.findall(normalized_text) or [normalized_text]
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = {" ".join(tokens)}
+    else:
+        shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64,
+                         count=len(shingles))
+    permuted = (hashes[None, :] * _PERMUTATION_A[:, None] + _PERMUTATION_B[:, None]) % np.uint64(_MERSENNE_PRIME)
+    return (permuted.min(axis=1) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def _band_keys(signature: np.ndarray) -> List[int]:
+    rows = signature.reshape(LSH_BANDS, LSH_ROWS)
+    return [
+        int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8).digest(), "big") >> 1
+        for band in rows
+    ]
+
+
+@dataclass
+class ReasonNovelty:
+    """Reason-family novelty of one round of failures."""
+
+    failures: int
+    new_failures: int
+    family_counts: Dict[int, int]
+    new_families: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def new_reason_fraction(self) -> Optional[float]:
+        return self.new_failures / self.failures if self.failures else None
+
+
+class ReasonFamilyIndex:
+    """
+    Persistent (sqlite3) reason-family clusters of failure texts (res_error strings, trace error signatures).
+
+    Each family keeps a representative MinHash signature, registered in LSH_BANDS band buckets. A failure is matched
+    by looking up its own band buckets only and joining the most similar candidate family at or above
+    FAMILY_SIMILARITY; otherwise it founds a new family. Exact normalized texts are memoized. Scoring a round
+    therefore costs O(failures in the round x bands), independent of how many experiments the index has seen.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path))
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS reason_families (
+                family_id INTEGER PRIMARY KEY,
+                representative TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                first_seen_experiment TEXT NOT NULL,
+                failure_count INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS reason_buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                family_id INTEGER NOT NULL,
+                PRIMARY KEY (band, bucket, family_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS reason_texts (
+                text_sha256 TEXT PRIMARY KEY,
+                family_id INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS reason_experiment_counts (
+                experiment_id TEXT NOT NULL,
+                family_id INTEGER NOT NULL,
+                failure_count INTEGER NOT NULL,
+                PRIMARY KEY (experiment_id, family_id)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+
+    def family_count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM reason_families").fetchone()[0]
+
+    def failure_count(self, family_id: int) -> int:
+        """Recorded failures of a family over all experiments (0 for an unknown family)."""
+        row = self._conn.execute(
+            "SELECT failure_count FROM reason_families WHERE family_id = ?", (family_id,),
+        ).fetchone()
+        return row[0] if row is not None else 0
+
+    def _record_counts(self, experiment_id: str, family_counts: Counter) -> None:
+        # Replace whatever an earlier scoring of the same experiment recorded, so re-scoring does not double count.
+        previous = self._conn.execute(
+            "SELECT failure_count, family_id FROM reason_experiment_counts WHERE experiment_id = ?", (experiment_id,),
+        ).fetchall()
+        self._conn.executemany(
+            "UPDATE reason_families SET failure_count = failure_count - ? WHERE family_id = ?", previous,
+        )
+        self._conn.execute("DELETE FROM reason_experiment_counts WHERE experiment_id = ?", (experiment_id,))
+        self._conn.executemany(
+            "INSERT INTO reason_experiment_counts (experiment_id, family_id, failure_count) VALUES (?, ?, ?)",
+            [(experiment_id, family_id, count) for family_id, count in family_counts.items()],
+        )
+        self._conn.executemany(
+            "UPDATE reason_families SET failure_count = failure_count + ? WHERE family_id = ?",
+            [(count, family_id) for family_id, count in family_counts.items()],
+        )
+
+    def _find_family(self, signature: np.ndarray, band_keys: List[int]) -> Optional[int]:
+        candidates: set = set()
+        for band, bucket in enumerate(band_keys):
+            candidates.update(row[0] for row in self._conn.execute(
+                "SELECT family_id FROM reason_buckets WHERE band = ? AND bucket = ?", (band, bucket),
+            ))
+        best_family, best_similarity = None, FAMILY_SIMILARITY
+        for family_id in sorted(candidates):
+            blob = self._conn.execute(
+                "SELECT signature FROM reason_families WHERE family_id = ?", (family_id,),
+            ).fetchone()[0]
+            similarity = float(np.mean(np.frombuffer(blob, dtype=np.uint32) == signature))
+            if similarity >= best_similarity and (best_family is None or similarity > best_similarity):
+                best_family, best_similarity = family_id, similarity
+        return best_family
+
+    def _assign(self, normalized: str, experiment_id: str) -> Tuple[int, bool]:
+        """Family of a normalized failure text and whether that family is new for `experiment_id`."""
+        text_digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        row = self._conn.execute(
+            "SELECT f.family_id, f.first_seen_experiment FROM reason_texts t "
+            "JOIN reason_families f ON f.family_id = t.family_id WHERE t.text_sha256 = ?", (text_digest,),
+        ).fetchone()
+        if row is not None:
+            return row[0], row[1] == experiment_id
+
+        signature = minhash_signature(normalized)
+        band_keys = _band_keys(signature)
+        family_id = self._find_family(signature, band_keys)
+        if family_id is None:
+            family_id = self._conn.execute(
+                "INSERT INTO reason_families (representative, signature, first_seen_experiment, failure_count, "
+                "created_at) VALUES (?, ?, ?, 0, ?)",
+                (normalized, signature.tobytes(), experiment_id, time.time()),
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO reason_buckets (band, bucket, family_id) VALUES (?, ?, ?)",
+                [(band, bucket, family_id) for band, bucket in enumerate(band_keys)],
+            )
+            is_new = True
+        else:
+            first_seen = self._conn.execute(
+                "SELECT first_seen_experiment FROM reason_families WHERE family_id = ?", (family_id,),
+            ).fetchone()[0]
+            is_new = first_seen == experiment_id
+        self._conn.execute(
+            "INSERT OR IGNORE INTO reason_texts (text_sha256, family_id) VALUES (?, ?)", (text_digest, family_id),
+        )
+        return family_id, is_new
+
+    def score_round(
+            self,
+            failures: Iterable[str],
+            *,
+            experiment_id: str,
+            top_k: int = 8,
+            record: bool = True,
+    ) -> ReasonNovelty:
+        """
+        Assign a round's failure texts to reason families and measure how many fall into families first seen in
+        `experiment_id`. Re-scoring the same experiment is idempotent: its earlier failure counts are replaced. With
+        record=False the index is left unchanged.
+        """
+        family_counts: Counter = Counter()
+        family_is_new: Dict[int, bool] = {}
+        examples: Dict[int, str] = {}
+        assigned: Dict[str, int] = {}
+        try:
+            for failure in failures:
+                normalized = normalize_failure_text(failure)
+                family_id = assigned.get(normalized)
+                if family_id is None:
+                    family_id, is_new = self._assign(normalized, experiment_id)
+                    assigned[normalized] = family_id
+                    family_is_new.setdefault(family_id, is_new)
+                    examples.setdefault(family_id, failure)
+                family_counts[family_id] += 1
+            if record:
+                self._record_counts(experiment_id, family_counts)
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        except BaseException:
+            self._conn.rollback()
+            raise
+
+        new_counts = [(family_id, count) for family_id, count in family_counts.items() if family_is_new[family_id]]
+        new_counts.sort(key=lambda item: (-item[1], item[0]))
+        return ReasonNovelty(
+            failures=sum(family_counts.values()),
+            new_failures=sum(count for _, count in new_counts),
+            family_counts=dict(family_counts),
+            new_families=[
+                {"family_id": family_id, "count": count, "example": examples[family_id]}
+                for family_id, count in new_counts[:top_k]
+            ],
+        )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> ReasonFamilyIndex:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def build_novelty_report(
+        config: NoveltyConfig,
+        *,
+        reasons: Optional[ReasonNovelty] = None,
+        regions: Optional[RegionNovelty] = None,
+) -> NoveltyReport:
+    """
+    NoveltyReport for the configured sources. score is the mean new fraction over the sources that were measured;
+    the gate passes when novelty is disabled or not required, or when every configured source was measured and
+    meets its minimum (feature_region_bins and high_failure_strata both use min_new_region_fraction).
+    """
+    top_k = int(config.top_k_to_report)
+    new_reason_fraction = reasons.new_reason_fraction if reasons is not None else None
+    new_region_fraction = regions.new_region_fraction if regions is not None else None
+    source_fractions = {
+        "reason_family_clusters": (new_reason_fraction, config.min_new_reason_fraction),
+        "feature_region_bins": (new_region_fraction, config.min_new_region_fraction),
+        "high_failure_strata": (regions.new_strata_fraction if regions is not None else None,
+                                config.min_new_region_fraction),
+    }
+    fractions: List[float] = []
+    passes = True
+    for source in config.sources:
+        fraction, minimum = source_fractions[source]
+        if fraction is None:
+            passes = False
+            continue
+        fractions.append(fraction)
+        passes = passes and fraction >= minimum
+    return NoveltyReport(
+        config=config,
+        score=float(np.mean(fractions)) if fractions else 0.0,
+        passes_gate=passes or not (config.enabled and config.required),
+        new_reason_fraction=new_reason_fraction,
+        new_region_fraction=new_region_fraction,
+        new_reason_families=list(reasons.new_families[:top_k]) if reasons is not None else [],
+        new_feature_regions=list(regions.new_regions[:top_k]) if regions is not None else [],
+        new_high_failure_strata=list(regions.new_high_failure_strata[:top_k]) if regions is not None else [],
+    )
+
+
+def score_reason_novelty(
+        index: ReasonFamilyIndex,
+        config: NoveltyConfig,
+        failures: Sequence[str],
+        *,
+        experiment_id: str,
+        regions: Optional[RegionNovelty] = None,
+        record: bool = True,
+) -> NoveltyReport:
+    """Score one round's failures against the index and build its NoveltyReport (with `regions` if measured)."""
+    reasons = index.score_round(failures, experiment_id=experiment_id, top_k=int(config.top_k_to_report),
+                                record=record)
+    return build_novelty_report(config, reasons=reasons, regions=regions)
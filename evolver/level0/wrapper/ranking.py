@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from evolver.level0.dsl.execution import Decision, Experiment
+from evolver.level0.dsl.rank_formula import RANK_FORMULA_VARIABLES, compile_rank_formula, parse_tie_breaker
+from evolver.level0.dsl.scoring import (
+    ConfidenceIntervalReport,
+    EffectSizeReport,
+    MechanismReport,
+    NoveltyReport,
+    RankingConfig,
+    RankingReport,
+    RepeatStoppingReport,
+    Scoring,
+)
+
+
+def _value(value: Optional[float]) -> float:
+    return math.nan if value is None else float(value)
+
+
+def _row(
+        *,
+        round_index: int,
+        accepted: bool,
+        effect_sizes: Sequence[EffectSizeReport],
+        confidence_intervals: Sequence[ConfidenceIntervalReport],
+        novelty: Optional[NoveltyReport],
+        mechanism: Optional[MechanismReport],
+        repeat_stopping: Optional[RepeatStoppingReport],
+) -> Dict[str, float]:
+    effect = effect_sizes[0] if effect_sizes else None
+    interval = confidence_intervals[0] if confidence_intervals else None
+    complexity = mechanism.complexity_penalty if mechanism is not None else None
+    return {
+        "round_index": float(round_index),
+        "accepted": 1.0 if accepted else 0.0,
+        "delta": _value(effect.delta if effect else None),
+        "ratio": _value(effect.ratio if effect else None),
+        "p_treatment": _value(effect.p_treatment if effect else None),
+        "p_control": _value(effect.p_control if effect else None),
+        "repeat_runs_used": _value(effect.repeat_runs_used if effect else None),
+        "ci_low": _value(interval.low if interval else None),
+        "ci_high": _value(interval.high if interval else None),
+        "novelty_score": _value(novelty.score if novelty else None),
+        "new_reason_fraction": _value(novelty.new_reason_fraction if novelty else None),
+        "new_region_fraction": _value(novelty.new_region_fraction if novelty else None),
+        "mechanism_score": _value(mechanism.mechanism_total_score if mechanism else None),
+        "holdout_lift_topk": _value(mechanism.holdout_lift_topk if mechanism else None),
+        "complexity_penalty": _value(complexity.penalty_score if complexity else None),
+        "join_complexity": _value(complexity.estimated_join_complexity if complexity else None),
+        "repeat_variance": _value(repeat_stopping.repeat_variance if repeat_stopping else None),
+    }
+
+
+def scoring_row(scoring: Scoring, *, round_index: int, accepted: bool) -> Dict[str, float]:
+    """RANK_FORMULA_VARIABLES of one scored experiment (the first effect size / CI is the primary one)."""
+    return _row(
+        round_index=round_index,
+        accepted=accepted,
+        effect_sizes=scoring.effect_sizes,
+        confidence_intervals=scoring.confidence_intervals,
+        novelty=scoring.novelty,
+        mechanism=scoring.mechanism,
+        repeat_stopping=scoring.repeat_stopping,
+    )
+
+
+def rank_scores(config: RankingConfig, columns: Dict[str, np.ndarray], rows: int) -> np.ndarray:
+    """rank_score_formula over every row, rounded to rounding_decimals (NaN where undefined)."""
+    scores = compile_rank_formula(config.rank_score_formula)(columns, rows)
+    return np.round(scores, config.rounding_decimals)
+
+
+def row_rank_score(config: RankingConfig, row: Dict[str, float]) -> float:
+    """Rounded rank score of a single scoring_row() (NaN where undefined)."""
+    return float(rank_scores(config, {name: np.asarray([value]) for name, value in row.items()}, 1)[0])
+
+
+def rank_order(config: RankingConfig, columns: Dict[str, np.ndarray], rows: int) -> np.ndarray:
+    """
+    Row indices best first: rank score descending, then each tie breaker in order, then insertion order.
+    NaN scores and tie-breaker values sort last.
+    """
+    scores = rank_scores(config, columns, rows)
+    keys: List[np.ndarray] = []
+    for tie_breaker in reversed(config.tie_breakers):
+        name, descending = parse_tie_breaker(tie_breaker)
+        keys.append(-columns[name] if descending else columns[name])
+    keys.append(-scores)
+    # np.lexsort is stable and sorts by the last key first.
+    return np.lexsort(keys)
+
+
+class RankingTable:
+    """
+    Column table of RANK_FORMULA_VARIABLES over the experiment history, appended to once per experiment.
+
+    Columns are materialized as float64 arrays on demand (and cached until the next append), so re-ranking the
+    whole history for best selection is one vectorized formula evaluation plus a lexsort.
+    """
+
+    def __init__(self) -> None:
+        self._rows: Dict[str, List[float]] = {name: [] for name in RANK_FORMULA_VARIABLES}
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self._rows["round_index"])
+
+    @classmethod
+    def from_experiments(cls, experiments: Iterable[Experiment]) -> RankingTable:
+        table = cls()
+        for experiment in experiments:
+            table.append(experiment.decision, round_index=experiment.round_index)
+        return table
+
+    def append(self, decision: Decision, *, round_index: int) -> None:
+        row = scoring_row(decision.score, round_index=round_index, accepted=decision.status == "ACCEPTED")
+        for name, value in row.items():
+            self._rows[name].append(value)
+        self._columns = None
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        if self._columns is None:
+            self._columns = {name: np.asarray(values, dtype=np.float64) for name, values in self._rows.items()}
+        return self._columns
+
+    def order(self, config: RankingConfig) -> np.ndarray:
+        return rank_order(config, self.columns(), len(self))
+
+    def best_round_index(self, config: RankingConfig, *, accepted_only: bool = True) -> Optional[int]:
+        """round_index of the best ranked experiment (for Experiment.best_index); None if none is eligible."""
+        columns = self.columns()
+        order = self.order(config)
+        if accepted_only:
+            order = order[columns["accepted"][order] == 1.0]
+        return int(columns["round_index"][order[0]]) if order.size else None
+
+
+def ranking_report(
+        config: RankingConfig,
+        *,
+        round_index: int,
+        accepted: bool,
+        effect_sizes: Sequence[EffectSizeReport] = (),
+        confidence_intervals: Sequence[ConfidenceIntervalReport] = (),
+        novelty: Optional[NoveltyReport] = None,
+        mechanism: Optional[MechanismReport] = None,
+        repeat_stopping: Optional[RepeatStoppingReport] = None,
+) -> RankingReport:
+    """
+    RankingReport for the Scoring being assembled. rank_score is None where the formula is undefined, matching
+    rank_order, which ranks such rows last.
+    """
+    row = _row(round_index=round_index, accepted=accepted, effect_sizes=effect_sizes,
+               confidence_intervals=confidence_intervals, novelty=novelty, mechanism=mechanism,
+               repeat_stopping=repeat_stopping)
+    score = row_rank_score(config, row)
+    return RankingReport(config=config, rank_score=score if math.isfinite(score) else None)
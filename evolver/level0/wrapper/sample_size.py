@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from evolver.level0.dsl.execution import SamplingConfig, StratificationConfig
+
+DEFAULT_POWER = 0.8
+_MAX_SAMPLE_SIZE = 1_000_000
+
+
+@dataclass(frozen=True)
+class SampleSizePlan:
+    """Per-stratum sample size for one cohort and the power it achieves for the planned delta."""
+
+    per_bin: int
+    bins: int
+    required_per_bin: int
+    achieved_power: float
+    clamped_by: Optional[str] = None
+
+    @property
+    def sample_size(self) -> int:
+        return min(_MAX_SAMPLE_SIZE, self.per_bin * self.bins)
+
+    def apply_to(self, sampling: SamplingConfig) -> SamplingConfig:
+        """Copy of `sampling` with the planned sample_size."""
+        return sampling.model_copy(update={"sample_size": self.sample_size})
+
+
+def _delta_variance_sum(control_rates: np.ndarray, delta: float) -> float:
+    """Sum over strata of the per-unit variance of a treatment-minus-control difference at the planned delta."""
+    treatment_rates = np.clip(control_rates + delta, 0.0, 1.0)
+    return float(np.sum(control_rates * (1.0 - control_rates) + treatment_rates * (1.0 - treatment_rates)))
+
+
+def plan_sample_size(
+        *,
+        control_rates: Union[float, Sequence[float]],
+        min_delta: float,
+        confidence: float,
+        stratification: StratificationConfig,
+        power: float = DEFAULT_POWER,
+) -> SampleSizePlan:
+    """
+    Smallest per-stratum sample size whose stratified two-sided test at `confidence` detects `min_delta` with
+    `power`.
+
+    `control_rates` is the observed control rate (e.g. notFoundRate), either one rate for all strata or one per
+    stratum. Every stratum gets the same allocation m; the unweighted stratified delta then has variance
+    sum_s v_s / (bins^2 * m), with v_s = p_c(1 - p_c) + p_t(1 - p_t) and p_t = p_c + min_delta, which gives
+    m = (z_alpha/2 + z_power)^2 * sum_s v_s / (bins * min_delta)^2. The result is clamped to
+    min_per_bin/max_per_bin when stratification is enabled (max_per_bin == 0 means no cap), and achieved_power
+    reports the power at the clamped size.
+    """
+    if min_delta <= 0.0:
+        raise ValueError("min_delta must be positive.")
+    if not 0.0 < power < 1.0:
+        raise ValueError("power must be between 0 and 1.")
+    bins = stratification.bins_count if stratification.enabled else 1
+    rates = np.clip(np.asarray(control_rates, dtype=np.float64).reshape(-1), 0.0, 1.0)
+    if rates.size == 1:
+        rates = np.repeat(rates, bins)
+    elif rates.size != bins:
+        raise ValueError(f"Expected 1 or {bins} control rates, got {rates.size}.")
+
+    normal = NormalDist()
+    z_alpha = normal.inv_cdf(0.5 + confidence / 2.0)
+    z_power = normal.inv_cdf(power)
+    variance_sum = max(_delta_variance_sum(rates, min_delta), 1e-12)
+    required = max(1, math.ceil((z_alpha + z_power) ** 2 * variance_sum / (bins * min_delta) ** 2))
+
+    per_bin = required
+    clamped_by = None
+    if stratification.enabled:
+        if per_bin < stratification.min_per_bin:
+            per_bin, clamped_by = stratification.min_per_bin, "min_per_bin"
+        elif stratification.max_per_bin and per_bin > stratification.max_per_bin:
+            per_bin, clamped_by = stratification.max_per_bin, "max_per_bin"
+    per_bin = max(1, min(per_bin, _MAX_SAMPLE_SIZE // bins))
+
+    achieved_power = normal.cdf(bins * min_delta * math.sqrt(per_bin / variance_sum) - z_alpha)
+    return SampleSizePlan(
+        per_bin=per_bin,
+        bins=bins,
+        required_per_bin=required,
+        achieved_power=achieved_power,
+        clamped_by=clamped_by,
+    )
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import math
+from statistics import NormalDist
+from typing import List, Optional, Tuple
+
+from evolver.level0.dsl.execution import EvaluatorRun, SamplingConfig
+from evolver.level0.dsl.scoring import ReproducibilityConfig, RepeatStoppingReport, RepeatStoppingVerdict
+from evolver.level0.wrapper.aggregation import run_metric_counts
+
+STOP_DIRECTION_FLIP = "repeat_direction_flip"
+STOP_VARIANCE_EXCEEDED = "repeat_variance_exceeded"
+STOP_EFFECT_UNREACHABLE = "effect_gate_unreachable"
+STOP_EFFECT_SETTLED = "effect_gate_settled"
+STOP_MAX_REPEATS = "max_repeats"
+CONTINUE_UNDECIDED = "undecided"
+
+
+class SequentialRepeatPlanner:
+    """
+    Deterministic sequential stopping rule for the evaluator repeats of one cohort vs its control.
+
+    After each repeat the rules below are checked in order; the first that fires settles the cohort:
+    1. require_same_direction_all_repeats and the per-repeat deltas are not all of one strict sign -> FAIL.
+    2. The squared deviations of the deltas so far, divided by (planned repeats - 1), already exceed
+       max_allowed_repeat_variance; more repeats can only add to them -> FAIL.
+    3. The upper confidence bound of the mean delta is below min_delta -> FAIL (the effect gate cannot pass).
+    4. At least require_repeats repeats ran, the lower bound is at or above min_delta and the repeat variance is
+       within bounds -> PASS.
+    5. All planned repeats ran -> PASS/FAIL on the point estimate.
+    Bounds use the binomial variance of each repeat's delta and a Bonferroni-adjusted z over the planned looks, so
+    checking after every repeat keeps the configured confidence. With sequential_stopping disabled only rule 5
+    applies and every planned repeat runs.
+    """
+
+    def __init__(
+            self,
+            *,
+            reproducibility: ReproducibilityConfig,
+            sampling: SamplingConfig,
+            min_delta: float,
+            confidence: float,
+    ) -> None:
+        self.reproducibility = reproducibility
+        self.min_delta = min_delta
+        self.repeats_planned = max(sampling.repeats, reproducibility.require_repeats)
+        self.z = NormalDist().inv_cdf(1.0 - (1.0 - confidence) / (2.0 * self.repeats_planned))
+        self.deltas: List[float] = []
+        self._delta_variance_sum = 0.0
+        self._delta_sum = 0.0
+        self._delta_sum_sq = 0.0
+        self._verdict: RepeatStoppingVerdict = "CONTINUE"
+        self._reason = CONTINUE_UNDECIDED
+
+    @property
+    def should_continue(self) -> bool:
+        return self._verdict == "CONTINUE"
+
+    def add_runs(self, treatment_run: EvaluatorRun, control_run: EvaluatorRun,
+                 metric: str = "notFoundRate") -> RepeatStoppingReport:
+        return self.add_repeat(*run_metric_counts(treatment_run, metric), *run_metric_counts(control_run, metric))
+
+    def add_repeat(
+            self,
+            treatment_events: float,
+            treatment_total: float,
+            control_events: float,
+            control_total: float,
+    ) -> RepeatStoppingReport:
+        """Record one completed repeat and return the updated stopping decision."""
+        if not self.should_continue:
+            raise ValueError(f"Cohort already settled ({self._reason}); no further repeats should run.")
+        if treatment_total <= 0 or control_total <= 0:
+            raise ValueError("Each repeat needs non-empty treatment and control runs.")
+        delta = treatment_events / treatment_total - control_events / control_total
+        self.deltas.append(delta)
+        self._delta_sum += delta
+        self._delta_sum_sq += delta * delta
+        self._delta_variance_sum += self._binomial_variance(treatment_events, treatment_total)
+        self._delta_variance_sum += self._binomial_variance(control_events, control_total)
+        self._verdict, self._reason = self._decide()
+        return self.report()
+
+    @staticmethod
+    def _binomial_variance(events: float, total: float) -> float:
+        # +0.5/+1 keeps all-zero or all-one runs from claiming zero variance.
+        rate = (events + 0.5) / (total + 1.0)
+        return rate * (1.0 - rate) / total
+
+    def _squared_deviations(self) -> float:
+        count = len(self.deltas)
+        return max(0.0, self._delta_sum_sq - self._delta_sum * self._delta_sum / count)
+
+    def _bounds(self) -> Tuple[float, float, float]:
+        count = len(self.deltas)
+        mean = self._delta_sum / count
+        half_width = self.z * math.sqrt(self._delta_variance_sum) / count
+        return mean, mean - half_width, mean + half_width
+
+    def _decide(self) -> Tuple[RepeatStoppingVerdict, str]:
+        count = len(self.deltas)
+        reproducibility = self.reproducibility
+        mean, low, high = self._bounds()
+        squared_deviations = self._squared_deviations()
+        variance_ok = count < 2 or squared_deviations / (count - 1) <= reproducibility.max_allowed_repeat_variance
+        # A zero delta has no direction, so it can never satisfy require_same_direction_all_repeats.
+        same_direction = all(delta > 0 for delta in self.deltas) or all(delta < 0 for delta in self.deltas)
+        if reproducibility.sequential_stopping:
+            if reproducibility.require_same_direction_all_repeats and not same_direction:
+                return "FAIL", STOP_DIRECTION_FLIP
+            if self.repeats_planned > 1 and (squared_deviations / (self.repeats_planned - 1)
+                                             > reproducibility.max_allowed_repeat_variance):
+                return "FAIL", STOP_VARIANCE_EXCEEDED
+            if high < self.min_delta:
+                return "FAIL", STOP_EFFECT_UNREACHABLE
+            if count >= reproducibility.require_repeats and low >= self.min_delta and variance_ok:
+                return "PASS", STOP_EFFECT_SETTLED
+        if count >= self.repeats_planned:
+            passed = mean >= self.min_delta and variance_ok and (
+                    same_direction or not reproducibility.require_same_direction_all_repeats)
+            return ("PASS" if passed else "FAIL"), STOP_MAX_REPEATS
+        return "CONTINUE", CONTINUE_UNDECIDED
+
+    def report(self) -> RepeatStoppingReport:
+        count = len(self.deltas)
+        mean: Optional[float] = None
+        low: Optional[float] = None
+        high: Optional[float] = None
+        if count:
+            mean, low, high = self._bounds()
+        return RepeatStoppingReport(
+            verdict=self._verdict,
+            reason=self._reason,
+            stopped_early=not self.should_continue and count < self.repeats_planned,
+            repeats_run=count,
+            repeats_planned=self.repeats_planned,
+            mean_delta=mean,
+            delta_low=low,
+            delta_high=high,
+            repeat_variance=self._squared_deviations() / (count - 1) if count >= 2 else None,
+        )
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+from itertools import repeat
+from typing import Any, Dict, Hashable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from evolver.level0.dsl.scoring import TraceAlignmentConfig, TraceAlignmentReport
+from evolver.level0.wrapper.tracing_index import watch_value_as_float
+from evolver.level0.wrapper.tracing_store import TracingStore
+
+MIN_PAIR_OBSERVATIONS = 3
+
+
+class TraceVariables:
+    """
+    Trace variables extracted per traced record, keyed by the address the record was traced for.
+
+    `keys[i]` is the address key of row i and `values[trace_key][i]` the float value of that watch expression on the
+    same record (NaN when absent or non-numeric).
+    """
+
+    def __init__(self, keys: np.ndarray, values: Dict[str, np.ndarray]) -> None:
+        self.keys = keys
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_store(cls, store: TracingStore, key_expression: str, trace_keys: Sequence[str]) -> TraceVariables:
+        """
+        One row per record that watches `key_expression` (in any watch field); trace keys are read from the same
+        record. Only watch entries of the requested expressions are converted to Python floats.
+        """
+        watch_expression = np.frombuffer(store.watch_expression, dtype=np.int32)
+        watch_start = np.frombuffer(store.watch_start, dtype=np.int32)
+        watch_counts = np.diff(np.append(watch_start, len(watch_expression)))
+        record_of_watch = np.repeat(np.arange(store.record_count, dtype=np.int64), watch_counts)
+
+        def watch_positions(expression: str) -> np.ndarray:
+            expression_id = store.expressions.get_id(expression)
+            if expression_id is None:
+                return np.empty(0, dtype=np.int64)
+            return np.flatnonzero(watch_expression == expression_id)
+
+        key_positions = watch_positions(key_expression)
+        row_records = record_of_watch[key_positions]
+        # A record watching the key in several fields contributes a single row (the first entry wins).
+        row_records, first = np.unique(row_records, return_index=True)
+        key_positions = key_positions[first]
+        keys = np.array([str(store.watch_values[position]) for position in key_positions.tolist()], dtype=object)
+
+        row_of_record = np.full(store.record_count, -1, dtype=np.int64)
+        row_of_record[row_records] = np.arange(len(row_records))
+        values: Dict[str, np.ndarray] = {}
+        for trace_key in dict.fromkeys(trace_keys):
+            column = np.full(len(row_records), np.nan)
+            positions = watch_positions(trace_key)
+            rows = row_of_record[record_of_watch[positions]]
+            in_rows = rows >= 0
+            column[rows[in_rows]] = [watch_value_as_float(store.watch_values[position])
+                                     for position in positions[in_rows].tolist()]
+            values[trace_key] = column
+        return cls(keys, values)
+
+
+def _masked_average_ranks(source: np.ndarray, source_of_row: Sequence[int], mask: np.ndarray) -> np.ndarray:
+    """
+    Average ranks (1-based, ties averaged) of row `source_of_row[i]` of `source` restricted to `mask[i]`; entries
+    outside the mask are NaN.
+
+    Each source row is sorted once and its runs of equal values are found once. An entry's rank within a mask is then
+    the number of kept entries before its run plus half of those in it, read off a running count of kept entries in
+    the shared sorted order, so no output row needs its own sort.
+    """
+    rows, n = mask.shape
+    order = np.argsort(source, axis=1)
+    ordered = np.take_along_axis(source, order, axis=1)
+    starts_run = np.ones(ordered.shape, dtype=bool)
+    starts_run[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    ends_run = np.ones(ordered.shape, dtype=bool)
+    ends_run[:, :-1] = starts_run[:, 1:]
+
+    # Flat positions of each output row's entries in sorted order.
+    flat_order = (order[source_of_row] + np.arange(0, rows * n, n)[:, None]).ravel()
+    kept = mask.ravel().take(flat_order).reshape(rows, n)
+    kept_through = np.cumsum(kept, axis=1, dtype=np.int32)
+    # The running count is non-decreasing, so its value at each run's first / last entry spreads over the whole run
+    # with a forward max / backward min scan.
+    kept_before_run = np.maximum.accumulate(np.where(starts_run[source_of_row], kept_through - kept, 0), axis=1)
+    kept_through_run = np.minimum.accumulate(
+        np.where(ends_run[source_of_row], kept_through, n)[:, ::-1], axis=1)[:, ::-1]
+    ranks = np.empty(rows * n)
+    ranks[flat_order] = np.where(kept, (kept_before_run + kept_through_run + 1) * 0.5, np.nan).ravel()
+    return ranks.reshape(rows, n)
+
+
+def _average_ranks(rows: np.ndarray) -> np.ndarray:
+    """Row-wise average ranks (1-based, ties averaged); NaN entries stay NaN and do not take a rank."""
+    return _masked_average_ranks(rows, range(len(rows)), np.isfinite(rows))
+
+
+def _masked_pearson(x: np.ndarray, y: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise Pearson r over the entries where `mask` is set; returns (r, n). r is NaN for constant rows.
+
+    Uses single-pass sums, so callers pass rows already centred near zero to keep the subtraction well conditioned.
+    """
+    n = np.count_nonzero(mask, axis=1)
+    x = np.where(mask, x, 0.0)
+    y = np.where(mask, y, 0.0)
+    sx = x.sum(axis=1)
+    sy = y.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sxy = np.einsum("ij,ij->i", x, y) - sx * sy / n
+        sxx = np.einsum("ij,ij->i", x, x) - sx * sx / n
+        syy = np.einsum("ij,ij->i", y, y) - sy * sy / n
+        r = sxy / np.sqrt(sxx * syy)
+    return np.clip(r, -1.0, 1.0), n
+
+
+def _two_valued(rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per row: whether the finite values take exactly two distinct values, and those (low, high) values."""
+    valid = np.isfinite(rows)
+    low = np.where(valid, rows, np.inf).min(axis=1, initial=np.inf)
+    high = np.where(valid, rows, -np.inf).max(axis=1, initial=-np.inf)
+    between = valid & (rows != low[:, None]) & (rows != high[:, None])
+    return ~between.any(axis=1) & (low < high), low, high
+
+
+def _group_means(values: np.ndarray, selected: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(selected, values, 0.0).sum(axis=1) / np.count_nonzero(selected, axis=1)
+
+
+def _pair_ranks(source: np.ndarray, source_of_pair: Sequence[int], mask: np.ndarray) -> np.ndarray:
+    """Centred average ranks of each pair's source row restricted to the pair's mask."""
+    ranks = _masked_average_ranks(source, source_of_pair, mask)
+    # Average ranks of m entries always have mean (m + 1) / 2.
+    ranks -= ((np.count_nonzero(mask, axis=1) + 1) * 0.5)[:, None]
+    return ranks
+
+
+def _centre_rows(rows: np.ndarray) -> np.ndarray:
+    """Subtract each row's mean over its finite entries in place; returns the subtracted means."""
+    valid = np.isfinite(rows)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(valid, rows, 0.0).sum(axis=1) / np.count_nonzero(valid, axis=1)
+    means = np.where(np.isfinite(means), means, 0.0)
+    rows -= means[:, None]
+    return means
+
+
+def _optional_float(value: float) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
+
+
+def compute_trace_alignment(
+        config: TraceAlignmentConfig,
+        *,
+        feature_keys: Sequence[Hashable],
+        features: Mapping[str, Sequence[float]],
+        traces: TraceVariables,
+) -> TraceAlignmentReport:
+    """
+    Correlate per-address surrogate features with trace variables for every configured (feature, trace_key) pair.
+
+    Each traced record is joined to the feature row of its address (keys compared as strings); pairs use the rows
+    where both values are finite. All pairs are computed in one batched pass over a (pairs x records) matrix:
+    Pearson and Spearman always, point-biserial plus a group-mean contrast when either side is dichotomous. The gate
+    statistic is the point-biserial correlation for dichotomous pairs and Spearman otherwise; a pair passes when it
+    has at least MIN_PAIR_OBSERVATIONS rows and |statistic| >= min_correlation.
+
+    correlation_stats is keyed by feature, then trace key. Missing features or trace keys yield pairs with n == 0.
+    """
+    pairs = list(dict.fromkeys((feature, trace_key) for feature, trace_key in config.compare_features_to_trace_keys))
+    if not pairs:
+        return TraceAlignmentReport(config=config, correlation_stats={})
+
+    feature_names = list(dict.fromkeys(feature for feature, _ in pairs))
+    trace_names = list(dict.fromkeys(trace_key for _, trace_key in pairs))
+    feature_of_pair = [feature_names.index(feature) for feature, _ in pairs]
+    trace_of_pair = [trace_names.index(trace_key) for _, trace_key in pairs]
+
+    # Rows are joined to their address's feature column; unmatched rows point at the trailing all-NaN column.
+    row_of_key = {str(key): row for row, key in enumerate(feature_keys)}
+    feature_rows = np.fromiter(map(row_of_key.get, map(str, traces.keys), repeat(len(feature_keys))),
+                               dtype=np.int64, count=len(traces.keys))
+    feature_matrix = np.full((len(feature_names), len(feature_keys) + 1), np.nan)
+    for row, feature in enumerate(feature_names):
+        if feature in features:
+            feature_matrix[row, :len(feature_keys)] = np.asarray(features[feature], dtype=np.float64)
+    feature_source = feature_matrix[:, feature_rows]
+    trace_source = np.full((len(trace_names), len(traces.keys)), np.nan)
+    for row, trace_key in enumerate(trace_names):
+        if trace_key in traces.values:
+            trace_source[row] = traces.values[trace_key]
+    feature_offset = _centre_rows(feature_source)
+    trace_offset = _centre_rows(trace_source)
+
+    # (pairs x records) layout keeps every per-pair reduction on a contiguous row.
+    x = feature_source[feature_of_pair]
+    y = trace_source[trace_of_pair]
+    mask = np.isfinite(x) & np.isfinite(y)
+
+    pearson, n = _masked_pearson(x, y, mask)
+    spearman, _ = _masked_pearson(_pair_ranks(feature_source, feature_of_pair, mask),
+                                  _pair_ranks(trace_source, trace_of_pair, mask), mask)
+
+    # A pair is dichotomous when its feature or trace variable is two-valued and both values occur within the
+    # pair's rows; the other side is then contrasted across the two groups (the feature side wins when both are).
+    feature_binary, feature_low, feature_high = _two_valued(feature_source)
+    trace_binary, trace_low, trace_high = _two_valued(trace_source)
+    on_feature = feature_binary[feature_of_pair]
+    candidates = np.flatnonzero(on_feature | trace_binary[trace_of_pair])
+    contrast_on_feature = on_feature[candidates]
+    candidate_features = np.asarray(feature_of_pair)[candidates]
+    candidate_traces = np.asarray(trace_of_pair)[candidates]
+    low = np.where(contrast_on_feature, feature_low[candidate_features], trace_low[candidate_traces])
+    high = np.where(contrast_on_feature, feature_high[candidate_features], trace_high[candidate_traces])
+    split = np.where(contrast_on_feature[:, None], x[candidates], y[candidates])
+    outcome = np.where(contrast_on_feature[:, None], y[candidates], x[candidates])
+    candidate_mask = mask[candidates]
+    mean_low = _group_means(outcome, candidate_mask & (split == low[:, None]))
+    mean_high = _group_means(outcome, candidate_mask & (split == high[:, None]))
+    # Sources were centred for the correlation sums; report contrasts on the original scale.
+    split_offset = np.where(contrast_on_feature, feature_offset[candidate_features], trace_offset[candidate_traces])
+    outcome_offset = np.where(contrast_on_feature, trace_offset[candidate_traces], feature_offset[candidate_features])
+    low += split_offset
+    high += split_offset
+    mean_low += outcome_offset
+    mean_high += outcome_offset
+    dichotomous = np.zeros(len(pairs), dtype=bool)
+    dichotomous[candidates] = np.isfinite(mean_low) & np.isfinite(mean_high)
+    contrast_of_pair = {int(pair_index): slot for slot, pair_index in enumerate(candidates)}
+
+    enough = n >= MIN_PAIR_OBSERVATIONS
+    statistic = np.where(dichotomous, pearson, spearman)
+    passes = enough & np.isfinite(statistic) & (np.abs(statistic) >= config.min_correlation)
+
+    correlation_stats: Dict[str, Dict[str, Any]] = {}
+    for index, (feature, trace_key) in enumerate(pairs):
+        stats: Dict[str, Any] = {
+            "n": int(n[index]),
+            "pearson": None,
+            "spearman": None,
+            "point_biserial": None,
+            "contrast": None,
+            "gate_statistic": "point_biserial" if dichotomous[index] else "spearman",
+            "passes_gate": bool(passes[index]),
+        }
+        if enough[index]:
+            stats["pearson"] = _optional_float(pearson[index])
+            stats["spearman"] = _optional_float(spearman[index])
+            if dichotomous[index]:
+                slot = contrast_of_pair[index]
+                stats["point_biserial"] = stats["pearson"]
+                stats["contrast"] = {
+                    "dichotomous": "feature" if contrast_on_feature[slot] else "trace",
+                    "low": float(low[slot]),
+                    "high": float(high[slot]),
+                    "mean_low": float(mean_low[slot]),
+                    "mean_high": float(mean_high[slot]),
+                    "delta": float(mean_high[slot] - mean_low[slot]),
+                }
+        correlation_stats.setdefault(feature, {})[trace_key] = stats
+    return TraceAlignmentReport(config=config, correlation_stats=correlation_stats)
+
+
+def trace_alignment_passes(report: TraceAlignmentReport) -> bool:
+    """Gate outcome: vacuously true when not required, otherwise every configured pair must pass."""
+    if not report.config.required:
+        return True
+    pair_stats = [stats for by_trace_key in report.correlation_stats.values() for stats in by_trace_key.values()]
+    return bool(pair_stats) and all(stats["passes_gate"] for stats in pair_stats)
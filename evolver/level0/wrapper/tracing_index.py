@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from evolver.level0.dsl.tracing import TracingSession
+from evolver.level0.wrapper.tracing_store import TRACING_PHASES, WATCH_FIELDS, TracingStore
+
+ValuePath = Sequence[Union[str, int]]
+PointPath = Sequence[Tuple[str, int]]
+
+_MISSING = object()
+
+
+def _extract_value_path(value: Any, value_path: ValuePath) -> Any:
+    for step in value_path:
+        if isinstance(value, dict):
+            value = value.get(step, _MISSING) if isinstance(step, str) else _MISSING
+        elif isinstance(value, list) and isinstance(step, int) and -len(value) <= step < len(value):
+            value = value[step]
+        else:
+            return _MISSING
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+def watch_value_as_float(value: Any) -> float:
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+class WatchHits:
+    """Record ids and watch values matched by a TracingWatchIndex query, in record order."""
+
+    def __init__(self, record_ids: array, values: List[Any]) -> None:
+        self.record_ids = record_ids
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.record_ids)
+
+    def as_floats(self) -> array:
+        """Values as a float64 vector (bools as 0/1, numeric strings parsed, anything else NaN)."""
+        return array("d", (watch_value_as_float(value) for value in self.values))
+
+
+class TracingWatchIndex:
+    """
+    Inverted index over tracing watch values, built once per tracing session.
+
+    Maps (point, lineOfCode, watch field, watch expression) to the positions of matching watch entries in the
+    underlying TracingStore, so a query touches only its hits instead of walking every thenTracings tree. Hits can be
+    filtered by record phase and ifCondition, restricted to records nested under a chain of (point, lineOfCode)
+    ancestors, and projected into nested watch values (dict keys / list indexes).
+    """
+
+    def __init__(self, store: TracingStore) -> None:
+        self.store = store
+        self._record_of_watch = array("i", bytes(4 * len(store.watch_values)))
+        self._postings: Dict[Tuple[int, int, int, int], array] = {}
+        for record_index in range(store.record_count):
+            point_id = store.point[record_index]
+            line_of_code = store.line_of_code[record_index]
+            for position in store.watch_range(record_index):
+                self._record_of_watch[position] = record_index
+                key = (point_id, line_of_code, store.watch_kind[position], store.watch_expression[position])
+                postings = self._postings.get(key)
+                if postings is None:
+                    postings = self._postings[key] = array("i")
+                postings.append(position)
+
+    @classmethod
+    def from_session(cls, session: TracingSession) -> TracingWatchIndex:
+        return cls(TracingStore.from_session(session))
+
+    def keys(self) -> List[Tuple[str, int, str, str]]:
+        """All indexed (point, lineOfCode, watch field, expression) keys."""
+        return [
+            (self.store.points.values[point_id], line_of_code, WATCH_FIELDS[watch_kind],
+             self.store.expressions.values[expression_id])
+            for point_id, line_of_code, watch_kind, expression_id in self._postings
+        ]
+
+    def _matches_ancestors(self, record_index: int, ancestors: PointPath) -> bool:
+        parent_index = self.store.parent[record_index]
+        for point, line_of_code in reversed(ancestors):
+            if parent_index < 0:
+                return False
+            if (self.store.points.values[self.store.point[parent_index]] != point
+                    or self.store.line_of_code[parent_index] != line_of_code):
+                return False
+            parent_index = self.store.parent[parent_index]
+        return True
+
+    def lookup(
+            self,
+            point: str,
+            line_of_code: int,
+            expression: str,
+            *,
+            watch_field: str = "watchesBefore",
+            phase: Optional[str] = None,
+            if_condition: Optional[bool] = None,
+            ancestors: Optional[PointPath] = None,
+            value_path: Optional[ValuePath] = None,
+    ) -> WatchHits:
+        """
+        Values of `expression` watched at point:lineOfCode.
+
+        `ancestors` lists the (point, lineOfCode) chain directly enclosing the record, outermost first. Records
+        whose value has no `value_path` are dropped.
+        """
+        store = self.store
+        point_id = store.points.get_id(point)
+        expression_id = store.expressions.get_id(expression)
+        postings = None
+        if point_id is not None and expression_id is not None:
+            postings = self._postings.get((point_id, line_of_code, WATCH_FIELDS.index(watch_field), expression_id))
+        record_ids = array("i")
+        values: List[Any] = []
+        if postings is None:
+            return WatchHits(record_ids, values)
+
+        phase_code = TRACING_PHASES.index(phase) if phase is not None else None
+        for position in postings:
+            record_index = self._record_of_watch[position]
+            if phase_code is not None and store.phase[record_index] != phase_code:
+                continue
+            if if_condition is not None and bool(store.if_condition[record_index]) != if_condition:
+                continue
+            if ancestors and not self._matches_ancestors(record_index, ancestors):
+                continue
+            value = store.watch_values[position]
+            if value_path:
+                value = _extract_value_path(value, value_path)
+                if value is _MISSING:
+                    continue
+            record_ids.append(record_index)
+            values.append(value)
+        return WatchHits(record_ids, values)
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import codecs
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional
+from urllib.parse import quote, urlsplit
+
+import requests
+
+from evolver.level0.dsl.execution import TracingConfig
+from evolver.level0.dsl.tracing import Tracing
+from evolver.level0.wrapper.tracing_store import TracingStore
+
+TRACING_HEADER = "X-TRACING_MDC_KEY"
+DEFAULT_TRACING_BASE_URL = "http://localhost:8080"
+MAX_TRACING_LOG_BYTES = 2 * 1024 * 1024
+_ALLOWED_TRACING_HOSTS = frozenset({"localhost", "127.0.0.1"})
+
+_SKIP_OUTSIDE_STRING = re.compile(r'[^"{}\[\],]+')
+_SKIP_INSIDE_STRING = re.compile(r'[^"\\]+')
+
+
+class JsonArrayScanner:
+    """
+    Splits a streamed top-level JSON array into the source text of its elements.
+
+    Only string/bracket structure is tracked (runs of plain characters are skipped with regexes), so each element is
+    parsed exactly once, by the caller, once it is complete. Consumed text is dropped from the buffer.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._element_start: Optional[int] = None
+        self.finished = False
+
+    def feed(self, text: str) -> List[str]:
+        if self.finished:
+            return []
+        keep_from = self._element_start if self._element_start is not None else self._position
+        self._buffer = self._buffer[keep_from:] + text
+        self._position -= keep_from
+        if self._element_start is not None:
+            self._element_start = 0
+
+        elements: List[str] = []
+        buffer = self._buffer
+        position = self._position
+        length = len(buffer)
+        while position < length:
+            if self._in_string:
+                match = _SKIP_INSIDE_STRING.match(buffer, position)
+                if match:
+                    position = match.end()
+                    continue
+                if buffer[position] == "\\":
+                    if position + 1 >= length:
+                        break
+                    position += 2
+                    continue
+                self._in_string = False
+                position += 1
+                continue
+
+            match = _SKIP_OUTSIDE_STRING.match(buffer, position)
+            if match:
+                if self._depth == 1 and self._element_start is None and match.group().strip():
+                    self._element_start = position + len(match.group()) - len(match.group().lstrip())
+                position = match.end()
+                continue
+
+            char = buffer[position]
+            if self._depth == 0:
+                if char != "[":
+                    raise ValueError(f"Tracing logs must be a JSON array, got {char!r}")
+                self._depth = 1
+            elif char == '"':
+                if self._depth == 1 and self._element_start is None:
+                    self._element_start = position
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 1 and self._element_start is None:
+                    self._element_start = position
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 1:
+                    # Closing bracket of the top-level array.
+                    if self._element_start is not None:
+                        elements.append(buffer[self._element_start:position])
+                        self._element_start = None
+                    self.finished = True
+                    position += 1
+                    break
+                self._depth -= 1
+                if self._depth == 1:
+                    elements.append(buffer[self._element_start:position + 1])
+                    self._element_start = None
+            elif char == "," and self._depth == 1:
+                if self._element_start is not None:
+                    elements.append(buffer[self._element_start:position])
+                    self._element_start = None
+            position += 1
+
+        self._position = position
+        return [element.strip() for element in elements if element.strip()]
+
+
+@dataclass
+class TracingLogIngestion:
+    """Outcome of streaming `/tracing/{tracingId}/logs` into a TracingStore."""
+    store: TracingStore
+    records_ingested: int = 0
+    bytes_read: int = 0
+    truncated: bool = False
+    stop_reason: str = "complete"
+    errors: List[str] = field(default_factory=list)
+
+
+def ingest_tracing_log_chunks(
+        chunks: Iterable[bytes],
+        *,
+        store: Optional[TracingStore] = None,
+        max_records: Optional[int] = None,
+        max_bytes: int = MAX_TRACING_LOG_BYTES,
+) -> TracingLogIngestion:
+    """
+    Validate and append tracing records from a chunked JSON array body, one record at a time.
+
+    Stops (with truncated=True) once `max_bytes` have been read or `max_records` top-level records were ingested;
+    a record cut off by the byte cap is dropped. Invalid records are skipped and reported in `errors`.
+    """
+    result = TracingLogIngestion(store=store if store is not None else TracingStore())
+    if max_records == 0:
+        result.stop_reason = "max_records"
+        return result
+    scanner = JsonArrayScanner()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="strict")
+
+    for chunk in chunks:
+        remaining = max_bytes - result.bytes_read
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+            result.truncated = True
+            result.stop_reason = "max_bytes"
+        result.bytes_read += len(chunk)
+
+        for element_text in scanner.feed(decoder.decode(chunk)):
+            try:
+                tracing = Tracing.model_validate_json(element_text)
+            except ValueError as exc:
+                result.errors.append(str(exc)[:2048])
+                continue
+            result.store.append(tracing)
+            result.records_ingested += 1
+            if max_records is not None and result.records_ingested >= max_records:
+                if not scanner.finished:
+                    result.truncated = True
+                    result.stop_reason = "max_records"
+                return result
+
+        if result.truncated or scanner.finished:
+            return result
+
+    if not scanner.finished:
+        result.truncated = True
+        result.stop_reason = "incomplete_body"
+    return result
+
+
+def _tracing_logs_url(base_url: str, tracing_id: str) -> str:
+    parts = urlsplit(base_url)
+    if parts.scheme != "http" or parts.hostname not in _ALLOWED_TRACING_HOSTS:
+        raise ValueError(f"Tracing API must be served from http://localhost, got: {base_url}")
+    return f"{base_url.rstrip('/')}/tracing/{quote(tracing_id, safe='')}/logs"
+
+
+def _iter_response_chunks(response: requests.Response, *, chunk_size: int, deadline: float) -> Iterator[bytes]:
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if time.monotonic() > deadline:
+            raise TimeoutError("Tracing logs download exceeded its total timeout")
+        if chunk:
+            yield chunk
+
+
+def ingest_tracing_logs(
+        tracing_id: str,
+        *,
+        config: TracingConfig,
+        store: Optional[TracingStore] = None,
+        max_records: Optional[int] = None,
+        base_url: str = DEFAULT_TRACING_BASE_URL,
+        max_bytes: int = MAX_TRACING_LOG_BYTES,
+        connect_timeout_s: float = 5.0,
+        total_timeout_s: float = 600.0,
+        chunk_size: int = 64 * 1024,
+        session: Optional[requests.Session] = None,
+) -> TracingLogIngestion:
+    """
+    Stream `GET /tracing/{tracingId}/logs` into a TracingStore without holding the raw body.
+
+    Follows the tracing skill policy: localhost only, no redirects, connect timeout <= 5s, total timeout <= 600s and a
+    2 MB body cap. At most `max_records` (default: `config.max_tracing_requests`) top-level records are ingested.
+    """
+    url = _tracing_logs_url(base_url, tracing_id)
+    http = session if session is not None else requests.Session()
+    deadline = time.monotonic() + min(total_timeout_s, 600.0)
+    try:
+        with http.get(
+                url,
+                headers={TRACING_HEADER: tracing_id},
+                stream=True,
+                allow_redirects=False,
+                timeout=(min(connect_timeout_s, 5.0), min(total_timeout_s, 600.0)),
+        ) as response:
+            if response.is_redirect:
+                raise ValueError(f"Tracing logs request was redirected ({response.status_code}); redirects are refused")
+            response.raise_for_status()
+            return ingest_tracing_log_chunks(
+                _iter_response_chunks(response, chunk_size=chunk_size, deadline=deadline),
+                store=store,
+                max_records=config.max_tracing_requests if max_records is None else max_records,
+                max_bytes=max_bytes,
+            )
+    finally:
+        if session is None:
+            http.close()
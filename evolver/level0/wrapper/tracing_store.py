@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from evolver.level0.dsl.tracing import BreakPoint, Tracing, TracingSession
+
+TRACING_PHASES = ("CALL", "ERROR")
+WATCH_FIELDS = ("watchesBefore", "watchesAfter", "watchesOnError")
+
+_FLAG_THEN_TRACINGS = 1 << len(WATCH_FIELDS)
+
+
+class StringTable:
+    """Append-only interning table: each distinct string is stored once and referenced by its integer id."""
+
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = len(self.values)
+            self._ids[value] = string_id
+            self.values.append(value)
+        return string_id
+
+    def get_id(self, value: str) -> Optional[int]:
+        return self._ids.get(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class TracingStore:
+    """
+    Array-backed (columnar) alternative to `TracingSession.tracings`.
+
+    Records are flattened in pre-order: `parent` holds the parent record index (-1 for top-level records) and
+    `subtree_end` the index just past each record's `thenTracings` subtree. Points, watch expressions, stack traces and
+    error messages are interned; timestamps, durations, lines, phases and flags are numeric columns. Watch entries are
+    stored contiguously per record (`watch_start`), keyed by `watch_kind` (index into WATCH_FIELDS) and interned
+    expression id, with equal string values shared. `Tracing` objects are only rebuilt when a record is accessed, and
+    `to_json_records()` reproduces `Tracing.model_dump(mode="json")` exactly.
+    """
+
+    def __init__(self) -> None:
+        self.parent = array("i")
+        self.subtree_end = array("i")
+        self.roots = array("i")
+        self.phase = array("b")
+        self.point = array("i")
+        self.line_of_code = array("q")
+        self.if_condition = array("b")
+        self.timestamp_ms = array("q")
+        self.duration_ms = array("q")
+        self.flags = array("b")
+        self.stack_trace = array("i")
+        self.error_message = array("i")
+        self.watch_start = array("i")
+        self.watch_kind = array("b")
+        self.watch_expression = array("i")
+        self.watch_values: List[Any] = []
+
+        self.points = StringTable()
+        self.expressions = StringTable()
+        self.texts = StringTable()
+        self._shared_values: Dict[str, str] = {}
+
+    @classmethod
+    def from_tracings(cls, tracings: Iterable[Tracing]) -> TracingStore:
+        store = cls()
+        store.extend(tracings)
+        return store
+
+    @classmethod
+    def from_session(cls, session: TracingSession) -> TracingStore:
+        return cls.from_tracings(session.tracings)
+
+    @classmethod
+    def from_json_records(cls, records: Iterable[Dict[str, Any]]) -> TracingStore:
+        return cls.from_tracings(Tracing.model_validate(record) for record in records)
+
+    @property
+    def record_count(self) -> int:
+        """Number of records including nested thenTracings."""
+        return len(self.parent)
+
+    def __len__(self) -> int:
+        return len(self.roots)
+
+    def __getitem__(self, root_position: int) -> Tracing:
+        return self.record(self.roots[root_position])
+
+    def __iter__(self) -> Iterator[Tracing]:
+        for record_index in self.roots:
+            yield self.record(record_index)
+
+    def extend(self, tracings: Iterable[Tracing]) -> None:
+        for tracing in tracings:
+            self.append(tracing)
+
+    def append(self, tracing: Tracing) -> int:
+        """Append one top-level tracing (with its nested thenTracings); returns its record index."""
+        root_index = len(self.parent)
+        self.roots.append(root_index)
+        stack: List[tuple] = [(tracing, -1)]
+        while stack:
+            node, parent_index = stack.pop()
+            if node is None:
+                self.subtree_end[parent_index] = len(self.parent)
+                continue
+            record_index = self._append_record(node, parent_index)
+            stack.append((None, record_index))
+            if node.thenTracings:
+                stack.extend((child, record_index) for child in reversed(node.thenTracings))
+        return root_index
+
+    def _append_record(self, tracing: Tracing, parent_index: int) -> int:
+        record_index = len(self.parent)
+        self.parent.append(parent_index)
+        self.subtree_end.append(record_index + 1)
+        self.phase.append(TRACING_PHASES.index(tracing.phase))
+        self.point.append(self.points.intern(tracing.point))
+        self.line_of_code.append(tracing.lineOfCode)
+        self.if_condition.append(1 if tracing.ifCondition else 0)
+        self.timestamp_ms.append(tracing.timestampMs)
+        self.duration_ms.append(tracing.durationMs)
+        self.stack_trace.append(-1 if tracing.stackTrace is None else self.texts.intern(tracing.stackTrace))
+        self.error_message.append(-1 if tracing.errorMessage is None else self.texts.intern(tracing.errorMessage))
+
+        flags = 0
+        self.watch_start.append(len(self.watch_values))
+        for watch_kind, field_name in enumerate(WATCH_FIELDS):
+            watches = getattr(tracing, field_name)
+            if watches is None:
+                continue
+            flags |= 1 << watch_kind
+            for expression, value in watches.items():
+                self.watch_kind.append(watch_kind)
+                self.watch_expression.append(self.expressions.intern(expression))
+                if isinstance(value, str):
+                    value = self._shared_values.setdefault(value, value)
+                self.watch_values.append(value)
+        if tracing.thenTracings is not None:
+            flags |= _FLAG_THEN_TRACINGS
+        self.flags.append(flags)
+        return record_index
+
+    def watch_range(self, record_index: int) -> range:
+        """Positions of a record's watch entries in the watch_* columns."""
+        start = self.watch_start[record_index]
+        end = self.watch_start[record_index + 1] if record_index + 1 < len(self.watch_start) else len(self.watch_values)
+        return range(start, end)
+
+    def children(self, record_index: int) -> List[int]:
+        child_indexes = []
+        child_index = record_index + 1
+        end = self.subtree_end[record_index]
+        while child_index < end:
+            child_indexes.append(child_index)
+            child_index = self.subtree_end[child_index]
+        return child_indexes
+
+    def _record_fields(self, record_index: int) -> Dict[str, Any]:
+        flags = self.flags[record_index]
+        watches: List[Optional[Dict[str, Any]]] = [
+            {} if flags & (1 << watch_kind) else None for watch_kind in range(len(WATCH_FIELDS))
+        ]
+        expressions = self.expressions.values
+        for position in self.watch_range(record_index):
+            watches[self.watch_kind[position]][expressions[self.watch_expression[position]]] = \
+                self.watch_values[position]
+        stack_trace_id = self.stack_trace[record_index]
+        error_message_id = self.error_message[record_index]
+        return {
+            "phase": TRACING_PHASES[self.phase[record_index]],
+            "point": self.points.values[self.point[record_index]],
+            "lineOfCode": self.line_of_code[record_index],
+            "ifCondition": bool(self.if_condition[record_index]),
+            "watchesBefore": watches[0],
+            "watchesAfter": watches[1],
+            "watchesOnError": watches[2],
+            "stackTrace": None if stack_trace_id < 0 else self.texts.values[stack_trace_id],
+            "errorMessage": None if error_message_id < 0 else self.texts.values[error_message_id],
+            "timestampMs": self.timestamp_ms[record_index],
+            "durationMs": self.duration_ms[record_index],
+        }
+
+    def record(self, record_index: int) -> Tracing:
+        """Rebuild the Tracing (with nested thenTracings) stored at a record index."""
+        fields = self._record_fields(record_index)
+        if self.flags[record_index] & _FLAG_THEN_TRACINGS:
+            fields["thenTracings"] = [self.record(child) for child in self.children(record_index)]
+        else:
+            fields["thenTracings"] = None
+        # Values were validated when the record was appended.
+        return Tracing.model_construct(**fields)
+
+    def json_record(self, record_index: int) -> Dict[str, Any]:
+        """Rebuild the JSON shape (`Tracing.model_dump(mode="json")`) of a record without creating models."""
+        fields = self._record_fields(record_index)
+        if self.flags[record_index] & _FLAG_THEN_TRACINGS:
+            fields["thenTracings"] = [self.json_record(child) for child in self.children(record_index)]
+        else:
+            fields["thenTracings"] = None
+        return fields
+
+    def to_json_records(self) -> List[Dict[str, Any]]:
+        return [self.json_record(record_index) for record_index in self.roots]
+
+    def to_tracings(self) -> List[Tracing]:
+        return list(self)
+
+    def to_session(self, tracing_id: str, breakpoints: Optional[List[BreakPoint]] = None) -> TracingSession:
+        return TracingSession(tracing_id=tracing_id, breakpoints=breakpoints or [], tracings=self.to_tracings())
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import re
+from typing import Any
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _normalize_newlines_in_json(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.replace("\r\n", "\n").replace("\r", "\n")
+    if isinstance(value, list):
+        return [_normalize_newlines_in_json(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize_newlines_in_json(v) for k, v in value.items()}
+    return value
+
+
+def _parse_json_text(json_text: str) -> Any:
+    try:
+        return json.loads(json_text)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Invalid JSON: {exc}") from exc
+
+
+def canonicalize_json_text(json_text: str) -> str:
+    parsed = _normalize_newlines_in_json(_parse_json_text(json_text))
+
+    return json.dumps(
+        parsed,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        sort_keys=True,
+        allow_nan=False,
+    )
+
+
+_HASH_FLUSH_CHARS = 64 * 1024
+
+
+def sha256_canonical_json_text(json_text: str) -> str:
+    """
+    Compute sha256(canonicalize_json_text(json_text)) without building the canonical string or a normalized copy.
+
+    The parsed document is walked once and its canonical encoding (sorted keys, compact separators, newline-normalized
+    string values, ensure_ascii=False, no NaN/Infinity) is fed to an incremental sha256 in bounded chunks.
+    """
+    parsed = _parse_json_text(json_text)
+
+    digest = hashlib.sha256()
+    pending: list[str] = []
+    pending_chars = 0
+    encode_string = json.encoder.encode_basestring
+    float_repr = float.__repr__
+    int_repr = int.__repr__
+
+    def write(text: str) -> None:
+        nonlocal pending_chars
+        pending.append(text)
+        pending_chars += len(text)
+        if pending_chars >= _HASH_FLUSH_CHARS:
+            flush()
+
+    def flush() -> None:
+        nonlocal pending_chars
+        digest.update("".join(pending).encode("utf-8"))
+        pending.clear()
+        pending_chars = 0
+
+    def feed(value: Any) -> None:
+        if isinstance(value, str):
+            write(encode_string(value.replace("\r\n", "\n").replace("\r", "\n")))
+        elif value is None:
+            write("null")
+        elif value is True:
+            write("true")
+        elif value is False:
+            write("false")
+        elif isinstance(value, int):
+            write(int_repr(value))
+        elif isinstance(value, float):
+            if value != value or value in (float("inf"), float("-inf")):
+                raise ValueError("Out of range float values are not JSON compliant: " + repr(value))
+            write(float_repr(value))
+        elif isinstance(value, list):
+            write("[")
+            for index, item in enumerate(value):
+                if index:
+                    write(",")
+                feed(item)
+            write("]")
+        elif isinstance(value, dict):
+            write("{")
+            for index, key in enumerate(sorted(value)):
+                if index:
+                    write(",")
+                write(encode_string(key))
+                write(":")
+                feed(value[key])
+            write("}")
+        else:
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    feed(parsed)
+    flush()
+    return digest.hexdigest()
+
+
+_SQL_TOKEN_PATTERN = re.compile(
+    r"""
+      (?P<space>\s+)
+    | (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<string>[Ee]'(?:\\.|[^'\\]|'')*(?:'|\Z)|[BbXxNn]?'(?:[^']|'')*(?:'|\Z))
+    | (?P<dollar>\$(?P<tag>[A-Za-z_][A-Za-z_0-9]*|)\$.*?(?:\$(?P=tag)\$|\Z))
+    | (?P<quoted>"(?:[^"]|"")*(?:"|\Z))
+    | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[Ee][+-]?\d+)?)
+    | (?P<param>\$\d+)
+    | (?P<word>[A-Za-z_][A-Za-z_0-9$]*)
+    | (?P<cast>::)
+    | (?P<punct>[(),\[\].;])
+    | (?P<operator>[+\-*/<>=~!@#%^&|`?]+)
+    | (?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# PostgreSQL only lets a multi-character operator end in + or - when it contains one of these characters.
+_SQL_OPERATOR_SPECIAL_CHARS = frozenset("~!@#%^&|`?")
+
+# Keywords that keep a space before "(" so canonical text stays readable ("IN (1, 2)" but "LOWER(x)").
+_SQL_SPACED_KEYWORDS = frozenset({
+    "ALL", "AND", "ANY", "BETWEEN", "CASE", "ELSE", "EXISTS", "FROM", "ILIKE", "IN", "IS", "LIKE", "NOT", "ON", "OR",
+    "SELECT", "SIMILAR", "SOME", "THEN", "USING", "VALUES", "WHEN", "WHERE",
+})
+
+SqlToken = tuple[str, str]
+
+
+def _split_sql_operator(operator: str) -> list[str]:
+    trailing: list[str] = []
+    while (len(operator) > 1 and operator[-1] in "+-"
+           and not any(char in _SQL_OPERATOR_SPECIAL_CHARS for char in operator)):
+        trailing.append(operator[-1])
+        operator = operator[:-1]
+    return [operator, *reversed(trailing)]
+
+
+def tokenize_sql(sql: str, *, comments: bool = True) -> list[SqlToken]:
+    """
+    (kind, text) tokens of a SQL fragment, whitespace dropped: kind is one of comment, string, dollar, quoted, number,
+    param, word, cast, punct, operator or other. Unquoted words and numbers are upper-cased.
+    """
+    tokens: list[SqlToken] = []
+    for match in _SQL_TOKEN_PATTERN.finditer(sql):
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "space" or (kind == "comment" and not comments):
+            continue
+        if kind in ("word", "number"):
+            tokens.append((kind, text.upper()))
+        elif kind == "string" and text[0] != "'":
+            tokens.append((kind, text[0].upper() + text[1:]))
+        elif kind == "operator":
+            tokens.extend((kind, part) for part in _split_sql_operator(text))
+        else:
+            tokens.append((kind, text))
+    return tokens
+
+
+def _match_sql_parens(tokens: list[SqlToken]) -> tuple[dict[int, int], set[int]]:
+    """Return open->close index pairs and the open indexes whose group has a top-level comma."""
+    matches: dict[int, int] = {}
+    with_comma: set[int] = set()
+    stack: list[int] = []
+    for index, (kind, text) in enumerate(tokens):
+        if kind != "punct":
+            continue
+        if text == "(":
+            stack.append(index)
+        elif text == ")" and stack:
+            matches[stack.pop()] = index
+        elif text == "," and stack:
+            with_comma.add(stack[-1])
+    return matches, with_comma
+
+
+def _drop_redundant_sql_parens(tokens: list[SqlToken]) -> list[SqlToken]:
+    matches, with_comma = _match_sql_parens(tokens)
+    dropped: set[int] = set()
+    for open_index, close_index in matches.items():
+        inner_open = open_index + 1
+        if matches.get(inner_open) == close_index - 1 and inner_open not in with_comma:
+            dropped.update((open_index, close_index))
+    if dropped:
+        tokens = [token for index, token in enumerate(tokens) if index not in dropped]
+
+    while tokens:
+        matches, with_comma = _match_sql_parens(tokens)
+        if matches.get(0) != len(tokens) - 1 or 0 in with_comma:
+            break
+        tokens = tokens[1:-1]
+    return tokens
+
+
+def _sql_needs_space(previous: SqlToken, current: SqlToken) -> bool:
+    previous_kind, previous_text = previous
+    current_kind, current_text = current
+    if current_kind in ("punct", "cast") and current_text != "(":
+        return False
+    if previous_text in ("(", "[", ".", "::"):
+        return False
+    if current_text in ("(", "["):
+        if previous_kind == "quoted":
+            return False
+        if previous_kind == "word":
+            return previous_text in _SQL_SPACED_KEYWORDS
+    return True
+
+
+@functools.lru_cache(maxsize=4096)
+def canonicalize_where_sql(sql: str) -> str:
+    """
+    Canonicalize a SQL WHERE-suffix in a single tokenizer pass.
+
+    Unquoted keywords and identifiers (case-insensitive in PostgreSQL) are upper-cased, string literals, quoted
+    identifiers and dollar-quoted bodies are kept verbatim, comments are dropped, whitespace is re-emitted from fixed
+    spacing rules, and doubled or whole-predicate parentheses are removed unless they hold a comma list (row
+    constructors, IN lists).
+    """
+    tokens = _drop_redundant_sql_parens(tokenize_sql(sql, comments=False))
+    if not tokens:
+        return ""
+
+    parts = [tokens[0][1]]
+    for previous, current in zip(tokens, tokens[1:]):
+        if _sql_needs_space(previous, current):
+            parts.append(" ")
+        parts.append(current[1])
+    return "".join(parts)
+
+
+def compute_signature(mode: str, text: str, *, with_canonical: bool = True) -> tuple[str, str | None]:
+    if mode == "json":
+        if not with_canonical:
+            return sha256_canonical_json_text(text), None
+        canonical = canonicalize_json_text(text)
+    elif mode == "sql":
+        canonical = canonicalize_where_sql(text)
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+    return sha256_hex(canonical.encode("utf-8")), canonical
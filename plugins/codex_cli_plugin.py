@@ -1,14 +1,22 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
+import functools
+import hashlib
 import json
 import os
+import queue
 import re
 import shutil
 import subprocess
 import time
+import threading
 import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Iterable, Tuple
+from typing import IO, Any, Callable, Iterable, Sequence, Tuple
 
 import yaml
 
@@ -18,16 +26,42 @@ _ITERATION_ID_PATTERN = re.compile(
     r"(?im)^(?:ITERATION_ID|__ITERATION_ID__)\s*[:=]\s*(?P<id>[A-Za-z0-9_\-\.]{1,128})\s*$")
 
 
+@functools.lru_cache(maxsize=None)
 def _repo_root() -> Path:
     return Path(__file__).resolve().parent.parent
 
 
+_FileSignature = Tuple[int, int]
+
+_config_cache: dict[Path, Tuple[_FileSignature, dict[str, Any]]] = {}
+_config_cache_lock = threading.Lock()
+
+
+def _file_signature(path: Path) -> _FileSignature:
+    path_stat = path.stat()
+    return path_stat.st_mtime_ns, path_stat.st_size
+
+
 def _load_config() -> dict[str, Any]:
+    """
+    Load config.yaml, re-parsing it only when its mtime or size changed.
+
+    The returned mapping is shared between callers and must be treated as read-only.
+    """
     config_path = _repo_root() / "config.yaml"
+    signature = _file_signature(config_path)
+    with _config_cache_lock:
+        cached = _config_cache.get(config_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
     with config_path.open("r", encoding="utf-8") as f:
         loaded = yaml.safe_load(f)
     if not isinstance(loaded, dict):
         raise ValueError("config.yaml did not parse to a mapping")
+
+    with _config_cache_lock:
+        _config_cache[config_path] = (signature, loaded)
     return loaded
 
 
@@ -57,6 +91,30 @@ def _resolve_working_dir(config: dict[str, Any]) -> Path:
     return working_dir_path
 
 
+_SAFE_ITERATION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_\-\.]{1,128}$")
+
+
+def _resolve_transcript_dir(config: dict[str, Any], iteration_id: str) -> Path | None:
+    codex_config = config.get("codex_cli", {})
+    if not codex_config.get("stream_output", False):
+        return None
+
+    template = codex_config.get("transcript_dir_template", "runs/{iteration_id}/artifacts/codex")
+    if not isinstance(template, str) or not template.strip():
+        raise ValueError("codex_cli.transcript_dir_template must be a non-empty string")
+    if not _SAFE_ITERATION_ID_PATTERN.match(iteration_id):
+        raise ValueError(f"iteration_id is not safe to use in a path: {iteration_id!r}")
+
+    transcript_dir = (_repo_root() / template.format(iteration_id=iteration_id)).resolve()
+    transcript_dir.mkdir(parents=True, exist_ok=True)
+    return transcript_dir
+
+
+def _new_transcript_paths(transcript_dir: Path) -> Tuple[Path, Path]:
+    stem = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    return transcript_dir / f"{stem}.stdout.jsonl", transcript_dir / f"{stem}.stderr.log"
+
+
 def _extract_iteration_id(system_prompt: str, initial_query: str) -> str | None:
     for text in (initial_query, system_prompt):
         match = _ITERATION_ID_PATTERN.search(text)
@@ -88,32 +146,66 @@ def _iter_candidate_texts(event: Any) -> Iterable[str]:
         yield output
 
 
-def _extract_final_json_text(stdout_text: str) -> str:
-    json_events: list[dict[str, Any]] = []
+def _final_json_candidate(event: dict[str, Any]) -> str | None:
+    for candidate in _iter_candidate_texts(event):
+        candidate_stripped = candidate.strip()
+        if not (candidate_stripped.startswith("{") and candidate_stripped.endswith("}")):
+            continue
+        try:
+            parsed_candidate = json.loads(candidate_stripped)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(parsed_candidate, dict):
+            return candidate_stripped
+    return None
 
-    for raw_line in stdout_text.splitlines():
+
+class _FinalJsonTracker:
+    """Consumes `codex exec --json` stdout line by line and keeps only the last final JSON candidate."""
+
+    def __init__(self) -> None:
+        self.final_json_text: str | None = None
+
+    def feed_line(self, raw_line: str) -> None:
         line = raw_line.strip()
         if not line:
-            continue
+            return
         try:
             parsed = json.loads(line)
         except json.JSONDecodeError:
-            continue
-        if isinstance(parsed, dict):
-            json_events.append(parsed)
+            return
+        if not isinstance(parsed, dict):
+            return
+        candidate = _final_json_candidate(parsed)
+        if candidate is not None:
+            self.final_json_text = candidate
 
-    for event in reversed(json_events):
-        for candidate in _iter_candidate_texts(event):
-            candidate_stripped = candidate.strip()
-            if not candidate_stripped:
-                continue
-            try:
-                parsed_candidate = json.loads(candidate_stripped)
-            except json.JSONDecodeError:
-                continue
-            if isinstance(parsed_candidate, dict):
-                return candidate_stripped
 
+class _TextTail:
+    """Bounded tail of a text stream, used for error excerpts when the full transcript is spooled to disk."""
+
+    def __init__(self, max_chars: int) -> None:
+        self._max_chars = max_chars
+        self._chunks: deque[str] = deque()
+        self._size = 0
+
+    def feed_line(self, text: str) -> None:
+        self._chunks.append(text)
+        self._size += len(text)
+        while len(self._chunks) > 1 and self._size - len(self._chunks[0]) >= self._max_chars:
+            self._size -= len(self._chunks.popleft())
+
+    def text(self) -> str:
+        return "".join(self._chunks)[-self._max_chars:]
+
+
+def _extract_final_json_text(stdout_text: str) -> str:
+    tracker = _FinalJsonTracker()
+    for raw_line in stdout_text.splitlines():
+        tracker.feed_line(raw_line)
+
+    if tracker.final_json_text is not None:
+        return tracker.final_json_text
     return stdout_text.strip()
 
 
@@ -180,30 +272,79 @@ def _resolve_prompt_params(
     return resolved
 
 
+_PROMPT_PARAMS_HEADER = "\n---\nPROMPT_PARAMETERS (auto-generated; use these to substitute {PLACEHOLDER} tokens above):\n"
+
+
+def _render_prompt_param_value(value: Any) -> str:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
 def _append_prompt_params_suffix(*, prompt_text: str, required_keys: set[str], resolved_params: dict[str, Any]) -> str:
     if not required_keys:
         return prompt_text
 
-    lines = [
-        "",
-        "---",
-        "PROMPT_PARAMETERS (auto-generated; use these to substitute {PLACEHOLDER} tokens above):",
-    ]
+    lines = [f"{key}={_render_prompt_param_value(resolved_params.get(key))}" for key in sorted(required_keys)]
 
-    for key in sorted(required_keys):
-        value = resolved_params.get(key)
-        if isinstance(value, (dict, list)):
-            rendered_value = json.dumps(value, ensure_ascii=False)
-        else:
-            rendered_value = str(value)
-        lines.append(f"{key}={rendered_value}")
+    return prompt_text.rstrip() + "\n" + _PROMPT_PARAMS_HEADER + "\n".join(lines) + "\n"
 
-    return prompt_text.rstrip() + "\n" + "\n".join(lines) + "\n"
 
+class CompiledPrompt:
+    """
+    Prompt text with its placeholder scan and static segments precomputed.
+
+    render() produces exactly what _append_prompt_params_suffix() would for the same resolved params, but only the
+    parameter values are formatted per call and the last rendered text is reused when they did not change.
+    """
+
+    def __init__(self, prompt_text: str) -> None:
+        self.prompt_text = prompt_text
+        self.placeholders = frozenset(_extract_prompt_placeholders(prompt_text))
+        self._sorted_keys = tuple(sorted(self.placeholders))
+        self._key_prefixes = tuple(f"{key}=" for key in self._sorted_keys)
+        self._head = prompt_text.rstrip() + "\n" + _PROMPT_PARAMS_HEADER if self.placeholders else prompt_text
+        self._last_render: Tuple[Tuple[str, ...], str] | None = None
+
+    def render(self, resolved_params: dict[str, Any]) -> str:
+        if not self.placeholders:
+            return self.prompt_text
+        rendered_values = tuple(_render_prompt_param_value(resolved_params.get(key)) for key in self._sorted_keys)
+        last_render = self._last_render
+        if last_render is not None and last_render[0] == rendered_values:
+            return last_render[1]
+
+        rendered_params = "\n".join(prefix + value for prefix, value in zip(self._key_prefixes, rendered_values))
+        final_text = self._head + rendered_params + "\n"
+        self._last_render = (rendered_values, final_text)
+        return final_text
+
+
+@functools.lru_cache(maxsize=64)
+def compile_prompt(prompt_text: str) -> CompiledPrompt:
+    return CompiledPrompt(prompt_text)
 
-def run(iteration_id: str, prompt_text: str, params: dict[str, Any] | None = None) -> Tuple[str, int]:
-    config = _load_config()
 
+_prompt_file_cache: dict[Path, Tuple[_FileSignature, CompiledPrompt]] = {}
+_prompt_file_cache_lock = threading.Lock()
+
+
+def load_prompt(prompt_path: Path) -> CompiledPrompt:
+    """Read and compile a prompt file, reusing the compiled template until the file's mtime or size changes."""
+    resolved_path = prompt_path.resolve()
+    signature = _file_signature(resolved_path)
+    with _prompt_file_cache_lock:
+        cached = _prompt_file_cache.get(resolved_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    compiled = compile_prompt(resolved_path.read_text(encoding="utf-8"))
+    with _prompt_file_cache_lock:
+        _prompt_file_cache[resolved_path] = (signature, compiled)
+    return compiled
+
+
+def _resolve_codex_command() -> list[str]:
     cmd = ["codex", "exec", "--json"]
     codex_executable = shutil.which(cmd[0])
     if codex_executable is None:
@@ -214,25 +355,572 @@ def run(iteration_id: str, prompt_text: str, params: dict[str, Any] | None = Non
         cmd = ["cmd.exe", "/c", str(codex_executable_path), *cmd[1:]]
     else:
         cmd[0] = str(codex_executable_path)
+    return cmd
+
 
+def _resolve_timeout_seconds(config: dict[str, Any]) -> float:
     timeout_seconds = config.get("codex_cli", {}).get("timeout_seconds")
     if not isinstance(timeout_seconds, (int, float)):
         timeout_seconds = 600
+    return timeout_seconds
 
-    working_dir = _resolve_working_dir(config)
 
-    required_placeholders = _extract_prompt_placeholders(prompt_text)
+def _resolve_max_concurrency(config: dict[str, Any]) -> int:
+    max_concurrency = config.get("codex_cli", {}).get("max_concurrency")
+    if max_concurrency is None:
+        return 1
+    if not isinstance(max_concurrency, int) or isinstance(max_concurrency, bool) or max_concurrency < 1:
+        raise ValueError("codex_cli.max_concurrency must be a positive integer")
+    return max_concurrency
+
+
+def _render_final_prompt(
+        *,
+        config: dict[str, Any],
+        prompt_text: str,
+        params: dict[str, Any] | None,
+) -> Tuple[str, dict[str, Any]]:
+    """Final prompt text plus the resolved values of the placeholders it uses (other params do not affect it)."""
+    compiled_prompt = compile_prompt(prompt_text)
     resolved_params = _resolve_prompt_params(
-        required_keys=required_placeholders,
+        required_keys=set(compiled_prompt.placeholders),
         config=config,
         runtime_params=params,
     )
-    final_prompt_text = _append_prompt_params_suffix(
-        prompt_text=prompt_text,
-        required_keys=required_placeholders,
-        resolved_params=resolved_params,
+    required_params = {key: resolved_params[key] for key in compiled_prompt.placeholders}
+    return compiled_prompt.render(resolved_params), required_params
+
+
+_CODEX_FAILED_ERROR = "codex_cli_failed"
+
+
+def _response_cache_key(final_prompt_text: str, required_params: dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"prompt": final_prompt_text, "params": required_params},
+        ensure_ascii=False,
+        separators=(",", ":"),
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _is_cacheable_final_text(final_text: str) -> bool:
+    try:
+        parsed = json.loads(final_text)
+    except json.JSONDecodeError:
+        return False
+    return isinstance(parsed, dict) and parsed.get("error") != _CODEX_FAILED_ERROR
+
+
+class _ResponseCache:
+    """
+    Content-addressed store of extracted final JSON answers.
+
+    Entries are keyed by sha256 of the final rendered prompt plus the values of its placeholders; note that an
+    auto-generated tracingId is one of them, so replaying such prompts requires passing the same tracingId explicitly.
+    Every successful answer is stored, but entries are only served back when `replay` is enabled. The least recently
+    used entries are evicted once the store exceeds `max_bytes`: the directory is scanned once (ordered by file mtime,
+    which hits refresh) on the first write, after which sizes and recency are tracked in memory.
+    """
+
+    def __init__(self, cache_dir: Path, *, max_bytes: int, replay: bool) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.replay = replay
+        self._entries: OrderedDict[Path, int] | None = None
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> _ResponseCache | None:
+        cache_config = config.get("codex_cli", {}).get("response_cache")
+        if cache_config is None:
+            return None
+        if not isinstance(cache_config, dict):
+            raise ValueError("codex_cli.response_cache must be a mapping")
+        if not cache_config.get("enabled", False):
+            return None
+
+        cache_dir_value = cache_config.get("dir", "runs/codex_cache")
+        if not isinstance(cache_dir_value, str) or not cache_dir_value.strip():
+            raise ValueError("codex_cli.response_cache.dir must be a non-empty string")
+        max_bytes = cache_config.get("max_bytes", 256 * 1024 * 1024)
+        if not isinstance(max_bytes, int) or isinstance(max_bytes, bool) or max_bytes < 0:
+            raise ValueError("codex_cli.response_cache.max_bytes must be a non-negative integer")
+
+        # Shared per settings so the running size total survives across run() calls.
+        cache_dir = (_repo_root() / cache_dir_value).resolve()
+        replay = bool(cache_config.get("replay", False))
+        cache_settings = (cache_dir, max_bytes, replay)
+        with _response_caches_lock:
+            response_cache = _response_caches.get(cache_settings)
+            if response_cache is None:
+                response_cache = cls(cache_dir, max_bytes=max_bytes, replay=replay)
+                _response_caches[cache_settings] = response_cache
+            return response_cache
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        if not self.replay:
+            return None
+        entry_path = self._entry_path(key)
+        try:
+            final_text = entry_path.read_text(encoding="utf-8")
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if self._entries is not None and entry_path in self._entries:
+                self._entries.move_to_end(entry_path)
+        return final_text
+
+    def put(self, key: str, final_text: str) -> None:
+        if not _is_cacheable_final_text(final_text):
+            return
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        entry_bytes = final_text.encode("utf-8")
+        temp_path = entry_path.with_name(f"{entry_path.name}.{uuid.uuid4().hex}.tmp")
+        temp_path.write_bytes(entry_bytes)
+        with self._lock:
+            if self._entries is None:
+                self._load_entries()
+            os.replace(temp_path, entry_path)
+            self._total_bytes += len(entry_bytes) - self._entries.pop(entry_path, 0)
+            self._entries[entry_path] = len(entry_bytes)
+            self._evict()
+
+    def _scan(self) -> list[Tuple[float, int, Path]]:
+        entries = []
+        for entry_path in self.cache_dir.glob("*/*.json"):
+            try:
+                entry_stat = entry_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((entry_stat.st_mtime, entry_stat.st_size, entry_path))
+        return entries
+
+    def _load_entries(self) -> None:
+        self._entries = OrderedDict((entry_path, size) for _, size, entry_path in sorted(self._scan()))
+        self._total_bytes = sum(self._entries.values())
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and self._entries:
+            entry_path, size = self._entries.popitem(last=False)
+            entry_path.unlink(missing_ok=True)
+            self._total_bytes -= size
+
+
+_response_caches: dict[Tuple[Path, int, bool], _ResponseCache] = {}
+_response_caches_lock = threading.Lock()
+
+
+def _timeout_result(timeout_seconds: float, detail: str) -> Tuple[str, int]:
+    stderr_text = f"codex exec timed out after {timeout_seconds}s\n{detail}".strip()
+    return stderr_text, 0
+
+
+def _build_run_result(
+        *,
+        returncode: int,
+        final_text: str,
+        stdout_excerpt: str,
+        stderr_excerpt: str,
+        elapsed_s: float,
+        transcript_paths: Tuple[Path, Path] | None = None,
+) -> Tuple[str, int]:
+    if returncode != 0:
+        error_payload = {
+            "error": _CODEX_FAILED_ERROR,
+            "returncode": returncode,
+            "elapsed_s": elapsed_s,
+            "stderr_excerpt": stderr_excerpt[-4000:],
+            "stdout_excerpt": stdout_excerpt[-4000:],
+        }
+        if transcript_paths is not None:
+            error_payload["stdout_transcript"] = str(transcript_paths[0])
+            error_payload["stderr_transcript"] = str(transcript_paths[1])
+        return json.dumps(error_payload, ensure_ascii=False), 0
+
+    return final_text, 0
+
+
+def _build_captured_run_result(*, returncode: int, stdout_text: str, stderr_text: str, elapsed_s: float) -> Tuple[
+    str, int]:
+    return _build_run_result(
+        returncode=returncode,
+        final_text=_extract_final_json_text(stdout_text),
+        stdout_excerpt=stdout_text,
+        stderr_excerpt=stderr_text,
+        elapsed_s=elapsed_s,
+    )
+
+
+class _StreamedOutput:
+    """Bounded state kept while stdout/stderr are spooled to transcript files."""
+
+    def __init__(self) -> None:
+        self.tracker = _FinalJsonTracker()
+        self.stdout_tail = _TextTail(4000)
+        self.stderr_tail = _TextTail(4000)
+
+    def feed_stdout_line(self, line: str) -> None:
+        self.stdout_tail.feed_line(line)
+        self.tracker.feed_line(line)
+
+    def build_result(self, *, returncode: int, elapsed_s: float, transcript_paths: Tuple[Path, Path]) -> Tuple[
+        str, int]:
+        final_text = self.tracker.final_json_text
+        if final_text is None:
+            final_text = self.stdout_tail.text().strip()
+        return _build_run_result(
+            returncode=returncode,
+            final_text=final_text,
+            stdout_excerpt=self.stdout_tail.text(),
+            stderr_excerpt=self.stderr_tail.text(),
+            elapsed_s=elapsed_s,
+            transcript_paths=transcript_paths,
+        )
+
+
+def _pump_lines(stream: IO[bytes], spool: IO[bytes], on_line: Callable[[str], None]) -> None:
+    with stream:
+        for raw_line in stream:
+            spool.write(raw_line)
+            on_line(raw_line.decode("utf-8", errors="replace"))
+
+
+def _feed_stdin(proc: subprocess.Popen, stdin_text: str | None) -> None:
+    if proc.stdin is None:
+        return
+    try:
+        if stdin_text is not None:
+            proc.stdin.write(stdin_text.encode("utf-8"))
+        proc.stdin.close()
+    except (BrokenPipeError, OSError):
+        pass
+
+
+def _collect_streaming(
+        proc: subprocess.Popen,
+        *,
+        stdin_text: str | None,
+        timeout_seconds: float,
+        transcript_paths: Tuple[Path, Path],
+        started: float,
+) -> Tuple[str, int]:
+    streamed = _StreamedOutput()
+    stdout_path, stderr_path = transcript_paths
+
+    with stdout_path.open("wb") as stdout_spool, stderr_path.open("wb") as stderr_spool:
+        pumps = [
+            threading.Thread(target=_pump_lines, args=(proc.stdout, stdout_spool, streamed.feed_stdout_line)),
+            threading.Thread(target=_pump_lines, args=(proc.stderr, stderr_spool, streamed.stderr_tail.feed_line)),
+        ]
+        for pump in pumps:
+            pump.start()
+        try:
+            _feed_stdin(proc, stdin_text)
+            proc.wait(timeout=timeout_seconds)
+        except subprocess.TimeoutExpired as exc:
+            return _timeout_result(timeout_seconds, f"{exc}\ntranscript: {stdout_path}")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            for pump in pumps:
+                pump.join()
+
+    elapsed_s = time.time() - started
+
+    return streamed.build_result(returncode=proc.returncode, elapsed_s=elapsed_s, transcript_paths=transcript_paths)
+
+
+def _collect_captured(
+        proc: subprocess.Popen,
+        *,
+        stdin_text: str | None,
+        timeout_seconds: float,
+        started: float,
+) -> Tuple[str, int]:
+    stdin_bytes = stdin_text.encode("utf-8") if stdin_text is not None else None
+    try:
+        stdout_bytes, stderr_bytes = proc.communicate(input=stdin_bytes, timeout=timeout_seconds)
+    except subprocess.TimeoutExpired as exc:
+        proc.kill()
+        proc.communicate()
+        return _timeout_result(timeout_seconds, str(exc))
+
+    elapsed_s = time.time() - started
+
+    return _build_captured_run_result(
+        returncode=proc.returncode,
+        stdout_text=stdout_bytes.decode("utf-8", errors="replace"),
+        stderr_text=stderr_bytes.decode("utf-8", errors="replace"),
+        elapsed_s=elapsed_s,
+    )
+
+
+def _run_streaming(
+        *,
+        cmd: list[str],
+        final_prompt_text: str,
+        working_dir: Path,
+        timeout_seconds: float,
+        transcript_paths: Tuple[Path, Path],
+) -> Tuple[str, int]:
+    started = time.time()
+    proc = subprocess.Popen(
+        [*cmd, final_prompt_text],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=os.environ.copy(),
+        cwd=str(working_dir),
+    )
+    return _collect_streaming(
+        proc,
+        stdin_text=None,
+        timeout_seconds=timeout_seconds,
+        transcript_paths=transcript_paths,
+        started=started,
     )
 
+
+class _CodexWorker:
+    """
+    One warm slot of a CodexWorkerPool.
+
+    `codex exec` handles a single prompt per process, so a worker keeps a resolved launch context (executable path and
+    environment snapshot, validated once) plus a standby `codex exec --json -` process that has already started and is
+    blocked reading its prompt from stdin. Each job consumes the standby process and a new one is spawned right away.
+    After `max_jobs` jobs, or after any failed job, the launch context is dropped and re-validated.
+    """
+
+    def __init__(self, working_dir: Path, *, max_jobs: int) -> None:
+        self.working_dir = working_dir
+        self.max_jobs = max_jobs
+        self.jobs_done = 0
+        self._cmd: list[str] | None = None
+        self._env: dict[str, str] | None = None
+        self._standby: subprocess.Popen | None = None
+
+    def is_healthy(self) -> bool:
+        return self._standby is not None and self._standby.poll() is None
+
+    def warm_up(self) -> None:
+        if self._cmd is None or self._env is None:
+            self._cmd = [*_resolve_codex_command(), "-"]
+            self._env = os.environ.copy()
+        if not self.is_healthy():
+            self._discard_standby()
+            self._standby = subprocess.Popen(
+                self._cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=self._env,
+                cwd=str(self.working_dir),
+            )
+
+    def execute(
+            self,
+            final_prompt_text: str,
+            *,
+            timeout_seconds: float,
+            transcript_paths: Tuple[Path, Path] | None,
+    ) -> Tuple[str, int]:
+        self.warm_up()
+        proc = self._standby
+        self._standby = None
+
+        succeeded = False
+        try:
+            started = time.time()
+            if transcript_paths is not None:
+                result = _collect_streaming(
+                    proc,
+                    stdin_text=final_prompt_text,
+                    timeout_seconds=timeout_seconds,
+                    transcript_paths=transcript_paths,
+                    started=started,
+                )
+            else:
+                result = _collect_captured(
+                    proc,
+                    stdin_text=final_prompt_text,
+                    timeout_seconds=timeout_seconds,
+                    started=started,
+                )
+            succeeded = proc.returncode == 0
+        finally:
+            self.jobs_done += 1
+            if not succeeded or self.jobs_done >= self.max_jobs:
+                self.recycle()
+
+        try:
+            self.warm_up()
+        except OSError:
+            # The finished job's result stays valid; the next job re-validates and reports the launch failure.
+            self.recycle()
+        return result
+
+    def recycle(self) -> None:
+        self._discard_standby()
+        self._cmd = None
+        self._env = None
+        self.jobs_done = 0
+
+    def _discard_standby(self) -> None:
+        proc = self._standby
+        self._standby = None
+        if proc is None:
+            return
+        if proc.poll() is None:
+            proc.kill()
+        proc.communicate()
+
+
+class CodexWorkerPool:
+    """
+    Fixed-size pool of warm codex workers bound to one working_dir.
+
+    run() blocks until a worker is free, health-checks it (a dead standby process is replaced before use) and hands
+    it the job. Workers are pre-spawned on construction; close() kills every standby process.
+    """
+
+    def __init__(self, working_dir: Path, *, size: int, max_jobs_per_worker: int) -> None:
+        if size < 1:
+            raise ValueError("worker pool size must be a positive integer")
+        if max_jobs_per_worker < 1:
+            raise ValueError("max_jobs_per_worker must be a positive integer")
+        self.working_dir = working_dir
+        self.size = size
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._workers = [_CodexWorker(working_dir, max_jobs=max_jobs_per_worker) for _ in range(size)]
+        self._idle: queue.SimpleQueue[_CodexWorker] = queue.SimpleQueue()
+        self._closed = False
+        for worker in self._workers:
+            worker.warm_up()
+            self._idle.put(worker)
+
+    def run(
+            self,
+            final_prompt_text: str,
+            *,
+            timeout_seconds: float,
+            transcript_paths: Tuple[Path, Path] | None = None,
+    ) -> Tuple[str, int]:
+        if self._closed:
+            raise RuntimeError("codex worker pool is closed")
+        worker = self._idle.get()
+        try:
+            if not worker.is_healthy():
+                worker.recycle()
+            return worker.execute(final_prompt_text, timeout_seconds=timeout_seconds, transcript_paths=transcript_paths)
+        except BaseException:
+            worker.recycle()
+            raise
+        finally:
+            self._idle.put(worker)
+
+    def close(self) -> None:
+        self._closed = True
+        for worker in self._workers:
+            worker.recycle()
+
+    def __enter__(self) -> CodexWorkerPool:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+_worker_pools: dict[Path, CodexWorkerPool] = {}
+_worker_pools_lock = threading.Lock()
+
+
+def _close_worker_pool(working_dir: Path) -> None:
+    with _worker_pools_lock:
+        pool = _worker_pools.pop(working_dir, None)
+    if pool is not None:
+        pool.close()
+
+
+def _resolve_worker_pool(config: dict[str, Any], working_dir: Path) -> CodexWorkerPool | None:
+    """
+    Return the warm pool for working_dir, or None when codex_cli.worker_pool is absent or disabled.
+
+    The config is re-read on every call: a pool built with a different size or max_jobs_per_worker is closed and
+    replaced, and disabling the pool closes the cached one.
+    """
+    pool_config = config.get("codex_cli", {}).get("worker_pool")
+    if pool_config is not None and not isinstance(pool_config, dict):
+        raise ValueError("codex_cli.worker_pool must be a mapping")
+    if pool_config is None or not pool_config.get("enabled", False):
+        _close_worker_pool(working_dir)
+        return None
+
+    size = pool_config.get("size", 1)
+    max_jobs_per_worker = pool_config.get("max_jobs_per_worker", 20)
+    for name, value in (("size", size), ("max_jobs_per_worker", max_jobs_per_worker)):
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(f"codex_cli.worker_pool.{name} must be a positive integer")
+
+    stale: CodexWorkerPool | None = None
+    with _worker_pools_lock:
+        pool = _worker_pools.get(working_dir)
+        if pool is not None and (pool.size, pool.max_jobs_per_worker) != (size, max_jobs_per_worker):
+            stale, pool = pool, None
+        if pool is None:
+            pool = CodexWorkerPool(working_dir, size=size, max_jobs_per_worker=max_jobs_per_worker)
+            _worker_pools[working_dir] = pool
+    if stale is not None:
+        stale.close()
+    return pool
+
+
+def close_worker_pools() -> None:
+    with _worker_pools_lock:
+        pools = list(_worker_pools.values())
+        _worker_pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_worker_pools)
+
+
+def _run_codex(
+        *,
+        config: dict[str, Any],
+        iteration_id: str,
+        final_prompt_text: str,
+) -> Tuple[str, int]:
+    timeout_seconds = _resolve_timeout_seconds(config)
+    working_dir = _resolve_working_dir(config)
+    transcript_dir = _resolve_transcript_dir(config, iteration_id)
+
+    worker_pool = _resolve_worker_pool(config, working_dir)
+    if worker_pool is not None:
+        return worker_pool.run(
+            final_prompt_text,
+            timeout_seconds=timeout_seconds,
+            transcript_paths=_new_transcript_paths(transcript_dir) if transcript_dir is not None else None,
+        )
+
+    cmd = _resolve_codex_command()
+    if transcript_dir is not None:
+        return _run_streaming(
+            cmd=cmd,
+            final_prompt_text=final_prompt_text,
+            working_dir=working_dir,
+            timeout_seconds=timeout_seconds,
+            transcript_paths=_new_transcript_paths(transcript_dir),
+        )
+
     started = time.time()
     try:
         proc = subprocess.run(
@@ -245,24 +933,268 @@ def run(iteration_id: str, prompt_text: str, params: dict[str, Any] | None = Non
             cwd=str(working_dir),
         )
     except subprocess.TimeoutExpired as exc:
-        stderr_text = f"codex exec timed out after {timeout_seconds}s\n{exc}".strip()
-        return stderr_text, 0
+        return _timeout_result(timeout_seconds, str(exc))
 
     elapsed_s = time.time() - started
 
-    stdout_text = proc.stdout or ""
-    stderr_text = proc.stderr or ""
+    return _build_captured_run_result(
+        returncode=proc.returncode,
+        stdout_text=proc.stdout or "",
+        stderr_text=proc.stderr or "",
+        elapsed_s=elapsed_s,
+    )
 
-    final_text = _extract_final_json_text(stdout_text)
 
-    if proc.returncode != 0:
-        error_payload = {
-            "error": "codex_cli_failed",
-            "returncode": proc.returncode,
-            "elapsed_s": elapsed_s,
-            "stderr_excerpt": stderr_text[-4000:],
-            "stdout_excerpt": stdout_text[-4000:],
-        }
-        return json.dumps(error_payload, ensure_ascii=False), 0
+def run(iteration_id: str, prompt_text: str, params: dict[str, Any] | None = None) -> Tuple[str, int]:
+    config = _load_config()
 
-    return final_text, 0
+    final_prompt_text, required_params = _render_final_prompt(config=config, prompt_text=prompt_text, params=params)
+
+    response_cache = _ResponseCache.from_config(config)
+    if response_cache is not None:
+        cache_key = _response_cache_key(final_prompt_text, required_params)
+        cached_text = response_cache.get(cache_key)
+        if cached_text is not None:
+            return cached_text, 0
+
+    final_text, code = _run_codex(config=config, iteration_id=iteration_id, final_prompt_text=final_prompt_text)
+
+    if response_cache is not None:
+        response_cache.put(cache_key, final_text)
+    return final_text, code
+
+
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class CodexJob:
+    """One prompt submitted to run_many(); fields mirror the run() arguments."""
+    iteration_id: str
+    prompt_text: str
+    params: dict[str, Any] | None = None
+
+
+async def _kill_process(proc: asyncio.subprocess.Process) -> None:
+    if proc.returncode is not None:
+        return
+    try:
+        proc.kill()
+    except ProcessLookupError:
+        return
+    await proc.wait()
+
+
+async def _pump_lines_async(
+        reader: asyncio.StreamReader,
+        spool: IO[bytes],
+        on_line: Callable[[str], None],
+) -> None:
+    pending = bytearray()
+    while True:
+        chunk = await reader.read(_STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        spool.write(chunk)
+        pending += chunk
+        line_end = pending.rfind(b"\n")
+        if line_end < 0:
+            continue
+        for raw_line in bytes(pending[:line_end]).split(b"\n"):
+            on_line(raw_line.decode("utf-8", errors="replace") + "\n")
+        del pending[:line_end + 1]
+    if pending:
+        on_line(bytes(pending).decode("utf-8", errors="replace"))
+
+
+async def _run_job_async(
+        *,
+        final_prompt_text: str,
+        cmd: list[str],
+        working_dir: Path,
+        timeout_seconds: float,
+        env: dict[str, str],
+        semaphore: asyncio.Semaphore,
+        transcript_dir: Path | None,
+) -> Tuple[str, int]:
+    async with semaphore:
+        started = time.time()
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            final_prompt_text,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            cwd=str(working_dir),
+        )
+        try:
+            if transcript_dir is None:
+                stdout_bytes, stderr_bytes = await asyncio.wait_for(proc.communicate(), timeout=timeout_seconds)
+            else:
+                transcript_paths = _new_transcript_paths(transcript_dir)
+                streamed = _StreamedOutput()
+                with transcript_paths[0].open("wb") as stdout_spool, transcript_paths[1].open("wb") as stderr_spool:
+                    await asyncio.wait_for(
+                        asyncio.gather(
+                            _pump_lines_async(proc.stdout, stdout_spool, streamed.feed_stdout_line),
+                            _pump_lines_async(proc.stderr, stderr_spool, streamed.stderr_tail.feed_line),
+                            proc.wait(),
+                        ),
+                        timeout=timeout_seconds,
+                    )
+        except asyncio.TimeoutError:
+            await _kill_process(proc)
+            return _timeout_result(timeout_seconds, f"pid={proc.pid}")
+        except asyncio.CancelledError:
+            await _kill_process(proc)
+            raise
+
+        elapsed_s = time.time() - started
+
+    if transcript_dir is not None:
+        return streamed.build_result(
+            returncode=proc.returncode,
+            elapsed_s=elapsed_s,
+            transcript_paths=transcript_paths,
+        )
+
+    return _build_captured_run_result(
+        returncode=proc.returncode,
+        stdout_text=stdout_bytes.decode("utf-8", errors="replace"),
+        stderr_text=stderr_bytes.decode("utf-8", errors="replace"),
+        elapsed_s=elapsed_s,
+    )
+
+
+async def _run_pooled_job_async(
+        worker_pool: CodexWorkerPool,
+        *,
+        final_prompt_text: str,
+        timeout_seconds: float,
+        semaphore: asyncio.Semaphore,
+        transcript_dir: Path | None,
+) -> Tuple[str, int]:
+    async with semaphore:
+        transcript_paths = _new_transcript_paths(transcript_dir) if transcript_dir is not None else None
+        return await asyncio.get_running_loop().run_in_executor(
+            None,
+            functools.partial(
+                worker_pool.run,
+                final_prompt_text,
+                timeout_seconds=timeout_seconds,
+                transcript_paths=transcript_paths,
+            ),
+        )
+
+
+async def run_many_async(
+        jobs: Sequence[CodexJob],
+        *,
+        max_concurrency: int | None = None,
+        timeout_seconds: float | None = None,
+) -> list[Tuple[str, int]]:
+    """
+    Run several `codex exec --json` processes concurrently.
+
+    At most `max_concurrency` processes (default: codex_cli.max_concurrency) are alive at a time, each job is killed
+    after `timeout_seconds` (default: codex_cli.timeout_seconds), and results are returned in submission order with
+    the same shape as run(). All prompts are rendered before any process is started, so missing parameters fail the
+    whole batch up front, and replayable cache hits never start a process. Cancelling the awaiting task kills every
+    running child process.
+
+    When codex_cli.worker_pool is enabled, jobs are handed to the warm CodexWorkerPool instead (from worker threads,
+    so at most min(max_concurrency, pool size) run at once). A pooled job that is already running is not killed on
+    cancellation; it finishes or hits its own timeout.
+    """
+    config = _load_config()
+
+    rendered_prompts = [
+        _render_final_prompt(config=config, prompt_text=job.prompt_text, params=job.params)
+        for job in jobs
+    ]
+    response_cache = _ResponseCache.from_config(config)
+    cache_keys: list[str] = []
+
+    results: list[Tuple[str, int] | None] = [None] * len(jobs)
+    if response_cache is not None:
+        cache_keys = [
+            _response_cache_key(final_prompt_text, required_params)
+            for final_prompt_text, required_params in rendered_prompts
+        ]
+        for index, cache_key in enumerate(cache_keys):
+            cached_text = response_cache.get(cache_key)
+            if cached_text is not None:
+                results[index] = (cached_text, 0)
+    pending_indexes = [index for index, result in enumerate(results) if result is None]
+    if not pending_indexes:
+        return results
+
+    if timeout_seconds is None:
+        timeout_seconds = _resolve_timeout_seconds(config)
+    if max_concurrency is None:
+        max_concurrency = _resolve_max_concurrency(config)
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be a positive integer")
+    working_dir = _resolve_working_dir(config)
+    # Resolved before any task is scheduled so that a rejected iteration_id cannot leave earlier jobs running.
+    transcript_dirs = [_resolve_transcript_dir(config, jobs[index].iteration_id) for index in pending_indexes]
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    worker_pool = _resolve_worker_pool(config, working_dir)
+    if worker_pool is not None:
+        tasks = [
+            asyncio.ensure_future(
+                _run_pooled_job_async(
+                    worker_pool,
+                    final_prompt_text=rendered_prompts[index][0],
+                    timeout_seconds=timeout_seconds,
+                    semaphore=semaphore,
+                    transcript_dir=transcript_dir,
+                )
+            )
+            for index, transcript_dir in zip(pending_indexes, transcript_dirs)
+        ]
+    else:
+        cmd = _resolve_codex_command()
+        env = os.environ.copy()
+        tasks = [
+            asyncio.ensure_future(
+                _run_job_async(
+                    final_prompt_text=rendered_prompts[index][0],
+                    cmd=cmd,
+                    working_dir=working_dir,
+                    timeout_seconds=timeout_seconds,
+                    env=env,
+                    semaphore=semaphore,
+                    transcript_dir=transcript_dir,
+                )
+            )
+            for index, transcript_dir in zip(pending_indexes, transcript_dirs)
+        ]
+    try:
+        task_results = await asyncio.gather(*tasks)
+    except asyncio.CancelledError:
+        # gather() has already cancelled the jobs; let them kill their processes before propagating.
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    except Exception:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    for index, result in zip(pending_indexes, task_results):
+        results[index] = result
+        if response_cache is not None:
+            response_cache.put(cache_keys[index], result[0])
+    return results
+
+
+def run_many(
+        jobs: Sequence[CodexJob],
+        *,
+        max_concurrency: int | None = None,
+        timeout_seconds: float | None = None,
+) -> list[Tuple[str, int]]:
+    """Blocking wrapper around run_many_async(); KeyboardInterrupt cancels and kills all running jobs."""
+    return asyncio.run(run_many_async(jobs, max_concurrency=max_concurrency, timeout_seconds=timeout_seconds))
@@ -1,11 +1,60 @@
+import asyncio
 import json
+import os
 import shutil
+import stat
+import sys
+import time
 import unittest
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
 
 from plugins import codex_cli_plugin
 
 
+_FAKE_CODEX_SCRIPT = """#!{python}
+import json
+import sys
+import time
+
+prompt = sys.argv[-1]
+if prompt == "-":
+    prompt = sys.stdin.read()
+fields = dict(part.split("=", 1) for part in prompt.split() if "=" in part)
+time.sleep(float(fields.get("SLEEP", "0")))
+print(json.dumps({{"type": "thread.started"}}))
+for index in range(int(fields.get("LINES", "0"))):
+    print(json.dumps({{"type": "item.completed", "text": "progress " + str(index)}}))
+print("stderr noise", file=sys.stderr)
+print(json.dumps({{"type": "item.completed", "text": json.dumps({{"id": fields.get("ID")}})}}))
+sys.exit(int(fields.get("EXIT", "0")))
+"""
+
+
+class FakeCodexMixin:
+    """Puts a fake `codex` executable first on PATH and replaces config.yaml for the duration of a test."""
+
+    def codex_config(self) -> dict:
+        return {"timeout_seconds": 30, "max_concurrency": 2}
+
+    def setUp(self) -> None:
+        super().setUp()
+        if os.name == "nt":
+            self.skipTest("fake codex script requires a POSIX shebang")
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        script_path = Path(temp_dir.name) / "codex"
+        script_path.write_text(_FAKE_CODEX_SCRIPT.format(python=sys.executable), encoding="utf-8")
+        script_path.chmod(script_path.stat().st_mode | stat.S_IEXEC)
+        path_patch = mock.patch.dict(os.environ, {"PATH": temp_dir.name + os.pathsep + os.environ.get("PATH", "")})
+        path_patch.start()
+        self.addCleanup(path_patch.stop)
+        config_patch = mock.patch.object(codex_cli_plugin, "_load_config", return_value={"codex_cli": self.codex_config()})
+        config_patch.start()
+        self.addCleanup(config_patch.stop)
+
+
 class TestCodexCliPlugin(unittest.TestCase):
     def test_extract_prompt_placeholders(self) -> None:
         placeholders = codex_cli_plugin._extract_prompt_placeholders(
@@ -56,6 +105,49 @@ class TestCodexCliPlugin(unittest.TestCase):
         self.assertIn("TRACING_HEADER=X-TRACING_MDC_KEY", final_text)
         self.assertIn("tracingId=abc", final_text)
 
+    def test_compiled_prompt_matches_suffix_rendering(self) -> None:
+        prompt = "Use {TRACING_HEADER} for {tracingId} with {TRACING_PACKAGES}.\n\n"
+        resolved = {"TRACING_HEADER": "X-TRACING_MDC_KEY", "tracingId": "abc", "TRACING_PACKAGES": {"a": ["b"]}}
+
+        compiled = codex_cli_plugin.compile_prompt(prompt)
+
+        self.assertIs(codex_cli_plugin.compile_prompt(prompt), compiled)
+        self.assertEqual(compiled.placeholders, {"TRACING_HEADER", "tracingId", "TRACING_PACKAGES"})
+        self.assertEqual(
+            compiled.render(resolved),
+            codex_cli_plugin._append_prompt_params_suffix(
+                prompt_text=prompt,
+                required_keys=set(compiled.placeholders),
+                resolved_params=resolved,
+            ),
+        )
+        self.assertEqual(codex_cli_plugin.compile_prompt("no placeholders\n").render({}), "no placeholders\n")
+
+    def test_load_prompt_recompiles_when_file_changes(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            prompt_path = Path(temp_dir) / "prompt.md"
+            prompt_path.write_text("first {A}", encoding="utf-8")
+            first = codex_cli_plugin.load_prompt(prompt_path)
+            self.assertIs(codex_cli_plugin.load_prompt(prompt_path), first)
+
+            prompt_path.write_text("second {B} {C}", encoding="utf-8")
+            os.utime(prompt_path, ns=(time.time_ns() + 10 ** 9, time.time_ns() + 10 ** 9))
+
+            self.assertEqual(codex_cli_plugin.load_prompt(prompt_path).placeholders, {"B", "C"})
+
+    def test_load_config_reloads_only_on_change(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "config.yaml"
+            config_path.write_text("codex_cli:\n  timeout_seconds: 5\n", encoding="utf-8")
+            with mock.patch.object(codex_cli_plugin, "_repo_root", return_value=Path(temp_dir)):
+                first = codex_cli_plugin._load_config()
+                self.assertIs(codex_cli_plugin._load_config(), first)
+
+                config_path.write_text("codex_cli:\n  timeout_seconds: 50\n", encoding="utf-8")
+                os.utime(config_path, ns=(time.time_ns() + 10 ** 9, time.time_ns() + 10 ** 9))
+
+                self.assertEqual(codex_cli_plugin._load_config()["codex_cli"]["timeout_seconds"], 50)
+
     def test_extract_final_json_text(self) -> None:
         if shutil.which("codex") is None:
             self.skipTest("'codex' executable not found on PATH")
@@ -71,5 +163,286 @@ class TestCodexCliPlugin(unittest.TestCase):
         self.assertEqual(json.loads(extracted), {"ok": True, "n": 1})
 
 
+class TestCodexCliRunMany(FakeCodexMixin, unittest.TestCase):
+    def test_run_many_preserves_submission_order(self) -> None:
+        jobs = [
+            codex_cli_plugin.CodexJob("it-1", "ID=slow SLEEP=0.4"),
+            codex_cli_plugin.CodexJob("it-1", "ID=fast SLEEP=0"),
+            codex_cli_plugin.CodexJob("it-1", "ID=failed EXIT=3"),
+        ]
+
+        results = codex_cli_plugin.run_many(jobs, max_concurrency=3)
+
+        self.assertEqual(json.loads(results[0][0]), {"id": "slow"})
+        self.assertEqual(json.loads(results[1][0]), {"id": "fast"})
+        self.assertEqual(json.loads(results[2][0])["returncode"], 3)
+
+    def test_run_many_runs_jobs_concurrently(self) -> None:
+        jobs = [codex_cli_plugin.CodexJob("it-1", f"ID={i} SLEEP=0.5") for i in range(4)]
+
+        started = time.monotonic()
+        results = codex_cli_plugin.run_many(jobs, max_concurrency=4)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual([json.loads(text)["id"] for text, _ in results], ["0", "1", "2", "3"])
+        self.assertLess(elapsed, 1.5)
+
+    def test_run_many_enforces_per_job_timeout(self) -> None:
+        jobs = [
+            codex_cli_plugin.CodexJob("it-1", "ID=hung SLEEP=30"),
+            codex_cli_plugin.CodexJob("it-1", "ID=ok"),
+        ]
+
+        results = codex_cli_plugin.run_many(jobs, max_concurrency=2, timeout_seconds=0.5)
+
+        self.assertTrue(results[0][0].startswith("codex exec timed out"))
+        self.assertEqual(json.loads(results[1][0]), {"id": "ok"})
+
+    def test_run_many_async_cancellation_stops_jobs(self) -> None:
+        async def cancel_after_start() -> None:
+            task = asyncio.ensure_future(codex_cli_plugin.run_many_async(
+                [codex_cli_plugin.CodexJob("it-1", f"ID={i} SLEEP=30") for i in range(2)],
+                max_concurrency=2,
+            ))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        started = time.monotonic()
+        asyncio.run(cancel_after_start())
+        self.assertLess(time.monotonic() - started, 5)
+
+
+class TestCodexCliStreaming(FakeCodexMixin, unittest.TestCase):
+    def codex_config(self) -> dict:
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.transcript_root = Path(temp_dir.name)
+        return {
+            "timeout_seconds": 30,
+            "stream_output": True,
+            "transcript_dir_template": str(self.transcript_root / "{iteration_id}"),
+        }
+
+    def test_final_json_tracker_matches_buffered_extraction(self) -> None:
+        stdout_text = "\n".join([
+            json.dumps({"message": {"content": json.dumps({"n": 1})}}),
+            "not json",
+            json.dumps({"text": "plain text"}),
+            json.dumps({"output": json.dumps({"n": 2}), "content": "[1, 2]"}),
+            json.dumps(["list", "event"]),
+        ])
+
+        tracker = codex_cli_plugin._FinalJsonTracker()
+        for line in stdout_text.splitlines():
+            tracker.feed_line(line)
+
+        self.assertEqual(tracker.final_json_text, codex_cli_plugin._extract_final_json_text(stdout_text))
+        self.assertEqual(json.loads(tracker.final_json_text), {"n": 2})
+
+    def test_run_streams_and_spools_transcript(self) -> None:
+        extracted, code = codex_cli_plugin.run("it-stream", "ID=streamed LINES=500")
+
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(extracted), {"id": "streamed"})
+        stdout_transcripts = list((self.transcript_root / "it-stream").glob("*.stdout.jsonl"))
+        self.assertEqual(len(stdout_transcripts), 1)
+        self.assertEqual(len(stdout_transcripts[0].read_text(encoding="utf-8").splitlines()), 502)
+        stderr_transcripts = list((self.transcript_root / "it-stream").glob("*.stderr.log"))
+        self.assertEqual(stderr_transcripts[0].read_text(encoding="utf-8"), "stderr noise\n")
+
+    def test_run_many_streams_failures_with_transcript_paths(self) -> None:
+        results = codex_cli_plugin.run_many([
+            codex_cli_plugin.CodexJob("it-a", "ID=a LINES=50"),
+            codex_cli_plugin.CodexJob("it-b", "ID=b EXIT=2"),
+        ])
+
+        self.assertEqual(json.loads(results[0][0]), {"id": "a"})
+        error_payload = json.loads(results[1][0])
+        self.assertEqual(error_payload["returncode"], 2)
+        self.assertIn("stderr noise", error_payload["stderr_excerpt"])
+        self.assertTrue(Path(error_payload["stdout_transcript"]).exists())
+
+    def test_run_rejects_unsafe_iteration_id(self) -> None:
+        with self.assertRaises(ValueError):
+            codex_cli_plugin.run("../escape", "ID=x")
+
+    def test_run_many_rejects_unsafe_iteration_id_before_starting_jobs(self) -> None:
+        jobs = [
+            codex_cli_plugin.CodexJob("it-a", "ID=a"),
+            codex_cli_plugin.CodexJob("it-b", "ID=b"),
+            codex_cli_plugin.CodexJob("../escape", "ID=c"),
+        ]
+
+        with mock.patch.object(codex_cli_plugin, "_run_job_async", new_callable=mock.AsyncMock) as run_job:
+            with self.assertRaises(ValueError):
+                asyncio.run(codex_cli_plugin.run_many_async(jobs))
+
+        run_job.assert_not_called()
+
+
+class TestCodexCliResponseCache(FakeCodexMixin, unittest.TestCase):
+    def codex_config(self) -> dict:
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache_dir = Path(temp_dir.name)
+        return {
+            "timeout_seconds": 30,
+            "response_cache": {"enabled": True, "dir": str(self.cache_dir), "replay": True, "max_bytes": 1024 * 1024},
+        }
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.addCleanup(codex_cli_plugin._response_caches.clear)
+
+    def test_replay_serves_identical_prompt_without_codex(self) -> None:
+        first, _ = codex_cli_plugin.run("it-1", "ID=cached")
+
+        with mock.patch.object(codex_cli_plugin, "_resolve_codex_command", side_effect=AssertionError("no launch")):
+            replayed, code = codex_cli_plugin.run("it-2", "ID=cached")
+            batch = codex_cli_plugin.run_many([codex_cli_plugin.CodexJob("it-3", "ID=cached")])
+
+        self.assertEqual(code, 0)
+        self.assertEqual(replayed, first)
+        self.assertEqual(batch, [(first, 0)])
+
+    def test_params_are_part_of_the_key(self) -> None:
+        codex_cli_plugin.run("it-1", "ID=cached {MODE}", params={"MODE": "a"})
+
+        with mock.patch.object(codex_cli_plugin, "_resolve_codex_command", side_effect=FileNotFoundError("no codex")):
+            with self.assertRaises(FileNotFoundError):
+                codex_cli_plugin.run("it-1", "ID=cached {MODE}", params={"MODE": "b"})
+
+    def test_cache_is_disabled_unless_enabled(self) -> None:
+        config = {"codex_cli": {"response_cache": {"dir": str(self.cache_dir), "replay": True}}}
+        self.assertIsNone(codex_cli_plugin._ResponseCache.from_config(config))
+
+        with mock.patch.object(codex_cli_plugin, "_load_config", return_value=config), \
+                mock.patch.object(codex_cli_plugin, "_response_cache_key", side_effect=AssertionError("keyed")):
+            text, code = codex_cli_plugin.run("it-1", "ID=uncached")
+
+        self.assertEqual(json.loads(text), {"id": "uncached"})
+        self.assertEqual(list(self.cache_dir.glob("*/*.json")), [])
+
+    def test_key_ignores_params_the_prompt_does_not_use(self) -> None:
+        def cache_key(prompt_params: dict) -> str:
+            config = {"codex_cli": {"prompt_params": prompt_params}}
+            final_prompt_text, required_params = codex_cli_plugin._render_final_prompt(
+                config=config, prompt_text="ID=cached {MODE}", params=None,
+            )
+            return codex_cli_plugin._response_cache_key(final_prompt_text, required_params)
+
+        self.assertEqual(cache_key({"MODE": "a", "OTHER": 1}), cache_key({"MODE": "a", "OTHER": 2}))
+        self.assertNotEqual(cache_key({"MODE": "a"}), cache_key({"MODE": 1}))
+
+    def test_put_scans_the_directory_only_once(self) -> None:
+        cache = codex_cli_plugin._ResponseCache(self.cache_dir, max_bytes=100, replay=True)
+        with mock.patch.object(cache, "_scan", wraps=cache._scan) as scan:
+            for index in range(12):
+                cache.put(f"{index:02d}" + "0" * 62, json.dumps({"v": "x" * 10}))
+
+        self.assertEqual(scan.call_count, 1)
+        self.assertLessEqual(sum(path.stat().st_size for path in self.cache_dir.glob("*/*.json")), 100)
+        self.assertIsNone(cache.get("00" + "0" * 62))
+        self.assertIsNotNone(cache.get("11" + "0" * 62))
+
+    def test_failures_are_not_cached(self) -> None:
+        codex_cli_plugin.run("it-1", "ID=broken EXIT=1")
+
+        self.assertEqual(list(self.cache_dir.glob("*/*.json")), [])
+
+    def test_lru_eviction_keeps_recently_used_entries(self) -> None:
+        cache = codex_cli_plugin._ResponseCache(self.cache_dir, max_bytes=40, replay=True)
+        cache.put("aa" + "0" * 62, json.dumps({"v": "a" * 10}))
+        cache.put("bb" + "0" * 62, json.dumps({"v": "b" * 10}))
+        old_time = time.time() - 60
+        for entry_path in self.cache_dir.glob("*/*.json"):
+            os.utime(entry_path, (old_time, old_time))
+        self.assertIsNotNone(cache.get("aa" + "0" * 62))
+
+        cache.put("cc" + "0" * 62, json.dumps({"v": "c" * 10}))
+
+        self.assertIsNotNone(cache.get("aa" + "0" * 62))
+        self.assertIsNone(cache.get("bb" + "0" * 62))
+        self.assertIsNotNone(cache.get("cc" + "0" * 62))
+
+
+class TestCodexWorkerPool(FakeCodexMixin, unittest.TestCase):
+    def codex_config(self) -> dict:
+        return {"timeout_seconds": 30, "worker_pool": {"enabled": True, "size": 1, "max_jobs_per_worker": 2}}
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.addCleanup(codex_cli_plugin.close_worker_pools)
+        resolve_patch = mock.patch.object(
+            codex_cli_plugin, "_resolve_codex_command", wraps=codex_cli_plugin._resolve_codex_command,
+        )
+        self.resolve_mock = resolve_patch.start()
+        self.addCleanup(resolve_patch.stop)
+
+    def test_run_uses_warm_workers_and_recycles_after_max_jobs(self) -> None:
+        results = [codex_cli_plugin.run("it-1", f"ID=job{i}")[0] for i in range(3)]
+
+        self.assertEqual([json.loads(text)["id"] for text in results], ["job0", "job1", "job2"])
+        self.assertEqual(self.resolve_mock.call_count, 2)
+
+    def test_run_many_routes_jobs_through_the_pool(self) -> None:
+        jobs = [codex_cli_plugin.CodexJob("it-1", f"ID=job{i}") for i in range(3)]
+
+        with mock.patch.object(codex_cli_plugin, "_run_job_async", side_effect=AssertionError("cold launch")):
+            results = codex_cli_plugin.run_many(jobs, max_concurrency=2)
+
+        self.assertEqual([json.loads(text)["id"] for text, _ in results], ["job0", "job1", "job2"])
+        self.assertEqual(self.resolve_mock.call_count, 2)
+
+    def test_pool_is_rebuilt_when_its_config_changes(self) -> None:
+        working_dir = Path.cwd()
+        config = {"codex_cli": self.codex_config()}
+        first = codex_cli_plugin._resolve_worker_pool(config, working_dir)
+        self.assertIs(codex_cli_plugin._resolve_worker_pool(config, working_dir), first)
+
+        config["codex_cli"]["worker_pool"]["size"] = 2
+        resized = codex_cli_plugin._resolve_worker_pool(config, working_dir)
+
+        self.assertIsNot(resized, first)
+        self.assertEqual(resized.size, 2)
+        with self.assertRaises(RuntimeError):
+            first.run("ID=stale", timeout_seconds=30)
+
+        config["codex_cli"]["worker_pool"]["enabled"] = False
+        self.assertIsNone(codex_cli_plugin._resolve_worker_pool(config, working_dir))
+        with self.assertRaises(RuntimeError):
+            resized.run("ID=disabled", timeout_seconds=30)
+
+    def test_failed_job_recycles_worker(self) -> None:
+        with codex_cli_plugin.CodexWorkerPool(Path.cwd(), size=1, max_jobs_per_worker=10) as pool:
+            failed, _ = pool.run("ID=bad EXIT=4", timeout_seconds=30)
+            ok, _ = pool.run("ID=good", timeout_seconds=30)
+
+        self.assertEqual(json.loads(failed)["returncode"], 4)
+        self.assertEqual(json.loads(ok), {"id": "good"})
+        self.assertEqual(self.resolve_mock.call_count, 2)
+
+    def test_dead_standby_process_is_replaced(self) -> None:
+        with codex_cli_plugin.CodexWorkerPool(Path.cwd(), size=2, max_jobs_per_worker=10) as pool:
+            for worker in pool._workers:
+                worker._standby.kill()
+                worker._standby.wait()
+
+            text, code = pool.run("ID=revived", timeout_seconds=30)
+
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(text), {"id": "revived"})
+
+    def test_worker_timeout_kills_job(self) -> None:
+        with codex_cli_plugin.CodexWorkerPool(Path.cwd(), size=1, max_jobs_per_worker=10) as pool:
+            timed_out, _ = pool.run("ID=hung SLEEP=30", timeout_seconds=0.5)
+            ok, _ = pool.run("ID=after", timeout_seconds=30)
+
+        self.assertTrue(timed_out.startswith("codex exec timed out"))
+        self.assertEqual(json.loads(ok), {"id": "after"})
+
+
 if __name__ == "__main__":
     unittest.main()
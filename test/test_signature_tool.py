@@ -0,0 +1,158 @@
+import hashlib
+import io
+import json
+import subprocess
+import sys
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from agents.scripts import signature_tool
+from evolver.signature import canonicalize_json_text, sha256_canonical_json_text
+
+
+class TestSignatureTool(unittest.TestCase):
+    def _single_digest(self, mode: str, text: str) -> str:
+        with TemporaryDirectory() as temp_dir:
+            input_path = Path(temp_dir) / "input.txt"
+            input_path.write_text(text, encoding="utf-8")
+            output = io.StringIO()
+            with redirect_stdout(output):
+                signature_tool.main([mode, "--file", str(input_path)])
+        return output.getvalue().strip()
+
+    def test_streaming_json_digest_matches_canonical_text(self) -> None:
+        documents = [
+            '{"b": [1, 2.5, -0.0, 1e-07, 123456789012345678901234567890], "a": {"z": null, "y": true}}',
+            '{"text": "line1\\r\\nline2\\rline3", "key\\rwith cr": "\\u00e9\\ud83d\\ude00\\t\\u0001\\"\\\\"}',
+            json.dumps({"manifest": [{"sql": "CREATE VIEW v AS SELECT 1;\r\n" * 50, "i": i} for i in range(2000)]}),
+            "[]",
+            '"plain"',
+        ]
+
+        for document in documents:
+            expected = hashlib.sha256(canonicalize_json_text(document).encode("utf-8")).hexdigest()
+            self.assertEqual(sha256_canonical_json_text(document), expected)
+
+    def test_streaming_json_digest_rejects_non_finite_numbers(self) -> None:
+        with self.assertRaises(ValueError):
+            sha256_canonical_json_text('{"x": NaN}')
+
+    def test_where_sql_canonical_form_normalizes_whitespace_case_and_parens(self) -> None:
+        equivalent = [
+            "a.city_id = 7 AND a.street_name = 'Main  St'",
+            "  A.CITY_ID=7\n\tand a.street_name='Main  St'  ",
+            "((a.city_id = 7 AND a.street_name = 'Main  St'))",
+        ]
+
+        canonical_forms = {signature_tool.canonicalize_where_sql(sql) for sql in equivalent}
+
+        self.assertEqual(canonical_forms, {"A.CITY_ID = 7 AND A.STREET_NAME = 'Main  St'"})
+
+    def test_where_sql_canonical_form_preserves_meaningful_text(self) -> None:
+        canonicalize = signature_tool.canonicalize_where_sql
+
+        self.assertNotEqual(canonicalize("a.street_name = 'main st'"), canonicalize("a.street_name = 'MAIN ST'"))
+        self.assertNotEqual(canonicalize('"Name" = 1'), canonicalize('"NAME" = 1'))
+        self.assertEqual(canonicalize("(a.x, a.y) IN ((1, 2))"), "(A.X, A.Y) IN ((1, 2))")
+        self.assertEqual(canonicalize("(a.id = 1) OR (a.id = 2)"), "(A.ID = 1) OR (A.ID = 2)")
+        self.assertEqual(canonicalize("lower (a.name) in('x','y')"), "LOWER(A.NAME) IN ('x', 'y')")
+        self.assertEqual(canonicalize("a.id<-1"), canonicalize("a.id < - 1"))
+
+    def test_where_sql_canonical_form_ignores_comments(self) -> None:
+        canonicalize = signature_tool.canonicalize_where_sql
+
+        self.assertEqual(canonicalize("a.city_id = 7 -- keep downtown only\nAND a.zip = '1'"), "A.CITY_ID = 7 AND A.ZIP = '1'")
+        self.assertEqual(canonicalize("a.city_id = /* downtown */ 7"), canonicalize("a.city_id = 7"))
+        self.assertEqual(canonicalize("a.note = '-- not a comment'"), "A.NOTE = '-- not a comment'")
+
+    def test_signature_index_detects_evaluated_group_sql(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            db_path = str(Path(temp_dir) / "signatures.sqlite")
+            with signature_tool.SignatureIndex(db_path) as index:
+                digest, _ = signature_tool.compute_signature("sql", "a.city_id = 7")
+                self.assertTrue(index.record("sql", digest, "it-1/round-2/q0"))
+                self.assertFalse(index.record("sql", digest, "it-1/round-3/q0"))
+
+            with signature_tool.SignatureIndex(db_path) as index:
+                self.assertEqual(index.lookup_group_sql("(A.CITY_ID=7)"), "it-1/round-2/q0")
+                self.assertIsNone(index.lookup_group_sql("a.city_id = 8"))
+
+    def test_batch_matches_single_invocations_in_input_order(self) -> None:
+        records = [
+            {"id": "theory-1", "mode": "json", "text": '{"b": [1, "x\\r\\ny"], "a": 1}'},
+            {"id": "group-1", "mode": "sql", "text": "a.city_id = 7"},
+            {"id": "bad", "mode": "json", "text": "{not json"},
+        ]
+        lines = [(index, json.dumps(record)) for index, record in enumerate(records)]
+
+        sequential = list(signature_tool.iter_batch_results(lines, workers=1, chunk_size=1))
+        pooled = list(signature_tool.iter_batch_results(lines, workers=2, chunk_size=1))
+
+        self.assertEqual(sequential, pooled)
+        results = [json.loads(line) for line in pooled]
+        self.assertEqual([result["id"] for result in results], ["theory-1", "group-1", "bad"])
+        self.assertEqual(results[0]["sha256"], self._single_digest("json", records[0]["text"]))
+        self.assertEqual(results[1]["sha256"], self._single_digest("sql", records[1]["text"]))
+        self.assertIn("error", results[2])
+
+    def test_batch_cli_reads_jsonl_file(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            input_path = Path(temp_dir) / "records.jsonl"
+            output_path = Path(temp_dir) / "results.jsonl"
+            input_path.write_text(
+                "\n".join(json.dumps({"mode": "sql", "text": f"a.id < {i}"}) for i in range(10)) + "\n\n",
+                encoding="utf-8",
+            )
+
+            signature_tool.main(["batch", "--file", str(input_path), "--out", str(output_path), "--workers", "1"])
+
+            results = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual([result["index"] for result in results], list(range(10)))
+        self.assertEqual(len({result["sha256"] for result in results}), 10)
+
+    def test_script_runs_outside_the_repo_root(self) -> None:
+        script_path = Path(signature_tool.__file__).resolve()
+        with TemporaryDirectory() as temp_dir:
+            completed = subprocess.run(
+                [sys.executable, str(script_path), "sql"],
+                input="(A.CITY_ID=7)", capture_output=True, text=True, check=True, cwd=temp_dir,
+            )
+
+        self.assertEqual(completed.stdout.strip(), self._single_digest("sql", "a.city_id = 7"))
+
+    def test_batch_cli_records_new_signatures_in_bulk(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            input_path = Path(temp_dir) / "records.jsonl"
+            output_path = Path(temp_dir) / "results.jsonl"
+            db_path = str(Path(temp_dir) / "signatures.sqlite")
+            texts = ["a.id = 1", "a.id = 2", "(A.ID = 1)", "a.id = 3"]
+            input_path.write_text(
+                "\n".join(json.dumps({"id": f"q{i}", "mode": "sql", "text": text}) for i, text in enumerate(texts)),
+                encoding="utf-8",
+            )
+            with signature_tool.SignatureIndex(db_path) as index:
+                index.record("sql", self._single_digest("sql", "a.id = 3"), "earlier")
+
+            with mock.patch.object(signature_tool.SignatureIndex, "record",
+                                   side_effect=AssertionError("per-row commit")):
+                signature_tool.main(["batch", "--file", str(input_path), "--out", str(output_path), "--workers", "1",
+                                     "--chunk-size", "2", "--index", db_path, "--record"])
+
+            results = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+            with signature_tool.SignatureIndex(db_path) as index:
+                self.assertEqual(index.lookup_group_sql("a.id = 2"), "q1")
+        self.assertEqual([result["seen"] for result in results], [False, False, True, True])
+        self.assertEqual([result.get("seen_ref") for result in results], [None, None, "q0", "earlier"])
+
+    def test_cli_rejects_invalid_options(self) -> None:
+        for argv in (["batch", "--chunk-size", "0"], ["batch", "--workers", "0"], ["batch", "--record"],
+                     ["json", "--record", "it-1/round-2"], ["sql", "--record", "it-1/round-2"]):
+            with self.subTest(argv=argv), redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                signature_tool.main(argv)
+
+
+if __name__ == "__main__":
+    unittest.main()
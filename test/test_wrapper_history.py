@@ -0,0 +1,296 @@
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Optional
+from unittest import mock
+
+import numpy as np
+
+from evolver.level0.dsl.execution import (
+    Decision,
+    EvaluatorConfig,
+    EvaluatorRun,
+    ExecutionEvidence,
+    Experiment,
+    LoggingConfig,
+    SamplingConfig,
+    StratificationConfig,
+)
+from evolver.level0.dsl.proposal import ProposalResult, Theory, TracingPlan
+from evolver.level0.dsl.scoring import EffectSizeConfig, EffectSizeReport, NoveltyConfig, RankingConfig, Scoring
+from evolver.level0.wrapper.evaluator_cache import EvaluatorRunCache
+from evolver.level0.wrapper import experiment_store
+from evolver.level0.wrapper.experiment_store import EXPERIMENT_STORE_FILENAME, ExperimentStore
+from evolver.level0.wrapper.geo_index import FeatureRegionIndex, geohash_cells, geohash_string
+from evolver.level0.wrapper.novelty import (
+    ReasonFamilyIndex,
+    build_novelty_report,
+    normalize_failure_text,
+    score_reason_novelty,
+)
+from evolver.level0.wrapper.ranking import RankingTable, ranking_report
+
+
+def _evaluator_run(run_id: int, status: str = "COMPLETED") -> EvaluatorRun:
+    return EvaluatorRun(
+        run_id=run_id, status=status, totalCount=100, failedCount=2, foundCount=80, partialFoundCount=3,
+        totalDurationMs=1000, totalBytes=2048, searchDurationMs=800, notFoundCount=15, notFoundRate=0.15,
+    )
+
+
+class TestEvaluatorRunCache(unittest.TestCase):
+    def setUp(self) -> None:
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache = EvaluatorRunCache(Path(temp_dir.name) / "evaluator_cache.sqlite")
+        self.addCleanup(self.cache.close)
+        self.sampling = SamplingConfig(stratification=StratificationConfig())
+        self.evaluator = EvaluatorConfig()
+
+    def test_equivalent_cohorts_share_cached_run(self) -> None:
+        calls = []
+
+        def run_evaluator() -> EvaluatorRun:
+            calls.append(1)
+            return _evaluator_run(len(calls))
+
+        key = dict(evaluator=self.evaluator, sampling=self.sampling, repeat_index=0, split_bin="CA")
+        first = self.cache.get_or_run(run_evaluator, group_sql="a.city_id = 7", **key)
+        second = self.cache.get_or_run(run_evaluator, group_sql="(A.CITY_ID=7)", **key)
+        other_repeat = self.cache.get_or_run(run_evaluator, group_sql="a.city_id = 7", **{**key, "repeat_index": 1})
+        restratified = SamplingConfig(stratification=StratificationConfig(bins_count=8))
+        other_strata = self.cache.get_or_run(run_evaluator, group_sql="a.city_id = 7",
+                                             **{**key, "sampling": restratified})
+
+        self.assertEqual(first, second)
+        self.assertEqual(other_repeat.run_id, 2)
+        self.assertEqual(other_strata.run_id, 3)
+        self.assertEqual(len(calls), 3)
+
+    def test_failed_runs_are_not_cached_and_versions_are_isolated(self) -> None:
+        key = dict(group_sql="a.id < 100", sampling=self.sampling, repeat_index=0, split_bin="CA")
+        self.assertFalse(self.cache.put(_evaluator_run(1, status="FAILED"), evaluator=self.evaluator, **key))
+        self.assertTrue(self.cache.put(_evaluator_run(2), evaluator=self.evaluator, **key))
+
+        new_version = EvaluatorConfig(evaluator_version="v2")
+        self.assertIsNone(self.cache.get(evaluator=new_version, **key))
+        self.assertEqual(self.cache.sync_version(new_version), 1)
+        self.assertIsNone(self.cache.get(evaluator=self.evaluator, **key))
+
+
+class TestReasonFamilyIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.db_path = Path(temp_dir.name) / "reason_families.sqlite"
+        self.index = ReasonFamilyIndex(self.db_path)
+        self.addCleanup(lambda: self.index.close())
+
+    def test_normalization_masks_data_values(self) -> None:
+        self.assertEqual(
+            normalize_failure_text("Street 'Main St' not found for id 1234 (0xDEADBEEF)"),
+            normalize_failure_text("street \"Oak Ave\"   not found for id 98 (0x1f)"),
+        )
+
+    def test_round_novelty_is_relative_to_history(self) -> None:
+        first = self.index.score_round([
+            "Timeout after 3000 ms contacting geocoder shard 4",
+            "Timeout after 2500 ms contacting geocoder shard 9",
+            "House number 12 not found on street 'Elm'",
+        ], experiment_id="exp-1")
+        self.assertEqual(first.new_reason_fraction, 1.0)
+        self.assertEqual(len(first.family_counts), 2)
+        self.assertEqual(first.new_families[0]["count"], 2)
+
+        second = self.index.score_round([
+            "Timeout after 10 ms contacting geocoder shard 1",
+            "Postcode 90210 does not match locality 'Springfield' in the reference dataset",
+            "House number 7 not found on street 'Oak'",
+            "House number 99 not found on street 'Pine'",
+        ], experiment_id="exp-2")
+        self.assertAlmostEqual(second.new_reason_fraction, 0.25)
+        self.assertEqual([family["count"] for family in second.new_families], [1])
+        self.assertEqual(self.index.family_count(), 3)
+
+    def test_rescoring_an_experiment_replaces_its_counts(self) -> None:
+        failures = ["Timeout after 3000 ms contacting geocoder shard 4", "Timeout after 20 ms contacting geocoder shard 1"]
+        first = self.index.score_round(failures, experiment_id="exp-1")
+        again = self.index.score_round(failures, experiment_id="exp-1")
+        [family_id] = first.family_counts
+
+        self.assertEqual(again.family_counts, first.family_counts)
+        self.assertEqual(again.new_reason_fraction, 1.0)
+        self.assertEqual(self.index.failure_count(family_id), 2)
+        self.index.score_round(failures[:1], experiment_id="exp-2")
+        self.index.score_round(failures[:1], experiment_id="exp-1")
+        self.assertEqual(self.index.failure_count(family_id), 2)
+
+    def test_unrecorded_rounds_leave_index_unchanged_and_report_is_built(self) -> None:
+        config = NoveltyConfig(sources=["reason_family_clusters"], min_new_reason_fraction=0.5, top_k_to_report=1)
+        report = score_reason_novelty(self.index, config, ["a b c failure", "x y z other failure"],
+                                      experiment_id="exp-1", record=False)
+        self.assertEqual(report.new_reason_fraction, 1.0)
+        self.assertTrue(report.passes_gate)
+        self.assertEqual(len(report.new_reason_families), 1)
+        self.assertEqual(self.index.family_count(), 0)
+
+        self.index.score_round(["a b c failure"], experiment_id="exp-1")
+        self.index.close()
+        self.index = ReasonFamilyIndex(self.db_path)
+        report = score_reason_novelty(self.index, config, ["a b c failure"], experiment_id="exp-2")
+        self.assertEqual(report.new_reason_fraction, 0.0)
+        self.assertFalse(report.passes_gate)
+
+        regions_config = NoveltyConfig(sources=["reason_family_clusters", "feature_region_bins"])
+        self.assertFalse(score_reason_novelty(self.index, regions_config, ["brand new failure kind here"],
+                                              experiment_id="exp-3").passes_gate)
+
+
+class TestFeatureRegionIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        # Two cities 1 degree apart; addresses 0-5 in city 10, 6-11 in city 11. Ids are stored unordered on purpose.
+        self.address_ids = np.array([5, 4, 3, 2, 1, 0, 11, 10, 9, 8, 7, 6])
+        self.index = FeatureRegionIndex.build(
+            address_ids=self.address_ids,
+            lat=np.r_[np.full(6, 40.0), np.full(6, 41.0)],
+            lon=np.full(12, -74.0),
+            city_ids=np.r_[np.full(6, 10), np.full(6, 11)],
+            stratification=StratificationConfig(bins_count=4),
+            features={"street_len": np.r_[np.arange(6.0), np.arange(6.0)]},
+            feature_bins=2,
+        )
+
+    def test_geohash_matches_reference_encoding(self) -> None:
+        self.assertEqual(geohash_string(geohash_cells(np.array([57.64911]), np.array([10.40744]), 11)[0], 11),
+                         "u4pruydqqvj")
+
+    def test_round_novelty_uses_region_and_strata_history(self) -> None:
+        self.assertEqual(self.index.region_count, 4)
+        evaluated = np.arange(12)
+        first = self.index.score_round(evaluated, np.isin(evaluated, [0, 1]), experiment_id="it-1/1")
+        self.assertEqual(first.new_region_fraction, 1.0)
+        self.assertEqual(first.new_high_failure_strata[0]["stratum"], "city_bin_2")
+
+        second = self.index.score_round(evaluated, np.isin(evaluated, [2, 4, 5, 6]), experiment_id="it-1/2")
+        # Another iteration's round 1 is a different experiment, so nothing is new again.
+        other_iteration = self.index.score_round(evaluated, np.isin(evaluated, [0, 1]), experiment_id="it-2/1")
+        self.assertEqual(other_iteration.new_region_fraction, 0.0)
+        self.assertEqual(self.index.score_round(evaluated, np.isin(evaluated, [0, 1]), experiment_id="it-1/1",
+                                                record=False).new_region_fraction, 1.0)
+        self.assertEqual(second.new_region_fraction, 0.75)
+        self.assertEqual(second.new_strata_fraction, 0.0)
+        self.assertEqual([region["count"] for region in second.new_regions], [2, 1])
+
+        config = NoveltyConfig(sources=["feature_region_bins", "high_failure_strata"])
+        report = build_novelty_report(config, regions=second)
+        self.assertEqual(report.new_region_fraction, 0.75)
+        self.assertFalse(report.passes_gate)
+
+    def test_save_and_load_round_trip(self) -> None:
+        evaluated = np.arange(12)
+        self.index.score_round(evaluated, evaluated < 2, experiment_id="it-1/1")
+        with TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "regions" / "index.npz"
+            self.index.save(path)
+            loaded = FeatureRegionIndex.load(path)
+        np.testing.assert_array_equal(loaded.regions_of(evaluated), self.index.regions_of(evaluated))
+        np.testing.assert_array_equal(loaded.region_first_experiment, self.index.region_first_experiment)
+        self.assertEqual(loaded.experiment_ids, ["it-1/1"])
+        self.assertEqual(loaded.score_round(evaluated, evaluated < 2, experiment_id="it-1/2").new_region_failures, 0)
+        with self.assertRaises(KeyError):
+            loaded.regions_of(np.array([99]))
+
+
+RANKING = RankingConfig(rank_score_formula="delta * 100", tie_breakers=["-round_index"], rounding_decimals=1)
+
+
+def _experiment(round_index: int, delta: Optional[float], status: str = "ACCEPTED") -> Experiment:
+    effect = EffectSizeReport(config=EffectSizeConfig(metric="notFoundRate"), delta=delta, repeat_runs_used=3)
+    score = Scoring(
+        effect_sizes=[effect],
+        ranking=ranking_report(RANKING, round_index=round_index, accepted=status == "ACCEPTED",
+                               effect_sizes=[effect]),
+    )
+    return Experiment(
+        round_index=round_index,
+        iteration_id="it-1",
+        proposal=ProposalResult(theory=Theory(name="theory", dsl={}), tracing_plan=TracingPlan(name="plan")),
+        decision=Decision(status=status, is_ready=False, primary_reason="r",
+                          evidence=ExecutionEvidence(evaluator_runs={"round": round_index}), score=score),
+        best_index=None,
+    )
+
+
+class TestExperimentStore(unittest.TestCase):
+    def test_best_is_maintained_and_evidence_loads_lazily(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            logging = LoggingConfig(artifact_dir_template=temp_dir + "/runs/{iteration_id}/artifacts")
+            with ExperimentStore.for_iteration(logging, "it-1", ranking=RANKING) as store:
+                self.assertIsNone(store.best_index)
+                store.append(_experiment(1, 0.10))
+                store.append(_experiment(2, 0.30, status="REJECTED"))
+                store.append(_experiment(3, 0.104))
+                store.append(_experiment(4, 0.20))
+                store.append(_experiment(5, 0.2004))
+                # Rounded to one decimal, rounds 4 and 5 tie and the earlier round wins.
+                self.assertEqual(store.best_index, 4)
+                self.assertEqual(store.evidence(2).evaluator_runs, {"round": 3})
+
+            self.assertTrue((Path(temp_dir) / "runs" / "it-1" / "artifacts" / "experiments.sqlite").exists())
+            with ExperimentStore.for_iteration(logging, "it-1", ranking=RANKING) as reopened:
+                self.assertEqual(len(reopened), 5)
+                self.assertEqual(reopened.best_index, 4)
+                best = reopened.load_best()
+                self.assertEqual(best.decision.score.effect_sizes[0].delta, 0.20)
+                self.assertEqual(best.decision.evidence.evaluator_runs, {"round": 4})
+                with self.assertRaises(IndexError):
+                    reopened.evidence(7)
+
+    def test_reopening_with_another_ranking_recomputes_rank_keys(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / EXPERIMENT_STORE_FILENAME
+            with ExperimentStore(db_path, ranking=RANKING) as store:
+                for round_index, delta in ((1, 0.10), (2, 0.30), (3, 0.20)):
+                    store.append(_experiment(round_index, delta))
+                self.assertEqual(store.best_index, 2)
+
+            lowest_delta = RANKING.model_copy(update={"rank_score_formula": "-delta * 100"})
+            with ExperimentStore(db_path, ranking=lowest_delta) as reopened:
+                self.assertEqual(reopened.best_index, 1)
+            with ExperimentStore(db_path, ranking=RANKING) as reopened:
+                self.assertEqual(reopened.best_index, 2)
+
+    def test_best_matches_rank_order_over_the_whole_history(self) -> None:
+        histories = [
+            [(None, "ACCEPTED"), (0.10, "ACCEPTED"), (0.30, "REJECTED"), (0.20, "ACCEPTED"), (0.2004, "ACCEPTED")],
+            [(None, "ACCEPTED"), (None, "ACCEPTED")],
+            [(0.10, "REJECTED")],
+        ]
+        for history in histories:
+            experiments = [_experiment(round_index, delta, status)
+                           for round_index, (delta, status) in enumerate(history, start=1)]
+            with self.subTest(history=history), TemporaryDirectory() as temp_dir:
+                with ExperimentStore(Path(temp_dir) / EXPERIMENT_STORE_FILENAME, ranking=RANKING) as store:
+                    for experiment in experiments:
+                        store.append(experiment)
+                    self.assertEqual(store.best_index,
+                                     RankingTable.from_experiments(experiments).best_round_index(RANKING))
+
+    def test_for_iteration_resolves_relative_templates_against_the_repo_root(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            repo_root = Path(temp_dir) / "repo"
+            elsewhere = Path(temp_dir) / "elsewhere"
+            elsewhere.mkdir()
+            self.addCleanup(os.chdir, os.getcwd())
+            os.chdir(elsewhere)
+            with mock.patch.object(experiment_store, "_REPO_ROOT", repo_root):
+                with ExperimentStore.for_iteration(LoggingConfig(), "it-1", ranking=RANKING) as store:
+                    store.append(_experiment(1, 0.10))
+
+            self.assertTrue((repo_root / "runs" / "it-1" / "artifacts" / EXPERIMENT_STORE_FILENAME).exists())
+            self.assertFalse((elsewhere / "runs").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,597 @@
+import statistics
+import unittest
+
+import numpy as np
+
+from evolver.level0.dsl.proposal import QueryDefinition, Theory
+from evolver.level0.dsl.scoring import (
+    ComplexityPenaltyConfig,
+    ComplexityPenaltyReport,
+    ConfidenceIntervalConfig,
+    EffectSizeConfig,
+    EffectSizeReport,
+    RankingConfig,
+    ReproducibilityConfig,
+    Scoring,
+    TraceAlignmentConfig,
+)
+from evolver.level0.dsl.execution import (
+    AcceptanceConfig,
+    Decision,
+    EvaluatorRun,
+    ExecutionEvidence,
+    SamplingConfig,
+    StratificationConfig,
+)
+from evolver.level0.wrapper.acceptance import AcceptanceGate, acceptance_gates, evaluate_gates
+from evolver.level0.wrapper.aggregation import EffectAccumulator, EffectAggregator
+from evolver.level0.wrapper.bootstrap import StratifiedOutcomes, bootstrap_confidence_intervals, bootstrap_means
+from evolver.level0.wrapper.complexity import analyze_theory, complexity_report, sql_shape
+from evolver.level0.wrapper.effect_sizes import EffectCounts, compute_effect_sizes
+from evolver.level0.wrapper.ranking import RankingTable, ranking_report
+from evolver.level0.wrapper.sample_size import plan_sample_size
+from evolver.level0.wrapper.sequential import SequentialRepeatPlanner
+from evolver.level0.wrapper.trace_alignment import (
+    TraceVariables,
+    _average_ranks,
+    compute_trace_alignment,
+    trace_alignment_passes,
+)
+from evolver.level0.wrapper.tracing_store import TracingStore
+from evolver.signature import tokenize_sql
+
+
+def _trace_record(address_id: int, **watches) -> dict:
+    return {
+        "phase": "CALL", "point": "net.osmand.search.SearchUICore", "lineOfCode": 660, "ifCondition": True,
+        "watchesBefore": {"address_id": str(address_id), **watches}, "watchesAfter": None, "watchesOnError": None,
+        "stackTrace": None, "errorMessage": None, "timestampMs": 0, "durationMs": 0, "thenTracings": None,
+    }
+
+
+class TestTraceAlignment(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(7)
+        self.feature_keys = list(range(200))
+        self.features = {
+            "df_head": rng.normal(size=200),
+            "is_rural": (rng.random(200) < 0.4).astype(float),
+        }
+        record_addresses = rng.integers(0, 200, size=1000)
+        self.x_df_head = self.features["df_head"][record_addresses]
+        self.x_rural = self.features["is_rural"][record_addresses]
+        candidates = np.round(np.exp(self.x_df_head) + rng.normal(scale=0.3, size=1000), 1)
+        candidates[::10] = np.nan
+        self.candidates = candidates
+        self.traces = TraceVariables(record_addresses.astype(str).astype(object), {
+            "candidate_streets_count": candidates,
+            "noise": rng.normal(size=1000),
+        })
+
+    def test_matches_reference_correlations(self) -> None:
+        config = TraceAlignmentConfig(min_correlation=0.3, compare_features_to_trace_keys=[
+            ("df_head", "candidate_streets_count"), ("is_rural", "candidate_streets_count"), ("df_head", "noise"),
+        ])
+
+        report = compute_trace_alignment(config, feature_keys=self.feature_keys, features=self.features,
+                                         traces=self.traces)
+
+        valid = np.isfinite(self.candidates)
+        x, y = self.x_df_head[valid], self.candidates[valid]
+        ranks = _average_ranks(np.stack([x, y]))
+        monotone = report.correlation_stats["df_head"]["candidate_streets_count"]
+        self.assertEqual(monotone["n"], int(valid.sum()))
+        self.assertAlmostEqual(monotone["pearson"], np.corrcoef(x, y)[0, 1])
+        self.assertAlmostEqual(monotone["spearman"], np.corrcoef(ranks[0], ranks[1])[0, 1])
+        self.assertEqual(monotone["gate_statistic"], "spearman")
+        self.assertTrue(monotone["passes_gate"])
+
+        binary = report.correlation_stats["is_rural"]["candidate_streets_count"]
+        rural = self.x_rural[valid]
+        self.assertAlmostEqual(binary["point_biserial"], np.corrcoef(rural, y)[0, 1])
+        self.assertAlmostEqual(binary["contrast"]["delta"], y[rural == 1].mean() - y[rural == 0].mean())
+        self.assertEqual(binary["gate_statistic"], "point_biserial")
+
+        self.assertFalse(report.correlation_stats["df_head"]["noise"]["passes_gate"])
+        self.assertFalse(trace_alignment_passes(report))
+        self.assertTrue(trace_alignment_passes(report.model_copy(update={
+            "config": config.model_copy(update={"required": False})})))
+
+    def test_average_ranks_average_ties_and_skip_nan(self) -> None:
+        ranks = _average_ranks(np.array([[3.0, 1.0, np.nan, 1.0, 2.0], [5.0, 5.0, 5.0, 1.0, 0.0]]))
+
+        np.testing.assert_array_equal(ranks, [[4.0, 1.5, np.nan, 1.5, 3.0], [4.0, 4.0, 4.0, 2.0, 1.0]])
+
+    def test_missing_inputs_and_store_extraction(self) -> None:
+        store = TracingStore.from_json_records([
+            _trace_record(1, candidate_streets_count=2),
+            _trace_record(2, candidate_streets_count="4"),
+            _trace_record(3, candidate_streets_count="n/a"),
+            _trace_record(4, candidate_streets_count=8),
+        ])
+        traces = TraceVariables.from_store(store, "address_id", ["candidate_streets_count"])
+        config = TraceAlignmentConfig(compare_features_to_trace_keys=[
+            ("df_head", "candidate_streets_count"), ("unknown", "candidate_streets_count"), ("df_head", "missing"),
+        ])
+
+        report = compute_trace_alignment(config, feature_keys=[1, 2, 3, 4], features={"df_head": [1.0, 2.0, 3.0, 5.0]},
+                                         traces=traces)
+
+        self.assertEqual(list(traces.keys), ["1", "2", "3", "4"])
+        self.assertEqual(report.correlation_stats["df_head"]["candidate_streets_count"]["n"], 3)
+        self.assertAlmostEqual(report.correlation_stats["df_head"]["candidate_streets_count"]["spearman"], 1.0)
+        self.assertEqual(report.correlation_stats["unknown"]["candidate_streets_count"]["n"], 0)
+        self.assertIsNone(report.correlation_stats["df_head"]["missing"]["pearson"])
+        self.assertFalse(report.correlation_stats["df_head"]["missing"]["passes_gate"])
+
+
+def _effect_size_report(metric: str, effect_type: str = "difference_of_proportions") -> EffectSizeReport:
+    return EffectSizeReport(config=EffectSizeConfig(metric=metric, type=effect_type), repeat_runs_used=3)
+
+
+class TestBootstrapConfidenceIntervals(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(3)
+        treatment_strata = rng.integers(0, 8, size=400)
+        control_strata = rng.integers(0, 8, size=400)
+        self.outcomes = {
+            "notFoundRate": StratifiedOutcomes(
+                (rng.random(400) < 0.35).astype(float), treatment_strata,
+                (rng.random(400) < 0.15).astype(float), control_strata,
+            ),
+            "meanSearchMs": StratifiedOutcomes(
+                rng.gamma(2.0, 50.0, size=400), treatment_strata, rng.gamma(2.0, 50.0, size=400), control_strata,
+            ),
+        }
+        self.effect_sizes = [
+            _effect_size_report("notFoundRate"),
+            _effect_size_report("notFoundRate", "log_odds_ratio"),
+            _effect_size_report("meanSearchMs", "ratio_of_means"),
+        ]
+
+    def test_intervals_bracket_point_estimates_and_ignore_worker_count(self) -> None:
+        config = ConfidenceIntervalConfig(resamples=3000)
+
+        serial = bootstrap_confidence_intervals(self.effect_sizes, self.outcomes, config, chunk_size=500)
+        sharded = bootstrap_confidence_intervals(self.effect_sizes, self.outcomes, config, chunk_size=500, workers=2)
+        reordered = bootstrap_confidence_intervals(self.effect_sizes[::-1], self.outcomes, config, chunk_size=500)
+
+        self.assertEqual([(r.low, r.high) for r in serial], [(r.low, r.high) for r in sharded])
+        self.assertEqual([(r.low, r.high) for r in serial], [(r.low, r.high) for r in reordered[::-1]])
+        rates = self.outcomes["notFoundRate"]
+        delta = rates.treatment.mean() - rates.control.mean()
+        self.assertLess(serial[0].low, delta)
+        self.assertGreater(serial[0].high, delta)
+        self.assertGreater(serial[0].low, 0.0)
+        self.assertLess(serial[2].low, 1.0)
+        self.assertGreater(serial[2].high, 1.0)
+
+    def test_resamples_keep_stratum_sizes(self) -> None:
+        outcomes = StratifiedOutcomes(
+            np.array([1.0, 1.0, 0.0, 5.0, 7.0]), np.array(["a", "a", "b", "b", "b"]),
+            np.array([0.0, 1.0]), np.array(["a", "b"]),
+        )
+
+        means = bootstrap_means(outcomes, resamples=200, seed=1, chunk_size=64)
+
+        self.assertEqual(means.shape, (2, 200))
+        # Stratum "a" always contributes 2 of 5 (it only holds ones), so treatment means stay within [2, 2 + 21] / 5.
+        self.assertTrue(np.all(means[0] >= 2 / 5) and np.all(means[0] <= 23 / 5))
+        self.assertTrue(set(np.unique(means[1])) <= {0.0, 0.5, 1.0})
+        np.testing.assert_array_equal(means, bootstrap_means(outcomes, resamples=200, seed=1, chunk_size=64))
+
+    def test_undefined_intervals_have_null_bounds_and_round_trip(self) -> None:
+        strata = np.array(["a", "a", "b", "b"])
+        outcomes = {
+            "meanSearchMs": StratifiedOutcomes(np.array([3.0, 5.0, 4.0, 6.0]), strata, np.array([0.0, 0.0, 0.0, 5.0]),
+                                               strata),
+            "notFoundRate": StratifiedOutcomes(np.array([1.0, 0.0, 1.0, 1.0]), strata, np.zeros(4), strata),
+        }
+
+        means_ratio, proportions_ratio = bootstrap_confidence_intervals(
+            [_effect_size_report("meanSearchMs", "ratio_of_means"),
+             _effect_size_report("notFoundRate", "ratio_of_proportions")],
+            outcomes, ConfidenceIntervalConfig(resamples=200),
+        )
+
+        # Some resamples draw no non-zero control outcome, so the ratio of means is undefined for them.
+        self.assertIsNone(means_ratio.low)
+        self.assertIsNone(means_ratio.high)
+        self.assertEqual(type(means_ratio).model_validate_json(means_ratio.model_dump_json()), means_ratio)
+        # Zero control events are corrected instead, so every resample has a finite ratio.
+        self.assertGreater(proportions_ratio.low, 1.0)
+        self.assertGreaterEqual(proportions_ratio.high, proportions_ratio.low)
+
+    def test_rejects_analytic_methods(self) -> None:
+        with self.assertRaises(ValueError):
+            bootstrap_confidence_intervals(self.effect_sizes, self.outcomes, ConfidenceIntervalConfig(method="wilson"))
+
+
+class TestEffectSizes(unittest.TestCase):
+    def test_mixed_effect_types_in_one_batch(self) -> None:
+        configs = [
+            EffectSizeConfig(metric="notFoundRate", type="difference_of_proportions"),
+            EffectSizeConfig(metric="notFoundRate", type="odds_ratio"),
+            EffectSizeConfig(metric="notFoundRate", type="log_odds_ratio"),
+            EffectSizeConfig(metric="notFoundRate", type="ratio_of_proportions"),
+            EffectSizeConfig(metric="meanSearchMs", type="ratio_of_means"),
+            EffectSizeConfig(metric="meanSearchMs", type="difference_in_means"),
+        ]
+        counts = EffectCounts(
+            treatment_total=np.array([70, 70, 70, 50, 4, 4]),
+            treatment_sum=np.array([56, 56, 56, 5, 40.0, 40.0]),
+            treatment_sum_sq=np.array([56, 56, 56, 5, 500.0, 500.0]),
+            control_total=np.array([80, 80, 80, 50, 3, 3]),
+            control_sum=np.array([48, 48, 48, 0, 15.0, 15.0]),
+            control_sum_sq=np.array([48, 48, 48, 0, 83.0, 83.0]),
+        )
+
+        batch = compute_effect_sizes(configs, counts, ci_config=ConfidenceIntervalConfig(method="normal_approx"))
+        reports = batch.reports(repeat_runs_used=3)
+
+        self.assertAlmostEqual(reports[0].delta, 0.2)
+        self.assertAlmostEqual(reports[0].p_treatment, 0.8)
+        self.assertAlmostEqual(reports[1].ratio, (56 * 32) / (14 * 48))
+        self.assertAlmostEqual(reports[2].delta, np.log((56 * 32) / (14 * 48)))
+        self.assertAlmostEqual(reports[2].ratio, reports[1].ratio)
+        # Zero control events: every cell is corrected by +0.5.
+        self.assertAlmostEqual(reports[3].ratio, (5.5 / 51) / (0.5 / 51))
+        self.assertAlmostEqual(reports[4].ratio, 2.0)
+        self.assertIsNone(reports[4].p_treatment)
+        self.assertAlmostEqual(reports[5].delta, 5.0)
+        self.assertEqual({report.repeat_runs_used for report in reports}, {3})
+
+        intervals = batch.interval_reports()
+        se = np.sqrt(0.8 * 0.2 / 70 + 0.6 * 0.4 / 80)
+        self.assertAlmostEqual(intervals[0].low, 0.2 - 1.959963984540054 * se)
+        self.assertLess(intervals[1].low, reports[1].ratio)
+        self.assertGreater(intervals[1].high, reports[1].ratio)
+        self.assertAlmostEqual(np.log(intervals[1].low), intervals[2].low)
+
+    def test_wilson_uses_newcombe_interval_for_differences(self) -> None:
+        counts = EffectCounts(treatment_total=np.array([70, 0]), treatment_sum=np.array([56, 0]),
+                              control_total=np.array([80, 10]), control_sum=np.array([48, 1]))
+
+        batch = compute_effect_sizes(EffectSizeConfig(metric="notFoundRate"), counts,
+                                     ci_config=ConfidenceIntervalConfig(method="wilson"))
+
+        # Newcombe (1998), method 10: 56/70 vs 48/80 -> [0.0524, 0.3339].
+        self.assertAlmostEqual(batch.low[0], 0.0524, places=4)
+        self.assertAlmostEqual(batch.high[0], 0.3339, places=4)
+        self.assertTrue(np.isnan(batch.estimate[1]) and np.isnan(batch.low[1]))
+        with self.assertRaises(ValueError):
+            compute_effect_sizes(EffectSizeConfig(metric="notFoundRate"), counts, ci_config=ConfidenceIntervalConfig())
+
+    def test_empty_cohort_intervals_have_null_bounds_and_round_trip(self) -> None:
+        counts = EffectCounts(treatment_total=np.array([70, 0]), treatment_sum=np.array([56, 0]),
+                              control_total=np.array([80, 10]), control_sum=np.array([48, 1]))
+
+        intervals = compute_effect_sizes(EffectSizeConfig(metric="notFoundRate"), counts,
+                                         ci_config=ConfidenceIntervalConfig(method="wilson")).interval_reports()
+
+        self.assertIsNotNone(intervals[0].low)
+        self.assertIsNone(intervals[1].low)
+        self.assertIsNone(intervals[1].high)
+        for interval in intervals:
+            self.assertEqual(type(interval).model_validate_json(interval.model_dump_json()), interval)
+
+
+def _run(not_found: int, total: int, status: str = "COMPLETED") -> EvaluatorRun:
+    return EvaluatorRun(
+        run_id=1, status=status, totalCount=total, failedCount=0, foundCount=total - not_found, partialFoundCount=0,
+        totalDurationMs=0, totalBytes=0, searchDurationMs=0, notFoundCount=not_found,
+        notFoundRate=not_found / max(total, 1),
+    )
+
+
+class TestEffectAggregation(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(11)
+        # (arm, repeat, stratum, split, notFoundCount, totalCount)
+        self.stream = []
+        for repeat in range(4):
+            for stratum in ("CA", "NY", "TX"):
+                for arm, rate in (("treatment", 0.3), ("control", 0.2)):
+                    total = int(rng.integers(20, 60))
+                    split = "HOLDOUT" if stratum == "TX" else "TEST"
+                    self.stream.append((arm, repeat, stratum, split, int(rng.binomial(total, rate)), total))
+
+    @staticmethod
+    def _reference(aggregation: str, seen: list) -> float:
+        def rate(rows):
+            return sum(row[4] for row in rows) / sum(row[5] for row in rows)
+
+        def arm(rows, name):
+            return [row for row in rows if row[0] == name]
+
+        def unit_effects(key):
+            units = {}
+            for row in seen:
+                units.setdefault(row[key], []).append(row)
+            return [
+                (rate(arm(rows, "treatment")) - rate(arm(rows, "control")), sum(row[5] for row in arm(rows, "control")))
+                for rows in units.values() if arm(rows, "treatment") and arm(rows, "control")
+            ]
+
+        if aggregation == "pooled_over_repeats":
+            return rate(arm(seen, "treatment")) - rate(arm(seen, "control"))
+        if aggregation == "holdout_primary":
+            holdout = [row for row in seen if row[3] == "HOLDOUT"]
+            return rate(arm(holdout, "treatment")) - rate(arm(holdout, "control"))
+        if aggregation in ("mean_of_run_rates", "median_of_run_rates"):
+            combine = statistics.mean if aggregation == "mean_of_run_rates" else statistics.median
+            return (combine([row[4] / row[5] for row in arm(seen, "treatment")])
+                    - combine([row[4] / row[5] for row in arm(seen, "control")]))
+        if aggregation == "weighted_by_control_total":
+            effects = unit_effects(1)
+            return sum(effect * weight for effect, weight in effects) / sum(weight for _, weight in effects)
+        if aggregation == "macro_average":
+            return statistics.mean(effect for effect, _ in unit_effects(2))
+        return min(effect for effect, _ in unit_effects(2))
+
+    def test_incremental_estimates_match_full_recompute(self) -> None:
+        aggregations = ["pooled_over_repeats", "mean_of_run_rates", "median_of_run_rates",
+                        "weighted_by_control_total", "macro_average", "worst_stratum", "holdout_primary"]
+        aggregator = EffectAggregator([
+            EffectSizeConfig(metric="notFoundRate", aggregation=aggregation) for aggregation in aggregations
+        ])
+
+        for position, (arm, repeat, stratum, split, not_found, total) in enumerate(self.stream):
+            aggregator.add_run(_run(not_found, total), arm=arm, repeat_index=repeat, stratum=stratum, split=split)
+            if position < 11 or position % 2 == 0:
+                continue
+            seen = self.stream[:position + 1]
+            for aggregation, accumulator in zip(aggregations, aggregator.accumulators):
+                self.assertAlmostEqual(accumulator.estimate(), self._reference(aggregation, seen), msg=aggregation)
+
+        reports = aggregator.reports()
+        self.assertEqual(reports[0].repeat_runs_used, 4)
+        self.assertAlmostEqual(reports[0].delta, reports[0].p_treatment - reports[0].p_control)
+
+    def test_ignores_incomplete_runs_and_undefined_units(self) -> None:
+        accumulator = EffectAccumulator(EffectSizeConfig(metric="notFoundRate", type="ratio_of_proportions",
+                                                         aggregation="worst_stratum"))
+
+        accumulator.add_run(_run(5, 10), arm="treatment", repeat_index=0, stratum="CA")
+        accumulator.add_run(_run(0, 10), arm="control", repeat_index=0, stratum="CA")
+        accumulator.add_run(_run(9, 10, status="FAILED"), arm="control", repeat_index=0, stratum="NY")
+        # CA has a zero cell and is corrected like compute_effect_sizes; NY has no control runs and is left out.
+        counts = EffectCounts(treatment_total=np.array([10]), treatment_sum=np.array([5]),
+                              control_total=np.array([10]), control_sum=np.array([0]))
+        corrected = compute_effect_sizes(accumulator.config, counts).estimate[0]
+        self.assertAlmostEqual(corrected, (5.5 / 11) / (0.5 / 11))
+        self.assertAlmostEqual(accumulator.estimate(), corrected)
+
+        accumulator.add_run(_run(4, 10), arm="treatment", repeat_index=0, stratum="NY")
+        accumulator.add_run(_run(2, 10), arm="control", repeat_index=0, stratum="NY")
+        accumulator.add_run(_run(3, 10), arm="control", repeat_index=1, stratum="CA")
+        self.assertAlmostEqual(accumulator.estimate(), min(0.5 / 0.15, 0.4 / 0.2))
+        self.assertEqual(accumulator.runs_added, 5)
+
+
+class TestSequentialRepeatPlanner(unittest.TestCase):
+    @staticmethod
+    def _planner(repeats: int = 6, **reproducibility) -> SequentialRepeatPlanner:
+        return SequentialRepeatPlanner(
+            reproducibility=ReproducibilityConfig(**{"sequential_stopping": True, **reproducibility}),
+            sampling=SamplingConfig(repeats=repeats, stratification=StratificationConfig()),
+            min_delta=0.05,
+            confidence=0.95,
+        )
+
+    def test_dead_hypothesis_stops_after_first_repeat(self) -> None:
+        planner = self._planner()
+
+        report = planner.add_runs(_run(200, 1000), _run(205, 1000))
+
+        self.assertFalse(planner.should_continue)
+        self.assertEqual((report.verdict, report.reason, report.repeats_run), ("FAIL", "effect_gate_unreachable", 1))
+        self.assertTrue(report.stopped_early)
+        with self.assertRaises(ValueError):
+            planner.add_repeat(200, 1000, 199, 1000)
+
+    def test_direction_flip_fails_immediately(self) -> None:
+        planner = self._planner()
+
+        first = planner.add_repeat(400, 1000, 200, 1000)
+        second = planner.add_repeat(150, 1000, 200, 1000)
+
+        self.assertEqual(first.verdict, "CONTINUE")
+        self.assertEqual((second.verdict, second.reason), ("FAIL", "repeat_direction_flip"))
+
+    def test_clear_effect_settles_once_required_repeats_ran(self) -> None:
+        planner = self._planner()
+
+        verdicts = [planner.add_repeat(400, 1000, 200, 1000).verdict for _ in range(3)]
+
+        self.assertEqual(verdicts, ["CONTINUE", "CONTINUE", "PASS"])
+        self.assertEqual(planner.report().reason, "effect_gate_settled")
+        self.assertTrue(planner.report().stopped_early)
+
+    def test_variance_bound_and_disabled_mode(self) -> None:
+        noisy = self._planner(max_allowed_repeat_variance=0.01)
+        noisy.add_repeat(300, 1000, 200, 1000)
+        report = noisy.add_repeat(700, 1000, 200, 1000)
+        self.assertEqual((report.verdict, report.reason), ("FAIL", "repeat_variance_exceeded"))
+
+        fixed = self._planner(repeats=3, sequential_stopping=False)
+        reports = [fixed.add_repeat(200, 1000, 205, 1000) for _ in range(3)]
+        self.assertEqual([r.verdict for r in reports], ["CONTINUE", "CONTINUE", "FAIL"])
+        self.assertEqual(reports[-1].reason, "max_repeats")
+        self.assertFalse(reports[-1].stopped_early)
+
+
+class TestSampleSizePlanner(unittest.TestCase):
+    def test_matches_two_proportion_formula_without_strata(self) -> None:
+        plan = plan_sample_size(control_rates=0.2, min_delta=0.05, confidence=0.95,
+                                stratification=StratificationConfig(enabled=False))
+
+        # (1.96 + 0.8416)^2 * (0.2 * 0.8 + 0.25 * 0.75) / 0.05^2 = 1090.7
+        self.assertEqual((plan.per_bin, plan.bins, plan.sample_size), (1091, 1, 1091))
+        self.assertGreaterEqual(plan.achieved_power, 0.8)
+        self.assertIsNone(plan.clamped_by)
+
+    def test_per_stratum_sizes_respect_bin_limits(self) -> None:
+        stratification = StratificationConfig(bins_count=32, min_per_bin=10, max_per_bin=60)
+
+        marginal = plan_sample_size(control_rates=0.2, min_delta=0.05, confidence=0.95,
+                                    stratification=stratification)
+        large_effect = plan_sample_size(control_rates=0.2, min_delta=0.4, confidence=0.95,
+                                        stratification=stratification)
+        tiny_effect = plan_sample_size(control_rates=np.linspace(0.1, 0.3, 32), min_delta=0.01, confidence=0.95,
+                                       stratification=stratification)
+
+        self.assertEqual(marginal.per_bin, 35)
+        self.assertEqual(marginal.apply_to(SamplingConfig(stratification=stratification)).sample_size, 35 * 32)
+        self.assertEqual((large_effect.per_bin, large_effect.clamped_by), (10, "min_per_bin"))
+        self.assertGreater(large_effect.achieved_power, 0.99)
+        self.assertEqual((tiny_effect.per_bin, tiny_effect.clamped_by), (60, "max_per_bin"))
+        self.assertGreater(tiny_effect.required_per_bin, 60)
+        self.assertLess(tiny_effect.achieved_power, 0.8)
+        with self.assertRaises(ValueError):
+            plan_sample_size(control_rates=[0.2, 0.3], min_delta=0.05, confidence=0.95, stratification=stratification)
+
+
+class TestAcceptanceGates(unittest.TestCase):
+    def setUp(self) -> None:
+        self.calls = []
+
+    def _probe(self, name: str, value):
+        def check():
+            self.calls.append(name)
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        return check
+
+    def _gates(self, config: AcceptanceConfig, **overrides):
+        values = dict(delta_not_found_rate=0.08, failed_rate_increase=0.01, ci_bounds=(0.02, 0.11),
+                      novelty_passes=True, mechanism_passes=True, holdout_confirms=True)
+        values.update(overrides)
+        return acceptance_gates(config, **{name: self._probe(name, value) for name, value in values.items()})
+
+    def test_cheap_rejection_skips_expensive_gates(self) -> None:
+        seen = []
+
+        evaluation = evaluate_gates(self._gates(AcceptanceConfig(), delta_not_found_rate=0.01), on_result=seen.append)
+
+        self.assertEqual((evaluation.status, evaluation.primary_reason), ("REJECTED", "effect_below_min_delta"))
+        self.assertEqual(self.calls, ["delta_not_found_rate"])
+        self.assertEqual(evaluation.skipped(), ["failed_rate_increase", "ci_excludes_zero", "novelty", "mechanism",
+                                                "holdout_confirm"])
+        self.assertEqual(len(seen), 6)
+
+    def test_runs_gates_in_cost_order_until_accepted(self) -> None:
+        gates = self._gates(AcceptanceConfig(require_novelty=False))
+        gates.insert(0, AcceptanceGate("manifest_size", 5.0, self._probe("manifest_size", True), "manifest_too_big"))
+
+        evaluation = evaluate_gates(gates)
+
+        self.assertEqual((evaluation.status, evaluation.primary_reason), ("ACCEPTED", "all_gates_passed"))
+        self.assertEqual(self.calls, ["delta_not_found_rate", "failed_rate_increase", "manifest_size", "ci_bounds",
+                                      "mechanism_passes", "holdout_confirms"])
+
+    def test_ci_gate_and_errors_set_primary_reason(self) -> None:
+        straddles = evaluate_gates(self._gates(AcceptanceConfig(), ci_bounds=(-0.01, 0.1)))
+        undefined = evaluate_gates(self._gates(AcceptanceConfig(), ci_bounds=(None, None)))
+        broken = evaluate_gates(self._gates(AcceptanceConfig(), mechanism_passes=RuntimeError("tracing down")))
+
+        self.assertEqual(straddles.primary_reason, "ci_includes_zero")
+        self.assertEqual((undefined.status, undefined.primary_reason), ("REJECTED", "ci_includes_zero"))
+        self.assertEqual((broken.status, broken.primary_reason), ("ERROR", "mechanism_error"))
+        self.assertEqual(broken.results[-2].error, "RuntimeError: tracing down")
+        self.assertEqual(broken.skipped(), ["holdout_confirm"])
+
+
+def _theory(manifest_sql: list, *group_sqls: str) -> Theory:
+    return Theory(
+        name="t", dsl={}, manifest_sql=manifest_sql,
+        query_defs=[QueryDefinition(name=f"q{index}", group_sql=sql) for index, sql in enumerate(group_sqls)],
+    )
+
+
+class TestComplexityAnalyzer(unittest.TestCase):
+    MANIFEST = [
+        "CREATE TABLE theory.street_stats (street_id BIGINT PRIMARY KEY, word_count INT)",
+        "INSERT INTO theory.street_stats SELECT s.id, 1 FROM app.street s",
+        "CREATE OR REPLACE VIEW theory.street_risk AS SELECT st.street_id FROM theory.street_stats st "
+        "JOIN app.street s ON s.id = st.street_id JOIN app.city c ON c.id = s.city_id",
+        "CREATE MATERIALIZED VIEW IF NOT EXISTS theory.\"Risky\" AS SELECT r.street_id FROM theory.street_risk r, "
+        "app.city c WHERE c.id = 1",
+    ]
+
+    def test_shape_counts_joins_subqueries_and_cross_joins(self) -> None:
+        shape = sql_shape(tokenize_sql(
+            "SELECT * FROM a, b CROSS JOIN c WHERE a.id IN (SELECT id FROM d JOIN e ON d.id = e.id) "
+            "UNION SELECT * FROM f, g -- FROM h, i",
+            comments=False,
+        ))
+        self.assertEqual((shape.joins, shape.cross_joins, shape.subqueries), (4, 2, 1))
+        self.assertEqual(shape.references, ("a", "b", "c", "d", "e", "f", "g"))
+
+    def test_theory_report_inlines_views_and_memoizes(self) -> None:
+        theory = _theory(self.MANIFEST, "a.street_id IN (SELECT street_id FROM theory.street_risk)")
+        analysis = analyze_theory(theory)
+        self.assertEqual(analysis.dependencies,
+                         {"street_stats": (), "street_risk": ("street_stats",), "Risky": ("street_risk",)})
+        reformatted = _theory([sql.replace(" ", "  ") for sql in self.MANIFEST],
+                              "a.street_id  IN (SELECT street_id FROM theory.street_risk)")
+        self.assertIs(analyze_theory(reformatted), analysis)
+
+        report = complexity_report(theory, ComplexityPenaltyConfig())
+        self.assertEqual((report.objects_created_count, report.created_views_count, report.created_mv_count,
+                          report.created_tables_count, report.manifest_size_kb), (3, 1, 1, 1, 1))
+        self.assertEqual(report.estimated_join_complexity, 2)
+        self.assertEqual(report.estimated_query_cost_class, "MED")
+        self.assertTrue(report.passes_complexity_gate)
+
+        tight = complexity_report(theory, ComplexityPenaltyConfig(max_joins_per_group_sql=1))
+        self.assertEqual(tight.estimated_query_cost_class, "HIGH")
+        self.assertFalse(tight.passes_complexity_gate)
+        cross = complexity_report(_theory([], "EXISTS (SELECT 1 FROM app.city c, app.street s)"),
+                                  ComplexityPenaltyConfig())
+        self.assertEqual(cross.estimated_query_cost_class, "HIGH")
+
+    def test_zero_budgets_keep_penalty_finite(self) -> None:
+        theory = _theory(self.MANIFEST, "a.street_id IN (SELECT street_id FROM theory.street_risk)")
+        report = complexity_report(theory, ComplexityPenaltyConfig(max_objects=0, max_joins_per_group_sql=0))
+
+        self.assertEqual(report.penalty_score, 3.0)
+        self.assertEqual(report.estimated_query_cost_class, "HIGH")
+        self.assertEqual(ComplexityPenaltyReport.model_validate_json(report.model_dump_json()), report)
+        empty = complexity_report(_theory([], "a.id = 1"), ComplexityPenaltyConfig(max_objects=0))
+        self.assertEqual((empty.penalty_score, empty.estimated_query_cost_class), (0.0, "LOW"))
+
+
+class TestRanking(unittest.TestCase):
+    def _decision(self, config: RankingConfig, delta: float, status: str = "ACCEPTED", novelty: float = 0.0):
+        effect = EffectSizeReport(config=EffectSizeConfig(metric="notFoundRate"), delta=delta, repeat_runs_used=3)
+        ranking = ranking_report(config, round_index=1, accepted=status == "ACCEPTED", effect_sizes=[effect])
+        score = Scoring(effect_sizes=[effect], ranking=ranking)
+        return Decision(status=status, is_ready=False, primary_reason="r", evidence=ExecutionEvidence(), score=score)
+
+    def test_formula_and_tie_breakers_are_validated_at_load(self) -> None:
+        RankingConfig(rank_score_formula="clip(delta, 0, 1) * 2 if accepted else -1", tie_breakers=["-round_index"])
+        for formula in ("__import__('os')", "delta.real", "unknown + 1", "max(delta)"):
+            with self.assertRaises(ValueError):
+                RankingConfig(rank_score_formula=formula, tie_breakers=["delta"])
+        with self.assertRaises(ValueError):
+            RankingConfig(rank_score_formula="delta", tie_breakers=["delta sideways"])
+
+    def test_best_selection_uses_rounded_score_then_tie_breakers(self) -> None:
+        config = RankingConfig(rank_score_formula="delta * 10", tie_breakers=["ratio", "-round_index"],
+                               rounding_decimals=2)
+        # No effect size: the formula is undefined, so the report carries no score and the table ranks it last.
+        self.assertIsNone(ranking_report(config, round_index=1, accepted=True).rank_score)
+        table = RankingTable()
+        for round_index, (delta, status) in enumerate(
+                [(0.1, "ACCEPTED"), (0.1004, "ACCEPTED"), (0.3, "REJECTED"), (0.1001, "ACCEPTED")], start=1):
+            table.append(self._decision(config, delta, status), round_index=round_index)
+        self.assertEqual(table.order(config).tolist(), [2, 0, 1, 3])
+        self.assertEqual(table.best_round_index(config), 1)
+        self.assertEqual(table.best_round_index(config, accepted_only=False), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
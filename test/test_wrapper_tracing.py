@@ -0,0 +1,251 @@
+import gc
+import io
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List
+
+from pydantic import ValidationError
+
+from evolver.level0.base_model import (
+    dump_model_json,
+    gc_paused,
+    load_model_json,
+    trusted_construct,
+    type_adapter,
+    validate_json,
+)
+from evolver.level0.dsl.execution import LoggingConfig, TracingConfig
+from evolver.level0.dsl.scoring import EffectSizeConfig
+from evolver.level0.dsl.tracing import Tracing, TracingSession
+from evolver.level0.wrapper.tracing_index import TracingWatchIndex
+from evolver.level0.wrapper.tracing_ingest import JsonArrayScanner, ingest_tracing_log_chunks, ingest_tracing_logs
+from evolver.level0.wrapper.tracing_store import TracingStore
+
+
+def tracing_record(line: int, *, then=None, **overrides) -> dict:
+    record = {
+        "phase": "CALL",
+        "point": "net.osmand.search.SearchUICore",
+        "lineOfCode": line,
+        "ifCondition": True,
+        "watchesBefore": {"#text": f"addr {line}", "candidate_streets_count": line % 7},
+        "watchesAfter": None,
+        "watchesOnError": None,
+        "stackTrace": None,
+        "errorMessage": None,
+        "timestampMs": 1_700_000_000_000 + line,
+        "durationMs": line % 13,
+        "thenTracings": then,
+    }
+    record.update(overrides)
+    return record
+
+
+def sample_records() -> list:
+    return [
+        tracing_record(660, then=[
+            tracing_record(700, watchesAfter={"return.size()": 3}),
+            tracing_record(701, then=[], ifCondition=False),
+        ]),
+        tracing_record(
+            900, phase="ERROR", watchesBefore=None, watchesOnError={"throw.message": "boom"},
+            stackTrace="java.lang.IllegalStateException\n\tat X.y(X.java:1)", errorMessage="boom",
+        ),
+        tracing_record(660, watchesBefore={}),
+    ]
+
+
+class TestTracingStore(unittest.TestCase):
+    def test_round_trips_json_shape_and_models(self) -> None:
+        records = sample_records()
+        tracings = [Tracing.model_validate(record) for record in records]
+
+        store = TracingStore.from_tracings(tracings)
+
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.record_count, 5)
+        self.assertEqual(store.to_json_records(), [tracing.model_dump(mode="json") for tracing in tracings])
+        self.assertEqual(store.to_tracings(), tracings)
+        self.assertEqual(store[1].errorMessage, "boom")
+
+    def test_columns_share_interned_strings_and_nesting(self) -> None:
+        store = TracingStore.from_json_records(sample_records())
+
+        self.assertEqual(list(store.parent), [-1, 0, 0, -1, -1])
+        self.assertEqual(store.children(0), [1, 2])
+        self.assertEqual(len(store.points), 1)
+        self.assertEqual(store.expressions.values[:2], ["#text", "candidate_streets_count"])
+        self.assertEqual(list(store.duration_ms), [660 % 13, 700 % 13, 701 % 13, 900 % 13, 660 % 13])
+
+
+class TestDslModelSerialization(unittest.TestCase):
+    def setUp(self) -> None:
+        records = sample_records() + [tracing_record(line) for line in range(1, 400)]
+        self.session_json = json.dumps({"tracing_id": "t1", "breakpoints": [], "tracings": records}).encode("utf-8")
+        self.session = TracingSession.model_validate_json(self.session_json)
+
+    def test_validation_paths_agree(self) -> None:
+        self.assertEqual(load_model_json(TracingSession, self.session_json), self.session)
+        records = sample_records()
+        self.assertEqual(validate_json(List[Tracing], json.dumps(records)), self.session.tracings[:len(records)])
+        self.assertIs(type_adapter(List[Tracing]), type_adapter(List[Tracing]))
+        with self.assertRaises(ValidationError):
+            load_model_json(Tracing, json.dumps(tracing_record(0)))
+
+        trusted = trusted_construct(TracingSession, json.loads(self.session_json))
+        self.assertEqual(trusted, self.session)
+        self.assertIsInstance(trusted.tracings[0].thenTracings[0], Tracing)
+
+    def test_streaming_dump_matches_model_dump_json(self) -> None:
+        expected = self.session.model_dump_json().encode("utf-8")
+        buffer = io.BytesIO()
+        self.assertEqual(dump_model_json(self.session, buffer), len(expected))
+        self.assertEqual(buffer.getvalue(), expected)
+        with TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "evidence" / "session.json"
+            self.session.dump_json_to(path)
+            self.assertEqual(path.read_bytes(), expected)
+
+    def test_dsl_models_keep_their_extra_field_handling(self) -> None:
+        config = EffectSizeConfig.model_validate_json('{"metric": "notFoundRate", "unknown": 1}')
+        self.assertEqual(config, EffectSizeConfig(metric="notFoundRate"))
+        with self.assertRaises(ValidationError):
+            LoggingConfig.model_validate_json('{"unknown": 1}')
+
+    def test_gc_pauses_nest_across_threads(self) -> None:
+        self.assertTrue(gc.isenabled())
+        entered, release = threading.Event(), threading.Event()
+
+        def pause_in_thread() -> None:
+            with gc_paused():
+                entered.set()
+                release.wait()
+
+        thread = threading.Thread(target=pause_in_thread)
+        thread.start()
+        entered.wait()
+        with gc_paused():
+            release.set()
+            thread.join()
+            # The other thread's pause ended first; this one still holds the collector off.
+            self.assertFalse(gc.isenabled())
+        self.assertTrue(gc.isenabled())
+
+        gc.disable()
+        try:
+            with gc_paused():
+                pass
+            self.assertFalse(gc.isenabled())
+        finally:
+            gc.enable()
+
+
+class TestTracingWatchIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        records = sample_records() + [
+            tracing_record(660, ifCondition=False, watchesBefore={"candidate_streets_count": "12"}),
+            tracing_record(660, then=[
+                tracing_record(700, watchesAfter={"return.size()": 9, "best": {"scores": [0.5, 0.25]}}),
+            ]),
+        ]
+        self.index = TracingWatchIndex(TracingStore.from_json_records(records))
+
+    def test_lookup_filters_by_if_condition(self) -> None:
+        point = "net.osmand.search.SearchUICore"
+
+        all_hits = self.index.lookup(point, 660, "candidate_streets_count")
+        true_hits = self.index.lookup(point, 660, "candidate_streets_count", if_condition=True)
+
+        self.assertEqual(list(all_hits.as_floats()), [660 % 7, 12.0, 660 % 7])
+        self.assertEqual(list(true_hits.record_ids), [0, 6])
+        self.assertEqual(len(self.index.lookup(point, 661, "candidate_streets_count")), 0)
+        self.assertEqual(len(self.index.lookup(point, 660, "unknown")), 0)
+
+    def test_lookup_nested_records_and_value_paths(self) -> None:
+        point = "net.osmand.search.SearchUICore"
+
+        nested = self.index.lookup(point, 700, "return.size()", watch_field="watchesAfter", ancestors=[(point, 660)])
+        scores = self.index.lookup(point, 700, "best", watch_field="watchesAfter", value_path=["scores", 1])
+        orphan = self.index.lookup(point, 700, "return.size()", watch_field="watchesAfter", ancestors=[(point, 900)])
+
+        self.assertEqual(nested.values, [3, 9])
+        self.assertEqual(scores.values, [0.25])
+        self.assertEqual(len(orphan), 0)
+
+
+class RecordedLogsHandler(BaseHTTPRequestHandler):
+    body = b"[]"
+
+    def do_GET(self) -> None:
+        if self.headers.get("X-TRACING_MDC_KEY") != "trace-1" or self.path != "/tracing/trace-1/logs":
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class TestTracingLogIngestion(unittest.TestCase):
+    def test_scanner_splits_elements_across_arbitrary_chunks(self) -> None:
+        records = [{"a": "x]}\\\"[{,", "b": [1, {"c": None}]}, {"d": "\u00e9"}, {}]
+        body = json.dumps(records)
+        scanner = JsonArrayScanner()
+
+        elements = []
+        for char in body:
+            elements.extend(scanner.feed(char))
+
+        self.assertTrue(scanner.finished)
+        self.assertEqual([json.loads(element) for element in elements], records)
+
+    def test_chunk_ingestion_stops_at_caps(self) -> None:
+        body = json.dumps(sample_records() * 4).encode("utf-8")
+        chunks = [body[index:index + 97] for index in range(0, len(body), 97)]
+
+        complete = ingest_tracing_log_chunks(chunks)
+        by_records = ingest_tracing_log_chunks(chunks, max_records=5)
+        by_bytes = ingest_tracing_log_chunks(chunks, max_bytes=len(body) // 2)
+
+        self.assertEqual((complete.records_ingested, complete.truncated), (12, False))
+        self.assertEqual(complete.store.to_json_records()[:3], [
+            Tracing.model_validate(record).model_dump(mode="json") for record in sample_records()
+        ])
+        self.assertEqual((by_records.records_ingested, by_records.stop_reason), (5, "max_records"))
+        self.assertTrue(by_bytes.truncated)
+        self.assertEqual(by_bytes.stop_reason, "max_bytes")
+        self.assertLess(by_bytes.records_ingested, 12)
+
+    def test_ingests_from_local_http_server(self) -> None:
+        RecordedLogsHandler.body = json.dumps(sample_records()).encode("utf-8")
+        server = ThreadingHTTPServer(("127.0.0.1", 0), RecordedLogsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        result = ingest_tracing_logs(
+            "trace-1",
+            config=TracingConfig(max_tracing_requests=100),
+            base_url=f"http://127.0.0.1:{server.server_address[1]}",
+            chunk_size=64,
+        )
+
+        self.assertEqual(result.records_ingested, 3)
+        self.assertEqual(result.store.record_count, 5)
+        self.assertFalse(result.truncated)
+
+    def test_rejects_non_local_hosts(self) -> None:
+        with self.assertRaises(ValueError):
+            ingest_tracing_logs("trace-1", config=TracingConfig(), base_url="http://example.com:8080")
+
+
+if __name__ == "__main__":
+    unittest.main()